@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cards import CARDS, Deck, Player
+from match import Match, PLAYER
+from utils.hand_analyzer import HandAnalyzer
+from utils.hand_evaluator import HandEvaluator
+from utils.hand_rankings import HandRanks
+from utils.probability_calculator import ProbabilityCalculator
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STREETS = (("Hole Cards", 0), ("Flop", 3), ("Turn", 4), ("River", 5))
+
+
+def best_rate(function, items, repeats):
+    """Call `function` on every item `repeats` times and return the best calls per second."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for item in items:
+            function(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def percentile(values, fraction):
+    """Return the value below which a fraction of the sorted values fall (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class BenchmarkSuite(object):
+    """
+    Fixed-seed benchmarks of the hand evaluators, the deck and the probability queries.
+
+    Every benchmark returns a list of metrics, dictionaries with a `name`, a `value`,
+    a `unit`, whether a higher value is better and whether it is a tail latency,
+    so the results can be saved as JSON and compared against a baseline.
+    """
+
+    SEED = 2024
+    NUM_HANDS = 20000  # Hands evaluated by each evaluator benchmark
+    NUM_DEALS = 5000  # Shuffles and deals timed
+    NUM_QUERIES = 200  # Probability queries timed per street
+    REPEATS = 5  # Throughput benchmarks keep the best of these runs
+
+    @staticmethod
+    def fixed_hands(size, count, seed):
+        """Return `count` hands of `size` distinct Card objects drawn with a fixed seed."""
+        rng = random.Random(seed)
+        return [[CARDS[code] for code in rng.sample(range(52), size)] for _ in range(count)]
+
+    @staticmethod
+    def metric(name, value, unit, higher_is_better=True, tail=False):
+        return {"name": name, "value": value, "unit": unit, "higher_is_better": higher_is_better, "tail": tail}
+
+    @staticmethod
+    def bench_evaluators(seed, num_hands, repeats):
+        """Evaluations per second of HandAnalyzer.hand_rank and HandEvaluator on 5 and 7 cards."""
+        metric = BenchmarkSuite.metric
+        five = BenchmarkSuite.fixed_hands(5, num_hands, seed)
+        seven = BenchmarkSuite.fixed_hands(7, num_hands, seed + 1)
+        five_codes = [[card.code for card in hand] for hand in five]
+        seven_codes = [[card.code for card in hand] for hand in seven]
+        # Build the lookup tables before timing anything
+        HandEvaluator.score_codes(seven_codes[0])
+        return [
+            metric("hand_rank_5_cards", best_rate(HandAnalyzer.hand_rank, five, repeats), "evals/s"),
+            metric("evaluator_5_cards", best_rate(HandEvaluator.score_codes, five_codes, repeats), "evals/s"),
+            metric("evaluator_7_cards", best_rate(HandEvaluator.score_codes, seven_codes, repeats), "evals/s"),
+            metric("best_hand_7_cards", best_rate(HandAnalyzer.best_hand, seven, repeats), "evals/s"),
+        ]
+
+    @staticmethod
+    def bench_dealing(seed, num_deals, repeats):
+        """Shuffles per second, and full heads-up deals (hole cards and board) per second."""
+        metric = BenchmarkSuite.metric
+        rng = random.Random(seed)
+        deck = Deck()
+
+        def shuffle(_):
+            deck.reset()
+            deck.shuffle(rng=rng)
+
+        def shuffle_and_deal(_):
+            deck.reset()
+            deck.shuffle(rng=rng)
+            for _ in range(9):
+                deck.deal()
+
+        rounds = range(num_deals)
+        return [
+            metric("shuffle", best_rate(shuffle, rounds, repeats), "shuffles/s"),
+            metric("shuffle_and_deal", best_rate(shuffle_and_deal, rounds, repeats), "deals/s"),
+        ]
+
+    @staticmethod
+    def bench_queries(seed, num_queries):
+        """Latency percentiles of ProbabilityCalculator.calculate_probability on every street, caches cleared."""
+        metric = BenchmarkSuite.metric
+        metrics = []
+        for street, community_cards in STREETS:
+            rng = random.Random(seed)
+            random.seed(seed)
+            latencies = []
+            for _ in range(num_queries):
+                match = Match(rng)
+                match.start([Player("Computadora"), Player("Jugador")])
+                match.draw_hole_cards()
+                if community_cards:
+                    match.draw_flop()
+                if community_cards > 3:
+                    match.draw_turn()
+                if community_cards > 4:
+                    match.draw_river()
+                ProbabilityCalculator.CACHE.clear()
+                start = time.perf_counter()
+                ProbabilityCalculator.calculate_probability(match, PLAYER, HandRanks.PAIR)
+                latencies.append((time.perf_counter() - start) * 1000)
+            name = street.lower().replace(" ", "_")
+            metrics.append(metric(f"query_{name}_p50", percentile(latencies, 0.50), "ms", False))
+            metrics.append(metric(f"query_{name}_p99", percentile(latencies, 0.99), "ms", False, True))
+        return metrics
+
+    @staticmethod
+    def run(seed=SEED, quick=False):
+        """
+        Run every benchmark.
+
+        Args:
+            seed (int): Seed of the hand sets, the shuffles and the sampled queries.
+            quick (bool): Use smaller workloads, for a fast sanity check.
+
+        Returns:
+            Dict: Machine description and the list of metrics.
+        """
+        scale = 10 if quick else 1
+        metrics = []
+        metrics += BenchmarkSuite.bench_evaluators(seed, BenchmarkSuite.NUM_HANDS // scale, BenchmarkSuite.REPEATS)
+        metrics += BenchmarkSuite.bench_dealing(seed, BenchmarkSuite.NUM_DEALS // scale, BenchmarkSuite.REPEATS)
+        metrics += BenchmarkSuite.bench_queries(seed, max(BenchmarkSuite.NUM_QUERIES // scale, 2))
+        return {
+            "seed": seed,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "metrics": metrics,
+        }
+
+    @staticmethod
+    def median_of(runs):
+        """Merge several outputs of `run` keeping the median value of every metric."""
+        merged = dict(runs[0], runs=len(runs))
+        merged["metrics"] = []
+        for position, metric in enumerate(runs[0]["metrics"]):
+            values = sorted(result["metrics"][position]["value"] for result in runs)
+            merged["metrics"].append(dict(metric, value=values[len(values) // 2]))
+        return merged
+
+    @staticmethod
+    def compare(results, baseline, threshold, gate_tail=False):
+        """
+        Compare results against a baseline.
+
+        Args:
+            results (Dict): The output of `run`.
+            baseline (Dict): A previous output of `run`.
+            threshold (float): Relative change (0.10 is 10%) in the wrong direction that counts as a regression.
+            gate_tail (bool): Also count tail latencies, which are noisy on sub-millisecond queries.
+
+        Returns:
+            List[Tuple[str, float, float, float, bool]]: Name, baseline value, new value,
+            relative change and whether it is a regression, for every metric in both runs.
+        """
+        previous = {metric["name"]: metric for metric in baseline["metrics"]}
+        rows = []
+        for metric in results["metrics"]:
+            old = previous.get(metric["name"])
+            if old is None or not old["value"]:
+                continue
+            change = (metric["value"] - old["value"]) / old["value"]
+            worse = -change if metric["higher_is_better"] else change
+            gated = gate_tail or not metric.get("tail", False)
+            rows.append((metric["name"], old["value"], metric["value"], change, gated and worse > threshold))
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the evaluators, the deck and the probability queries.")
+    parser.add_argument("--seed", type=int, default=BenchmarkSuite.SEED)
+    parser.add_argument("--quick", action="store_true", help="smaller workloads for a fast sanity check")
+    parser.add_argument("--runs", type=int, default=3, help="repeat the suite and keep the median of each metric")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown that fails the run")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--gate-tail", action="store_true", help="also fail on p99 latency regressions")
+    arguments = parser.parse_args()
+
+    results = BenchmarkSuite.median_of(
+        [BenchmarkSuite.run(arguments.seed, arguments.quick) for _ in range(max(arguments.runs, 1))]
+    )
+    for metric in results["metrics"]:
+        print(f"{metric['name']:<28}{metric['value']:>16,.2f} {metric['unit']}")
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    if arguments.save_baseline:
+        with open(arguments.baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"Baseline saved to {arguments.baseline}")
+        return 0
+    if not os.path.exists(arguments.baseline):
+        print("No baseline to compare against, run with --save-baseline to create one.")
+        return 0
+
+    with open(arguments.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    rows = BenchmarkSuite.compare(results, baseline, arguments.threshold, arguments.gate_tail)
+    print(f"\nCompared to {arguments.baseline} (threshold {arguments.threshold:.0%}):")
+    for name, old, new, change, regression in rows:
+        flag = "REGRESSION" if regression else ""
+        print(f"{name:<28}{old:>16,.2f}{new:>16,.2f}{change:>+9.1%} {flag}")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above the threshold.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,81 @@
 import random
-from itertools import combinations
+import sys
+from array import array
+from math import comb
+
+# Suits in the order the deck is built
+SUITS = ['Hearts', 'Clubs', 'Diamonds', 'Spades']
+NUM_CARDS = 52
+
+
+def card_code(suit, val):
+    """
+    Return the integer code (0-51) of a card.
+    Codes are rank * 4 + suit, where the rank goes from 0 (deuce) to 12 (ace).
+
+    Args:
+        suit (str): One of SUITS.
+        val (int): Value of the card, from 1 (ace) to 13 (king).
+
+    Raises:
+        ValueError: If the suit or the value is not valid.
+    """
+    if suit not in SUITS or val not in range(1, 14):
+        raise ValueError(f"Invalid card: {val!r} of {suit!r}.")
+    return ((val - 2) % 13) * 4 + SUITS.index(suit)
+
+
+# Short notation, like 'Ah' or 'Td': rank symbol from deuce to ace, then the suit initial
+RANK_SYMBOLS = "23456789TJQKA"
+SUIT_SYMBOLS = "hcds"
+
+
+def parse_card(text):
+    """
+    Return the integer code of a card written in short notation, like 'Ah', 'Td' or '10s'.
+
+    Raises:
+        ValueError: If the text is not a valid card.
+    """
+    text = text.strip()
+    rank_text, suit_text = text[:-1].upper().replace("10", "T"), text[-1:].lower()
+    if len(rank_text) != 1 or rank_text not in RANK_SYMBOLS or not suit_text or suit_text not in SUIT_SYMBOLS:
+        raise ValueError(f"Invalid card: '{text}'.")
+    return RANK_SYMBOLS.index(rank_text) * 4 + SUIT_SYMBOLS.index(suit_text)
+
+
+def card_text(code):
+    """Return the short notation of a card code, the inverse of parse_card."""
+    return RANK_SYMBOLS[code >> 2] + SUIT_SYMBOLS[code & 3]
+
 
 class Card(object):
-    def __init__(self, suit, val):
-        self.suit = suit
-        self.value = val
+    # Only 52 instances ever exist, Card(suit, val) returns the shared one,
+    # so cards can be compared by identity and dealing never allocates.
+    __slots__ = ('code', 'suit', 'value', 'rank', 'suit_index', 'mask')
+
+    def __new__(cls, suit, val):
+        return CARDS[card_code(suit, val)]
+
+    @classmethod
+    def from_code(cls, code):
+        """Return the shared Card for an integer code."""
+        return CARDS[code]
+
+    @classmethod
+    def _create(cls, suit, val):
+        card = object.__new__(cls)
+        card.code = card_code(suit, val)
+        card.suit = suit
+        card.value = val
+        card.rank = card.code >> 2
+        card.suit_index = card.code & 3
+        # Bit of the card inside a 64-bit card set
+        card.mask = 1 << card.code
+        return card
+
+    def __reduce__(self):
+        return (Card.from_code, (self.code,))
 
     # Implementing build in methods so that you can print a card object
     def __unicode__(self):
@@ -29,10 +100,43 @@ class Card(object):
         return "{} of {}".format(val, self.suit)
 
 
+def _build_cards():
+    cards = [None] * NUM_CARDS
+    for suit in SUITS:
+        for val in range(1, 14):
+            card = Card._create(suit, val)
+            cards[card.code] = card
+    return cards
+
+
+# The only Card instances, indexed by their code
+CARDS = _build_cards()
+
+# Codes of a freshly built deck, same order as building it suit by suit
+BUILD_ORDER = array('B', (card_code(suit, val) for suit in SUITS for val in range(1, 14)))
+
+
 class Deck(object):
+    """
+    Deck stored as a byte array of card codes plus a deal pointer.
+    Cards below `top` are still in the deck, dealing only moves the pointer.
+    """
+
     def __init__(self):
-        self.cards = []
-        self.build()
+        self.codes = array('B', BUILD_ORDER)
+        self.top = NUM_CARDS
+
+    def __len__(self):
+        return self.top
+
+    @property
+    def cards(self):
+        """List with the cards that are still in the deck."""
+        return [CARDS[code] for code in self.codes[:self.top]]
+
+    def remaining_codes(self):
+        """Return the codes of the cards that are still in the deck."""
+        return self.codes[:self.top]
 
     # Display all cards in the deck
     def show(self):
@@ -41,27 +145,33 @@ class Deck(object):
 
     # Generate 52 cards
     def build(self):
-        self.cards = []
-        for suit in ['Hearts', 'Clubs', 'Diamonds', 'Spades']:
-            for val in range(1,14):
-                self.cards.append(Card(suit, val))
-
-    # Shuffle the deck
-    def shuffle(self, num=1):
-        length = len(self.cards)
+        self.codes[:] = BUILD_ORDER
+        self.top = NUM_CARDS
+
+    # Put the dealt cards back on top, keeping the current order
+    def reset(self):
+        self.top = NUM_CARDS
+
+    # Shuffle the deck, a random.Random instance can be given to make it reproducible
+    def shuffle(self, num=1, rng=None):
+        codes = self.codes
+        uniform = (rng or random).random
         for _ in range(num):
             # This is the fisher yates shuffle algorithm
-            for i in range(length-1, 0, -1):
-                randi = random.randint(0, i)
+            for i in range(self.top-1, 0, -1):
+                randi = int(uniform() * (i + 1))
                 if i == randi:
                     continue
-                self.cards[i], self.cards[randi] = self.cards[randi], self.cards[i]
-            # You can also use the build in shuffle method
-            # random.shuffle(self.cards)
+                codes[i], codes[randi] = codes[randi], codes[i]
+            # You can also use the build in shuffle method when nothing has been dealt
+            # random.shuffle(codes)
 
-    # Return the top card
+    # Return the top card, None if the deck is empty
     def deal(self):
-        return self.cards.pop()
+        if not self.top:
+            return None
+        self.top -= 1
+        return CARDS[self.codes[self.top]]
 
 
 class Player(object):
@@ -97,19 +207,122 @@ class Player(object):
 # Show all possible combinations and their probability of occurrence.
 
 
-def generate_sample_space(deck, num_cards):
-    sample_space = list(combinations(deck.cards, num_cards))
-    total_outcomes = len(sample_space)
+def unrank_combination(rank, n, k):
+    """
+    Return the positions of the combination number `rank` (0 based) among all the
+    k-combinations of n items, in the same lexicographic order used by itertools.combinations.
+    """
+    positions = []
+    position = 0
+    for slot in range(k):
+        # Skip whole blocks of combinations that start with a smaller position
+        while True:
+            block = comb(n - position - 1, k - slot - 1)
+            if rank < block:
+                break
+            rank -= block
+            position += 1
+        positions.append(position)
+        position += 1
+    return positions
+
+
+def iter_sample_space(deck, num_cards, start=0, limit=None):
+    """
+    Lazily yield the outcomes of drawing num_cards cards, starting at outcome number start.
+    The first outcome is found by unranking, so jumping to any page costs the same.
+    """
+    cards = deck.cards
+    n = len(cards)
+    total = comb(n, num_cards)
+    end = total if limit is None else min(total, start + limit)
+    if start >= end:
+        return
+    positions = unrank_combination(start, n, num_cards)
+    for _ in range(end - start):
+        yield tuple(cards[position] for position in positions)
+        # Move to the next combination in lexicographic order
+        slot = num_cards - 1
+        while slot >= 0 and positions[slot] == n - num_cards + slot:
+            slot -= 1
+        if slot < 0:
+            return
+        positions[slot] += 1
+        for following in range(slot + 1, num_cards):
+            positions[following] = positions[following - 1] + 1
+
+
+def generate_sample_space(deck, num_cards, start=0, limit=None, output=None, chunk_size=1000):
+    """
+    Write the sample space of drawing num_cards cards without building it in memory.
+
+    Args:
+        deck (Deck): The deck the cards are drawn from.
+        num_cards (int): Number of cards drawn.
+        start (int): Number of the first outcome written (0 based).
+        limit (int): Maximum number of outcomes written, None writes until the end.
+        output (TextIO): Where the outcomes are written, defaults to stdout.
+        chunk_size (int): Number of outcomes buffered before each write.
+    """
+    output = output or sys.stdout
+    total_outcomes = comb(len(deck), num_cards)
     probability = 1 / total_outcomes if total_outcomes > 0 else 0
 
-    print(f"Total possible outcomes when drawing {num_cards} card(s): {total_outcomes}")
-    print(f"Probability of each outcome: {probability:.6f}")
+    output.write(f"Total possible outcomes when drawing {num_cards} card(s): {total_outcomes}\n")
+    output.write(f"Probability of each outcome: {probability:.6f}\n")
 
-    for outcome in sample_space:
-        print(", ".join(str(card) for card in outcome))
+    lines = []
+    for outcome in iter_sample_space(deck, num_cards, start, limit):
+        lines.append(", ".join(str(card) for card in outcome))
+        if len(lines) >= chunk_size:
+            output.write("\n".join(lines) + "\n")
+            lines = []
+    if lines:
+        output.write("\n".join(lines) + "\n")
+    output.flush()
 
 #get the input from the user and generate the sample space based on the input on the console
 
+def read_optional_int(message):
+    """Ask for a non negative number, an empty answer returns None."""
+    while True:
+        answer = input(message).strip()
+        if not answer:
+            return None
+        try:
+            value = int(answer)
+            if value >= 0:
+                return value
+        except ValueError:
+            pass
+        print("Please enter a valid number.")
+
+def ask_event_probability(deck, num_cards):
+    """
+    Ask for a suit or card value to count and print the exact probability of
+    drawing a number of those cards in range, without enumerating the outcomes.
+    """
+    from utils.event_probability import card_count
+
+    while True:
+        target = input("Suit or card value (1-13) to count (empty to finish): ").strip()
+        if not target:
+            return
+        if target.capitalize() in SUITS:
+            suit = target.capitalize()
+            selector, label = (lambda card: card.suit == suit), suit
+        elif target.isdigit() and 1 <= int(target) <= 13:
+            value = int(target)
+            selector, label = (lambda card: card.value == value), f"value {value}"
+        else:
+            print("Please enter a suit or a value between 1 and 13.")
+            continue
+        at_least = read_optional_int("At least how many (default 0): ") or 0
+        at_most = read_optional_int("At most how many (default no limit): ")
+        event = card_count(selector, at_least=at_least, at_most=at_most, label=label)
+        probability = event.probability(deck.cards, num_cards)
+        print(f"P({event} in {num_cards} cards) = {probability} ({float(probability):.6%})")
+
 def main():
     deck = Deck()
     deck.shuffle()
@@ -120,7 +333,10 @@ def main():
             if num_cards < 1:
                 print("Please enter a number greater than 0.")
                 continue
-            generate_sample_space(deck, num_cards)
+            start = read_optional_int("Start at outcome number (default 0): ") or 0
+            limit = read_optional_int("Number of outcomes to show (default all): ")
+            generate_sample_space(deck, num_cards, start, limit)
+            ask_event_probability(deck, num_cards)
             break
         except ValueError:
             print("Please enter a valid number.")
@@ -1,8 +1,13 @@
 from colorama import Fore, init
-from match import Match
+from match import Match, PLAYER, MAX_PLAYERS
 from cards import Player
 from utils.output_formatter import OutputFormatter
 from utils.probability_calculator import ProbabilityCalculator
+from utils.equity_calculator import EquityCalculator
+from utils.outs_calculator import OutsCalculator
+from utils.decision_engine import DecisionEngine
+from utils.hand_history import HandHistory
+from utils.instrumentation import Instrumentation
 
 # Initialize colorama
 init(autoreset=True)
@@ -15,43 +20,95 @@ def get_player_name():
     name = input("Cual es tu nombre (por defecto 'Jugador') => ").strip()
     return name if name else DEFAULT_PLAYER_NAME
 
+def get_num_opponents():
+    """Prompt the user for the number of computer opponents and return it."""
+    max_opponents = MAX_PLAYERS - 1
+    while True:
+        answer = input(f"Cuantos oponentes (1-{max_opponents}, por defecto 1) => ").strip()
+        if not answer:
+            return 1
+        if answer.isdigit() and 1 <= int(answer) <= max_opponents:
+            return int(answer)
+        print(Fore.RED + "Por favor ingresa una opcion valida")
+
 def setup_match():
     """Set up the match with players and return the match object."""
-    match = Match()
-    computer = Player("Computadora")
+    history = HandHistory(HandHistory.PATH) if HandHistory.PATH else None
+    match = Match(history=history)
     player = Player(get_player_name())
-    players = [computer, player]
+    num_opponents = get_num_opponents()
+    if num_opponents == 1:
+        computers = [Player("Computadora")]
+    else:
+        computers = [Player(f"Computadora {number}") for number in range(1, num_opponents + 1)]
+    # The player sits on position 1, every other seat belongs to the computer
+    players = computers[:PLAYER] + [player] + computers[PLAYER:]
     match.start(players)
     return match
 
+def show_equity(match):
+    """Print the player's equity against random hands on the current street."""
+    # Computer players that folded are out of the pot
+    num_opponents = len(match.players) - len(match.folded) - 1
+    equity = EquityCalculator.calculate_equity(match, PLAYER, num_opponents=num_opponents)
+    OutputFormatter.print_equity(match.players[PLAYER].name, equity, num_opponents)
+
+def show_outs(match):
+    """Print the cards that improve the player's hand on the flop and the turn."""
+    outs = OutsCalculator.calculate_outs(match, PLAYER)
+    OutputFormatter.print_outs(match.players[PLAYER].name, outs)
+
+def computer_turn(match):
+    """Let the computer players still in the match fold or continue, each within its time budget."""
+    for index, decision in DecisionEngine.computer_turn(match, PLAYER).items():
+        OutputFormatter.print_decision(match.players[index].name, decision)
+
 def play_round(match):
     """Play a round of the game, including drawing cards and calculating probabilities."""
     # Hole cards
     match.draw_hole_cards()
-    ProbabilityCalculator.menu(match, 1)  # Calculate player's probability
+    ProbabilityCalculator.menu(match, PLAYER)  # Calculate player's probability
+    show_equity(match)
+    computer_turn(match)
 
     # Flop
     match.draw_flop()
     if not match.await_option():
         print(Fore.RED + ABORT_MATCH_MESSAGE)
         return False
-    ProbabilityCalculator.menu(match, 1)
+    ProbabilityCalculator.menu(match, PLAYER)
+    show_equity(match)
+    show_outs(match)
+    computer_turn(match)
 
     # Turn
     match.draw_turn()
     if not match.await_option():
         print(Fore.RED + ABORT_MATCH_MESSAGE)
         return False
-    ProbabilityCalculator.menu(match, 1)
+    ProbabilityCalculator.menu(match, PLAYER)
+    show_equity(match)
+    show_outs(match)
+    computer_turn(match)
 
     # River
     match.draw_river()
     if match.await_option() is False:
         print(Fore.RED + ABORT_MATCH_MESSAGE)
         return
+    computer_turn(match)
 
     return True
 
+def show_instrumentation():
+    """Print the timings of the match, and export them, when instrumentation is enabled."""
+    if not Instrumentation.ENABLED:
+        return
+    Instrumentation.stop_capture()
+    OutputFormatter.print_instrumentation_summary(Instrumentation.report())
+    if Instrumentation.JSON_PATH:
+        Instrumentation.export_json(Instrumentation.JSON_PATH)
+
 def main():
     """Entry point of the game."""
     match = setup_match()
@@ -64,6 +121,9 @@ def main():
             OutputFormatter.print_winner("computer")
         else:
             OutputFormatter.print_winner("tie")
+    if match.history is not None:
+        match.history.close()
+    show_instrumentation()
 
 if __name__ == "__main__":
     main()
@@ -2,11 +2,14 @@ from colorama import Fore
 from cards import Deck
 from utils.output_formatter import OutputFormatter
 from utils.hand_analyzer import HandAnalyzer
+from utils.hand_evaluator import HandEvaluator
+from utils.instrumentation import instrumented
 
 # from exceptions import *
 
 PLAYER = 1
 COMPUTER = 0
+MAX_PLAYERS = 9  # Seats at the table, the computer plays every seat except PLAYER
 
 
 class Match(object):
@@ -19,15 +22,31 @@ class Match(object):
         flop (List[Card]): A list containing the three community cards on the table (flop).
         turn (Card): A single community card dealt after the flop.
         river (Card): A single community card dealt after the turn.
+        rank_distributions (Dict[Tuple[int, int, Tuple], HandDistribution]): Hand rank distributions already
+            calculated, keyed by player index, number of community cards and the options of the calculation.
+        probability_trees (Dict[int, ProbabilityTree]): Turn and river outcomes under the flop, keyed by player index.
+        equities (Dict[Tuple[int, int], Equity]): Equities already calculated against random hands,
+            keyed by player index and number of community cards.
+        history (HandHistory): Log the showdown is appended to, None if it is not recorded.
+        folded (Set[int]): Indexes of the players that folded, they cannot win the pot.
+
+    Args:
+        rng (random.Random): Source of randomness for the shuffle, None uses the `random` module.
+        history (HandHistory): Log to append the showdown to.
     """
 
-    def __init__(self):
+    def __init__(self, rng=None, history=None):
         self.deck = Deck()
         self.players = []
         self.flop = []
         self.turn = None
         self.river = None
-        self.deck.shuffle()
+        self.rank_distributions = {}
+        self.probability_trees = {}
+        self.equities = {}
+        self.history = history
+        self.folded = set()
+        self.deck.shuffle(rng=rng)
 
     def draw_n_cards(self, num=1):
         """Draws n number of cards from the deck"""
@@ -55,11 +74,12 @@ class Match(object):
             raise ValueError("Stage no valido, debe ser ser 'turn' o 'river'.")
         return True
 
+    @instrumented("Match.draw_hole_cards")
     def draw_hole_cards(self):
         """Draws two cards for each player"""
         # Ensure there are enough cards in the deck
         total_cards_needed = len(self.players) * 2
-        if len(self.deck.cards) < total_cards_needed:
+        if len(self.deck) < total_cards_needed:
             raise ValueError("No hay suficientes cartas en la baraja")
         for player in self.players:
             cards = self.draw_n_cards(2)
@@ -71,6 +91,7 @@ class Match(object):
                 player.hand.append(card)
 
     # Draws three cards and assigns them to the flop set
+    @instrumented("Match.draw_flop")
     def draw_flop(self):
         """Draws 3 cards for the flop"""
         cards = self.draw_n_cards(3)
@@ -79,10 +100,12 @@ class Match(object):
         self.flop.extend(cards)
         return True
 
+    @instrumented("Match.draw_turn")
     def draw_turn(self):
         """Draws a card for the turn"""
         return self.draw_single_card("turn")
 
+    @instrumented("Match.draw_river")
     def draw_river(self):
         """Draws a card for the river"""
         return self.draw_single_card("river")
@@ -102,11 +125,13 @@ class Match(object):
         community_cards = self.get_community_cards()
         # In the context of this game, the player will always be initialized on the position 1
         # Position 0 of the player's list belongs to the computer
+        # Every other position belongs to a computer opponent
         player = self.players[PLAYER]
         OutputFormatter.print_community_cards(community_cards)
-        computer = self.players[COMPUTER]
         OutputFormatter.print_player_hand(player)
-        OutputFormatter.print_player_hand(computer)
+        for index, computer in enumerate(self.players):
+            if index != PLAYER:
+                OutputFormatter.print_player_hand(computer)
         while True:
             command = str(input("Deseas continuar? (s|n) ")).strip().lower()
             if command not in ("s", "n"):
@@ -115,6 +140,12 @@ class Match(object):
             break
         return command == "s"
 
+    def fold(self, index):
+        """Takes a player out of the showdown, the player keeps the cards"""
+        if index == PLAYER:
+            raise ValueError("El jugador no puede retirarse, solo abandonar la partida.")
+        self.folded.add(index)
+
     def get_full_hand(self, index):
         """Returns a list with the community cards and the hole cards"""
         player_hand = self.players[index].hand[:]
@@ -127,37 +158,89 @@ class Match(object):
         best_hand, hand_rank = HandAnalyzer.best_hand(full_hand)
         return best_hand, hand_rank
 
-    def showdown(self):
-        """Chooses a winner or verifies if there is a tie."""
-        # Get player's best hand and rank
-        player_best_hand, player_rank = self.get_best_hand_and_rank(PLAYER)
-        # Get computer's best hand and rank
-        computer_best_hand, computer_rank = self.get_best_hand_and_rank(COMPUTER)
+    def get_hand_score(self, player_index):
+        """Returns the strength score of a player's best hand, a higher score beats a lower one."""
+        return HandEvaluator.score(self.get_full_hand(player_index))
 
-        # Print best hands
-        OutputFormatter.print_best_hand(self.players[PLAYER].name, player_rank)
-        OutputFormatter.print_best_hand(self.players[COMPUTER].name, computer_rank)
-
-        # Compare hand ranks
-        if player_rank.value > computer_rank.value:
-            return True  # Player wins
-        elif player_rank.value < computer_rank.value:
-            return False  # Computer wins
+    def get_hand_scores(self):
+        """
+        Evaluates every player's best hand once.
+        The community cards are folded first and each player only adds its hole cards.
+
+        Returns:
+            List[int]: The strength score of each player, in seat order.
+        """
+        board = HandEvaluator.board_state([card.code for card in self.get_community_cards()])
+        return [
+            HandEvaluator.score_with_board(board, [card.code for card in player.hand])
+            for player in self.players
+        ]
+
+    @staticmethod
+    def get_winners(scores):
+        """Returns the indexes of every player that shares the highest score, more than one means a split pot."""
+        best = max(scores)
+        return [index for index, score in enumerate(scores) if score == best]
+
+    @staticmethod
+    def split_pot(pot, winners, num_players):
+        """
+        Splits a pot among the winners, odd chips go to the winners in seat order.
+
+        Args:
+            pot (int): Chips in the pot.
+            winners (List[int]): Indexes of the players that share the pot.
+            num_players (int): Number of players in the match.
+
+        Returns:
+            List[int]: The chips won by each player, in seat order.
+        """
+        share, odd_chips = divmod(pot, len(winners))
+        chips = [0] * num_players
+        for position, index in enumerate(winners):
+            chips[index] = share + (1 if position < odd_chips else 0)
+        return chips
+
+    @instrumented("Match.evaluate_showdown")
+    def evaluate_showdown(self):
+        """
+        Compares the hands of every player without printing anything.
+
+        Returns:
+            Tuple[bool, List[int], List[HandRanks]]: True if the player wins alone, None if the player
+            splits the pot, False if a computer opponent wins, followed by the indexes of the winners
+            and the rank of each player's best hand.
+        """
+        # The score orders hands by rank and then by the cards that make it
+        # (pair before kickers, etc.), the same way the equity engine does
+        scores = self.get_hand_scores()
+        # Players that folded are still evaluated, but they cannot win
+        winners = self.get_winners([
+            -1 if index in self.folded else score for index, score in enumerate(scores)
+        ])
+        if PLAYER not in winners:
+            result = False  # Computer wins
+        elif len(winners) == 1:
+            result = True  # Player wins
         else:
-            # If ranks are the same, compare card values
-            player_sorted = sorted((card.value for card in player_best_hand), reverse=True)
-            computer_sorted = sorted((card.value for card in computer_best_hand), reverse=True)
+            result = None  # The player shares the best score, it's a tie
+        ranks = [HandEvaluator.rank_of(score) for score in scores]
+        if self.history is not None:
+            self.history.append(self, PLAYER, result, winners, ranks)
+        return result, winners, ranks
 
-            # Compare each card in order
-            for player_card, computer_card in zip(player_sorted, computer_sorted):
-                if player_card > computer_card:
-                    return True  # Player wins
-                elif player_card < computer_card:
-                    return False  # Computer wins
+    @instrumented("Match.showdown")
+    def showdown(self):
+        """Chooses a winner or verifies if there is a tie."""
+        result, _, ranks = self.evaluate_showdown()
 
-            # If all cards are equal, it's a tie
-            return None
+        # Print best hands
+        for player, rank in zip(self.players, ranks):
+            OutputFormatter.print_best_hand(player.name, rank)
+        return result
 
     def start(self, players):
         """Fills the player's list"""
+        if not PLAYER < len(self.players) + len(players) <= MAX_PLAYERS:
+            raise ValueError(f"Numero de jugadores no valido, debe estar entre {PLAYER + 1} y {MAX_PLAYERS}.")
         self.players.extend(players)
@@ -0,0 +1,32 @@
+import pytest
+
+from cards import CARDS, SUITS, Card, card_code, card_text, parse_card
+
+
+def test_card_codes_cover_the_deck():
+    codes = {card_code(suit, val) for suit in SUITS for val in range(1, 14)}
+    assert codes == set(range(52))
+    assert card_text(card_code("Spades", 1)) == "As"
+    assert card_text(card_code("Hearts", 2)) == "2h"
+    assert card_text(card_code("Diamonds", 13)) == "Kd"
+
+
+@pytest.mark.parametrize("suit, val", [
+    ("Hearts", 0), ("Hearts", 14), ("Clubs", -1), ("Spades", 2.5), ("Stars", 5), ("hearts", 5), (None, 1),
+])
+def test_invalid_cards_are_rejected(suit, val):
+    with pytest.raises(ValueError):
+        card_code(suit, val)
+    with pytest.raises(ValueError):
+        Card(suit, val)
+
+
+def test_cards_are_shared():
+    assert Card("Clubs", 10) is CARDS[parse_card("Tc")]
+    assert Card("Clubs", 10).value == 10
+
+
+@pytest.mark.parametrize("text", ["", "A", "1h", "Ax", "AAh", "11s"])
+def test_parse_card_rejects_invalid_text(text):
+    with pytest.raises(ValueError):
+        parse_card(text)
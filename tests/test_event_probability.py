@@ -0,0 +1,73 @@
+from fractions import Fraction
+
+import pytest
+
+from cards import Deck
+from utils.event_probability import (
+    AllOf, AnyOf, CountEvent, Event, EventProbability, Not, PredicateEvent, card_count, rank_count, suit_count,
+)
+
+# Aces to fours, small enough to enumerate every draw
+CARDS = [card for card in Deck().cards if card.value <= 4]
+DRAWN = 5
+
+hearts = suit_count("Hearts", at_least=2)
+aces = rank_count(1, exactly=1)
+low = card_count(lambda card: card.value in (2, 3), at_most=2, label="low")
+spades = suit_count("Spades", at_least=1, at_most=3)
+
+EVENTS = [
+    hearts,
+    aces,
+    low,
+    hearts & aces,
+    AllOf(hearts, aces, low),
+    hearts | aces,
+    AnyOf(hearts, aces, low, spades),  # Solved term by term with inclusion-exclusion
+    AnyOf(hearts & spades, aces, low),
+    AnyOf(hearts, aces, low, spades, rank_count(4, exactly=2)),  # Over the inclusion-exclusion limit
+    AnyOf(~hearts, aces),  # Not an intersection, solved by the cell sum
+    ~hearts,
+    ~(hearts | aces),
+    ~(hearts & aces) & low,
+]
+
+
+@pytest.mark.parametrize("event", EVENTS, ids=repr)
+def test_closed_form_matches_enumeration(event):
+    assert EventProbability.is_decomposable(event)
+    closed_form, enumerated = EventProbability.cross_validate(event, CARDS, DRAWN)
+    assert isinstance(closed_form, Fraction)
+    assert closed_form == enumerated
+    assert EventProbability.cell_sum(event, CARDS, DRAWN) == enumerated
+    assert event.probability(CARDS, DRAWN) == enumerated
+
+
+def test_count_event_is_a_hypergeometric_tail():
+    # Exactly one of the 4 aces among 5 cards drawn from 16
+    assert aces.probability(CARDS, DRAWN) == Fraction(4 * 495, 4368)
+
+
+def test_predicate_events_are_enumerated():
+    event = PredicateEvent(lambda outcome: len({card.value for card in outcome}) == 4, "every value")
+    assert not EventProbability.is_decomposable(event | aces)
+    assert (event | aces).probability(CARDS, DRAWN) == EventProbability.enumerate(event | aces, CARDS, DRAWN)
+    with pytest.raises(ValueError):
+        event.holds({})
+
+
+def test_draws_larger_than_the_cards_are_impossible():
+    assert hearts.probability(CARDS[:3], 4) == 0
+
+
+def test_event_is_abstract():
+    with pytest.raises(TypeError):
+        Event()
+
+    class Partial(Event):
+        def matches(self, outcome):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial()
+    assert isinstance(CountEvent(bool), Event) and isinstance(Not(aces), Event)
@@ -0,0 +1,106 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from cards import Card, Deck
+from utils.hand_analyzer import HandAnalyzer
+from utils.hand_evaluator import HandEvaluator
+from utils.hand_rankings import HandRanks
+
+RANKS = "A23456789TJQK"  # Index + 1 is the card value, the ace is 1
+SUITS = {"h": "Hearts", "c": "Clubs", "d": "Diamonds", "s": "Spades"}
+
+# One hand of every category, with the edge cases of straights and flushes
+FIVE_CARD_HANDS = [
+    ("Ah Kh Qh Jh Th", HandRanks.ROYAL_FLUSH),
+    ("9s 8s 7s 6s 5s", HandRanks.STRAIGHT_FLUSH),
+    ("5d 4d 3d 2d Ad", HandRanks.STRAIGHT_FLUSH),
+    ("Qc Qd Qh Qs 2c", HandRanks.FOUR_OF_A_KIND),
+    ("3c 3d 3h Ks Kc", HandRanks.FULL_HOUSE),
+    ("Ac Jc 8c 4c 2c", HandRanks.FLUSH),
+    ("Ac Kd Qh Js Tc", HandRanks.STRAIGHT),
+    ("5c 4d 3h 2s Ac", HandRanks.STRAIGHT),
+    ("9c 8d 7h 6s 5c", HandRanks.STRAIGHT),
+    ("7c 7d 7h Ks 2c", HandRanks.THREE_OF_A_KIND),
+    ("Jc Jd 4h 4s Ac", HandRanks.TWO_PAIR),
+    ("Tc Td 8h 4s 2c", HandRanks.PAIR),
+    ("Ac Kd Qh Js 9c", HandRanks.HIGH_CARD),
+    ("Kc Ad 2h 3s 4c", HandRanks.HIGH_CARD),
+]
+
+
+def cards_of(text):
+    return [Card(SUITS[card[1]], RANKS.index(card[0]) + 1) for card in text.split()]
+
+
+def old_rank(cards):
+    """Best category among every 5-card subset, with the original evaluator."""
+    return max((HandAnalyzer.hand_rank(list(five)) for five in combinations(cards, 5)), key=lambda rank: rank.value)
+
+
+def random_hands(size, count, seed):
+    rng = random.Random(seed)
+    deck = Deck().cards
+    return [rng.sample(deck, size) for _ in range(count)]
+
+
+@pytest.mark.parametrize("text, rank", FIVE_CARD_HANDS)
+def test_every_five_card_category(text, rank):
+    cards = cards_of(text)
+    assert HandEvaluator.evaluate(cards) == rank
+    assert HandAnalyzer.hand_rank(cards) == rank
+
+
+def test_categories_are_all_covered():
+    assert {rank for _, rank in FIVE_CARD_HANDS} == set(HandRanks)
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_matches_old_hand_rank(size):
+    for cards in random_hands(size, 2000, seed=size):
+        assert HandEvaluator.evaluate(cards) == old_rank(cards), cards
+
+
+def test_codes_and_cards_agree():
+    for cards in random_hands(7, 500, seed=10):
+        codes = [HandEvaluator.encode(card) for card in cards]
+        assert len(set(codes)) == 7 and all(0 <= code < 52 for code in codes)
+        assert HandEvaluator.score_codes(codes) == HandEvaluator.score(cards)
+
+
+def test_best_five_makes_the_same_hand():
+    for cards in random_hands(7, 500, seed=11):
+        score = HandEvaluator.score(cards)
+        five = HandEvaluator.best_five(cards, score)
+        assert len(set(five)) == 5 and set(five) <= set(cards)
+        assert HandEvaluator.score(five) == score
+
+
+def test_board_state_matches_score_codes():
+    for cards in random_hands(7, 500, seed=12):
+        codes = [HandEvaluator.encode(card) for card in cards]
+        board = HandEvaluator.board_state(codes[:5])
+        assert HandEvaluator.score_with_board(board, codes[5:]) == HandEvaluator.score_codes(codes)
+
+
+@pytest.mark.parametrize("size", [5, 6, 7])
+def test_matches_treys(size):
+    treys = pytest.importorskip("treys")
+    evaluator = treys.Evaluator()
+
+    def treys_score(cards):
+        cards = [treys.Card.new(RANKS[card.value - 1] + card.suit[0].lower()) for card in cards]
+        return evaluator.evaluate(cards[:2], cards[2:])
+
+    hands = random_hands(size, 3000, seed=100 + size)
+    for cards in hands:
+        # treys has no royal flush class, and counts its classes down from straight flush
+        expected = 10 - evaluator.get_rank_class(treys_score(cards))
+        rank = HandEvaluator.evaluate(cards)
+        assert min(rank.value, HandRanks.STRAIGHT_FLUSH.value) == expected, cards
+    # treys scores go down as hands get stronger, so every pair must be ordered the other way around
+    for first, second in zip(hands, hands[1:]):
+        ours = HandEvaluator.score(first) - HandEvaluator.score(second)
+        theirs = treys_score(second) - treys_score(first)
+        assert (ours > 0) - (ours < 0) == (theirs > 0) - (theirs < 0), (first, second)
@@ -0,0 +1,108 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from cards import Player
+from match import PLAYER, Match
+from utils.equity_calculator import Equity
+from utils.hand_history import LOSS, MAX_SEATS, NO_CARD, RECORD, TIE, WIN, HandHistory
+from utils.hand_rankings import HandRanks
+from utils.preflop_table import class_index, class_name
+
+np = pytest.importorskip("numpy")
+
+
+def play(history, seed, players):
+    """Deal a match to the river, with the flop equity filled in, and evaluate its showdown."""
+    match = Match(rng=random.Random(seed), history=history)
+    match.start([Player(f"Jugador {index}") for index in range(players)])
+    match.draw_hole_cards()
+    match.draw_flop()
+    match.equities[(PLAYER, 3)] = Equity(wins=3, ties=1, losses=4, exact=True)
+    match.draw_turn()
+    match.draw_river()
+    if players > 2:
+        match.fold(players - 1)
+    result, winners, ranks = match.evaluate_showdown()
+    return match, result, winners, ranks
+
+
+def test_showdowns_round_trip(tmp_path):
+    path = str(tmp_path / "history.bin")
+    played = []
+    with HandHistory(path) as history:
+        for seed in range(40):
+            played.append(play(history, seed, 2 + seed % (MAX_SEATS - 1)))
+    # Appending to an existing file keeps the records already written
+    with HandHistory(path) as history:
+        played.append(play(history, 40, MAX_SEATS))
+
+    records = HandHistory.load(path)
+    assert isinstance(records, np.memmap)
+    assert len(records) == len(played)
+    for record, (match, result, winners, ranks) in zip(records, played):
+        seats = len(match.players)
+        assert record["num_players"] == seats
+        assert record["player"] == PLAYER
+        assert record["streets"] == 5
+        assert record["result"] == {True: WIN, None: TIE, False: LOSS}[result]
+        assert record["winners"] == sum(1 << seat for seat in winners)
+        assert list(record["board"]) == [card.code for card in match.get_community_cards()]
+        for seat in range(MAX_SEATS):
+            hole = [card.code for card in match.players[seat].hand] if seat < seats else [NO_CARD, NO_CARD]
+            assert list(record["hole"][seat]) == hole
+        assert list(record["ranks"][:seats]) == [rank.value for rank in ranks]
+        assert not record["ranks"][seats:].any()
+        # Only the flop equity was calculated
+        assert math.isnan(record["equity"][0]) and math.isnan(record["equity"][2]) and math.isnan(record["equity"][3])
+        assert record["equity"][1] == pytest.approx((3 + 0.5) / 8 * 100)
+
+    assert list(HandHistory.reevaluate(records)) == [ranks[PLAYER].value for _, _, _, ranks in played]
+    assert list(HandHistory.reevaluate(records, seat=0)) == [ranks[0].value for _, _, _, ranks in played]
+
+
+def test_aggregations(tmp_path):
+    path = str(tmp_path / "history.bin")
+    with HandHistory(path) as history:
+        played = [play(history, seed, 2 + seed % 4) for seed in range(60)]
+    records = HandHistory.load(path)
+
+    hole = [[card.code for card in match.players[PLAYER].hand] for match, _, _, _ in played]
+    assert list(HandHistory.starting_hand_classes(records)) == [class_index(*codes) for codes in hole]
+
+    expected = {}
+    for codes, (_, result, _, _) in zip(hole, played):
+        expected.setdefault(class_name(class_index(*codes)), []).append(result)
+    rates = HandHistory.win_rates_by_starting_hand(records)
+    assert set(rates) == set(expected)
+    for name, results in expected.items():
+        played_hands, win, tie = rates[name]
+        assert played_hands == len(results)
+        assert win == pytest.approx(results.count(True) / len(results) * 100)
+        assert tie == pytest.approx(results.count(None) / len(results) * 100)
+
+    counts = Counter(rank for _, _, _, ranks in played for rank in ranks)
+    total = sum(counts.values())
+    frequencies = HandHistory.showdown_frequencies(records)
+    assert set(frequencies) == set(HandRanks)
+    for rank in HandRanks:
+        assert frequencies[rank] == pytest.approx(counts[rank] / total * 100)
+
+
+def test_load_rejects_other_files_and_drops_cut_records(tmp_path):
+    other = tmp_path / "other.bin"
+    other.write_bytes(b"not a hand history")
+    with pytest.raises(ValueError):
+        HandHistory.load(str(other))
+
+    path = str(tmp_path / "history.bin")
+    with HandHistory(path) as history:
+        history.flush()
+        assert len(HandHistory.load(path)) == 0
+        play(history, 0, 2)
+        play(history, 1, 2)
+    with open(path, "ab") as history_file:
+        history_file.write(b"\0" * (RECORD.size // 2))
+    assert len(HandHistory.load(path)) == 2
@@ -0,0 +1,122 @@
+from itertools import combinations
+
+import pytest
+
+from cards import parse_card
+from utils.equity_calculator import EquityCalculator
+from utils.hand_evaluator import HandEvaluator
+from utils.hand_range import HandRange
+
+
+def codes_of(text):
+    return [parse_card(card) for card in text.split()]
+
+
+def classes(hand_range):
+    """Set of the hand classes in a range, like {'AKs', 'TT'}."""
+    names = set()
+    for first, second in hand_range.combos:
+        high, low = "23456789TJQKA"[first >> 2], "23456789TJQKA"[second >> 2]
+        kind = "" if high == low else "s" if first & 3 == second & 3 else "o"
+        names.add(high + low + kind)
+    return names
+
+
+@pytest.mark.parametrize("text, size", [
+    ("AKs", 4), ("AKo", 12), ("AK", 16), ("TT", 6), ("AhKh", 1), ("kdqc", 1),
+])
+def test_class_sizes(text, size):
+    assert len(HandRange.parse(text)) == size
+
+
+def test_plus_ranges():
+    assert classes(HandRange.parse("TT+")) == {"TT", "JJ", "QQ", "KK", "AA"}
+    assert classes(HandRange.parse("A9s+")) == {"A9s", "ATs", "AJs", "AQs", "AKs"}
+    assert classes(HandRange.parse("KTo+")) == {"KTo", "KJo", "KQo"}
+
+
+def test_dash_ranges():
+    assert classes(HandRange.parse("22-55")) == {"22", "33", "44", "55"}
+    assert classes(HandRange.parse("55-22")) == {"22", "33", "44", "55"}
+    assert classes(HandRange.parse("K9s-KJs")) == {"K9s", "KTs", "KJs"}
+    assert len(HandRange.parse("K9-KJ")) == 3 * 16
+
+
+def test_suited_and_offsuit_combos():
+    suited = HandRange.parse("76s").combos
+    offsuit = HandRange.parse("76o").combos
+    assert all(first & 3 == second & 3 for first, second in suited)
+    assert all(first & 3 != second & 3 for first, second in offsuit)
+    assert set(suited) | set(offsuit) == set(HandRange.parse("76").combos)
+    # Combinations are keyed highest card first
+    assert all(first > second for first, second in HandRange.parse("22+, A2+").combos)
+
+
+def test_weights_and_zero_weight_removal():
+    hand_range = HandRange.parse("QQ+:0.5, KK:1, AA:0; AhKh:0.25")
+    assert classes(hand_range) == {"QQ", "KK", "AKs"}
+    assert len(hand_range) == 13
+    # Later entries override the weight of earlier ones
+    assert hand_range.combos[tuple(sorted(codes_of("Ks Kd"), reverse=True))] == 1.0
+    assert hand_range.combos[tuple(sorted(codes_of("Qs Qd"), reverse=True))] == 0.5
+    assert hand_range.combos[tuple(sorted(codes_of("Ah Kh"), reverse=True))] == 0.25
+
+
+@pytest.mark.parametrize("text", [
+    "AKx", "A", "AKQ", "AAs", "XX", "AhAh", "AK:1.5", "AK:-1", "AK:half", "22-AKs", "A2s-K2s", "AKs-AQo", "AK-AQ-AJ",
+])
+def test_malformed_entries_are_rejected(text):
+    with pytest.raises(ValueError):
+        HandRange.parse(text)
+
+
+def test_live_combos_drop_dead_cards():
+    hand_range = HandRange.parse("AA, KK")
+    live = hand_range.live_combos(codes_of("As Kd Kc"))
+    assert len(live) == 3 + 1
+
+
+def brute_force(hero, villain, board, dead):
+    """Weighted wins, ties and losses over every pair of combinations and every runout."""
+    removed = set(board).union(dead)
+    totals = [0.0, 0.0, 0.0]
+    for hero_combo, hero_weight in hero.combos.items():
+        for villain_combo, villain_weight in villain.combos.items():
+            cards = set(hero_combo) | set(villain_combo)
+            if len(cards) < 4 or cards & removed:
+                continue
+            unseen = [code for code in range(52) if code not in removed and code not in cards]
+            for runout in combinations(unseen, 5 - len(board)):
+                full = list(board) + list(runout)
+                ours = HandEvaluator.score_codes(full + list(hero_combo))
+                theirs = HandEvaluator.score_codes(full + list(villain_combo))
+                outcome = 0 if ours > theirs else 1 if ours == theirs else 2
+                totals[outcome] += hero_weight * villain_weight
+    return totals
+
+
+@pytest.mark.parametrize("hero, villain, board, dead", [
+    ("AK, QQ+", "JJ-99, AQs:0.5", "Ah 7d 2c Ts", ""),
+    ("76s, 55", "A5+, KK:0.3", "8s 9s 2d Kh 5c", ""),
+    ("AA, AKs", "KK, AQs", "Kh 7d 2c 3s", "Ad Ac"),  # Blockers remove most of the aces
+    ("QQ, JJ", "QQ, JJ", "2c 3d 4h 8s", ""),  # The same combinations on both sides can only chop
+])
+def test_range_equity_matches_brute_force(hero, villain, board, dead):
+    hero, villain = HandRange.parse(hero), HandRange.parse(villain)
+    board, dead = codes_of(board), codes_of(dead)
+    equity = EquityCalculator.range_equity(hero, villain, board, dead)
+    wins, ties, losses = brute_force(hero, villain, board, dead)
+    assert equity.exact
+    assert (equity.wins, equity.ties, equity.losses) == (pytest.approx(wins), pytest.approx(ties), pytest.approx(losses))
+
+
+def test_dead_cards_remove_combos():
+    board = codes_of("2c 3d 8h Js")
+    # With two kings dead the only king pair left is KhKs
+    blocked = EquityCalculator.range_equity(HandRange.parse("AA"), HandRange.parse("KK"), board, codes_of("Kd Kc"))
+    single = EquityCalculator.range_equity(HandRange.parse("AA"), HandRange.parse("KhKs"), board, codes_of("Kd Kc"))
+    assert (blocked.wins, blocked.ties, blocked.losses) == (single.wins, single.ties, single.losses)
+    assert blocked.win == pytest.approx(single.win)
+
+    with pytest.raises(ValueError):
+        EquityCalculator.range_equity(HandRange.parse("AA"), HandRange.parse("KK"), board, codes_of("Kd Kc Ks"))
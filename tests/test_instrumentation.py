@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from cards import Player
+from match import Match
+from utils.equity_calculator import EquityCalculator
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import Instrumentation
+from utils.probability_calculator import ProbabilityCalculator
+
+
+@pytest.fixture(autouse=True)
+def recording():
+    ProbabilityCalculator.CACHE.clear()
+    EquityCalculator.CACHE.clear()
+    Instrumentation.reset()
+    Instrumentation.enable()
+    yield
+    Instrumentation.disable()
+    Instrumentation.reset()
+
+
+def samples_of(name):
+    return Instrumentation.report()["functions"].get(name, {}).get("samples", 0)
+
+
+def new_match(seed):
+    match = Match(random.Random(seed))
+    match.start([Player("Computadora"), Player("Jugador")])
+    match.draw_hole_cards()
+    return match
+
+
+def test_only_evaluated_runouts_are_counted():
+    match = new_match(1)
+    # Preflop is read from the table, nothing is evaluated
+    ProbabilityCalculator.calculate_probability(match, 0, HandRanks.PAIR)
+    match.draw_flop()
+    for target in HandRanks:
+        ProbabilityCalculator.calculate_probability(match, 0, target)
+    match.draw_turn()
+    ProbabilityCalculator.calculate_probability(match, 0, HandRanks.PAIR)
+
+    # The flop builds the tree once, the other queries read it or the match memo
+    assert samples_of("ProbabilityTree.build") == 47 * 46 // 2
+    assert samples_of("ProbabilityCalculator.count_ranks") == 0
+    assert samples_of("ProbabilityCalculator.calculate_probability") == 0
+    assert Instrumentation.report()["functions"]["ProbabilityCalculator.calculate_probability"]["calls"] == 12
+
+
+def test_cache_hits_add_no_samples():
+    for _ in range(3):
+        match = new_match(2)
+        match.draw_flop()
+        match.draw_turn()
+        match.probability_trees.clear()
+        ProbabilityCalculator.calculate_distribution(match, 0)
+        EquityCalculator.calculate_equity(match, 0)
+    assert samples_of("ProbabilityCalculator.count_ranks") == 46
+    assert samples_of("EquityCalculator.hand_equity") == 46 * 45 // 2 * 44
+    assert samples_of("EquityCalculator.calculate_equity") == 0
+
+
+def test_sampled_runouts_are_counted_once():
+    match = new_match(3)
+    match.draw_flop()
+    ProbabilityCalculator.calculate_distribution(match, 0, work_budget=0, samples=300)
+    ProbabilityCalculator.calculate_distribution(match, 0, work_budget=0, samples=200, sampler="sobol", seed=1)
+    assert samples_of("ProbabilityCalculator.count_ranks") == 300
+    assert samples_of("RunoutSampler.count_ranks") == 200
@@ -0,0 +1,131 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from cards import Player, parse_card
+from match import PLAYER, Match
+from utils.hand_evaluator import CATEGORY_SHIFT, HandEvaluator
+from utils.hand_rankings import HandRanks
+from utils.outs_calculator import LOSE, TIE, WIN, OutsCalculator, mask_of
+
+# Hole cards of every player, then the board, chosen to split the flush suits in every way
+FLUSH_SPOTS = [
+    ("Ah Kh|Qs Qd", "2h 7h Jc"),  # The player holds four hearts, every heart is its own group
+    ("Ah Kc|Qs Js", "2s 7h Jd"),  # The opponent holds three spades, spade pairs are split
+    ("Ac Kd|Qc Jd", "2s 7s 9s"),  # Monotone flop nobody else plays
+    ("Ah 3h|Qh Jh|9c 9d", "2h 7h Kc"),  # Two players with four hearts
+    ("Ah 3h|Ks Kd", "2h 7h 9h Kc"),  # Made flush on the turn, the opponent can fill up
+    ("5h 6h|As Ad", "7h 8h 2c"),  # Straight flush draw against aces
+    ("Ac Kc|Ad Kd", "Qh Jh 2s"),  # Both play the same straight draw, ties everywhere
+]
+
+
+def codes_of(text):
+    return [parse_card(card) for card in text.split()]
+
+
+def result_of(scores):
+    best = max(scores[1:])
+    return WIN if scores[0] > best else TIE if scores[0] == best else LOSE
+
+
+def brute_force(hands, player_index, board, unseen):
+    """Evaluate every next card and every turn and river pair directly."""
+    order = [hands[player_index]] + hands[:player_index] + hands[player_index + 1:]
+
+    def scores(extra):
+        return [HandEvaluator.score_codes(board + hand + list(extra)) for hand in order]
+
+    current = scores(())
+    current_rank, current_result = current[0] >> CATEGORY_SHIFT, result_of(current)
+    expected = {"improving": {}, "better": [], "worse": [], "runouts": {}, "pairs": {}, "better_pairs": set()}
+    for code in unseen:
+        after = scores((code,))
+        if after[0] >> CATEGORY_SHIFT > current_rank:
+            expected["improving"].setdefault(HandRanks(after[0] >> CATEGORY_SHIFT), []).append(code)
+        if result_of(after) > current_result:
+            expected["better"].append(code)
+        elif result_of(after) < current_result:
+            expected["worse"].append(code)
+    if len(board) == 3:
+        for pair in combinations(unseen, 2):
+            after = scores(pair)
+            rank = HandRanks(after[0] >> CATEGORY_SHIFT)
+            expected["runouts"][rank] = expected["runouts"].get(rank, 0) + 1
+            expected["pairs"].setdefault(rank, set()).add(frozenset(pair))
+            if result_of(after) > current_result:
+                expected["better_pairs"].add(frozenset(pair))
+    return HandRanks(current_rank), current_result, expected
+
+
+def check(hands, player_index, board):
+    seen = set(board).union(*hands)
+    unseen = [code for code in range(52) if code not in seen]
+    outs = OutsCalculator.outs_for_codes(hands, player_index, board, mask_of(unseen))
+    current_rank, current_result, expected = brute_force(hands, player_index, board, unseen)
+
+    assert (outs.current_rank, outs.current_result, outs.unseen) == (current_rank, current_result, len(unseen))
+    assert {rank: sorted(codes) for rank, codes in outs.improving.items()} == expected["improving"]
+    assert sorted(outs.better) == expected["better"]
+    assert sorted(outs.worse) == expected["worse"]
+    if len(board) == 4:
+        assert outs.total_runouts == 0 and not outs.runouts
+        return
+    assert outs.runouts == expected["runouts"]
+    assert outs.total_runouts == len(unseen) * (len(unseen) - 1) // 2
+    assert outs.better_runouts == len(expected["better_pairs"])
+    # Every pair comes out once, with the rank and the result it was counted under
+    pairs = list(outs.pairs())
+    assert len(pairs) == outs.total_runouts
+    assert {frozenset(pair) for pair in pairs} == {frozenset(pair) for pair in combinations(unseen, 2)}
+    for rank, expected_pairs in expected["pairs"].items():
+        assert {frozenset(pair) for pair in outs.pairs(rank)} == expected_pairs
+    assert {frozenset(pair) for pair in outs.pairs(better=True)} == expected["better_pairs"]
+
+
+@pytest.mark.parametrize("holes, board", FLUSH_SPOTS)
+def test_flush_spots_match_brute_force(holes, board):
+    hands = [codes_of(hole) for hole in holes.split("|")]
+    for player_index in range(len(hands)):
+        check(hands, player_index, codes_of(board))
+
+
+@pytest.mark.parametrize("players", [2, 3, 6])
+@pytest.mark.parametrize("street", [3, 4])
+def test_random_spots_match_brute_force(players, street):
+    rng = random.Random(players * 10 + street)
+    for _ in range(15):
+        cards = rng.sample(range(52), 2 * players + street)
+        hands = [cards[2 * index:2 * index + 2] for index in range(players)]
+        check(hands, rng.randrange(players), cards[2 * players:])
+
+
+def test_outs_need_the_flop_or_the_turn():
+    match = Match(random.Random(1))
+    match.start([Player("Computadora"), Player("Jugador")])
+    match.draw_hole_cards()
+    with pytest.raises(ValueError):
+        OutsCalculator.calculate_outs(match, 0)
+
+
+def test_folded_players_are_left_out():
+    match = Match(random.Random(5))
+    match.start([Player(f"Jugador {index}") for index in range(4)])
+    match.draw_hole_cards()
+    match.draw_flop()
+    match.fold(2)
+    match.fold(3)
+    hands = [[card.code for card in player.hand] for player in match.players]
+    board = [card.code for card in match.get_community_cards()]
+    unseen_mask = mask_of(match.deck.remaining_codes())
+
+    outs = OutsCalculator.calculate_outs(match, PLAYER)
+    expected = OutsCalculator.outs_for_codes([hands[0], hands[1]], PLAYER, board, unseen_mask)
+    assert (outs.current_result, outs.better, outs.worse) == (expected.current_result, expected.better, expected.worse)
+    assert (outs.runouts, outs.better_runouts) == (expected.runouts, expected.better_runouts)
+
+    match.fold(0 if PLAYER else 1)
+    alone = OutsCalculator.calculate_outs(match, PLAYER)
+    assert alone.current_result == WIN and not alone.better and not alone.worse
+    assert alone.better_runouts == 0
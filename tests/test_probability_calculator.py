@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from cards import Player
+from match import Match
+from utils.hand_rankings import HandRanks
+from utils.preflop_table import PreflopTable
+from utils.probability_calculator import ProbabilityCalculator
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    ProbabilityCalculator.CACHE.clear()
+    yield
+    ProbabilityCalculator.CACHE.clear()
+
+
+def new_match(seed, players=2):
+    match = Match(random.Random(seed))
+    match.start([Player(f"Jugador {index}") for index in range(players)])
+    match.draw_hole_cards()
+    return match
+
+
+def test_hidden_hole_cards_can_still_be_dealt():
+    match = new_match(1, players=4)
+    match.draw_flop()
+    known, remaining, needed = ProbabilityCalculator.get_query_codes(match, 0)
+    opponent_codes = {card.code for player in match.players[1:] for card in player.hand}
+    assert needed == 2
+    assert opponent_codes <= set(remaining)
+    assert sorted(remaining + list(known)) == list(range(52))
+
+
+def test_in_match_preflop_query_reads_the_table():
+    match = new_match(2, players=3)
+    record = PreflopTable.lookup(*(card.code for card in match.players[0].hand))
+    if record is None:
+        pytest.skip("the preflop table is not built")
+    distribution = ProbabilityCalculator.calculate_distribution(match, 0)
+    assert (distribution.counts, distribution.total) == (list(record[0]), record[2])
+
+
+def test_in_match_flop_query_enumerates_every_unseen_card():
+    match = new_match(3)
+    match.draw_flop()
+    distribution = ProbabilityCalculator.calculate_distribution(match, 1)
+    assert distribution.exact and distribution.total == 47 * 46 // 2
+
+
+def sampled_flop(seed=4):
+    match = new_match(seed)
+    match.draw_flop()
+    return match
+
+
+def test_memo_is_kept_per_seed():
+    match = sampled_flop()
+    options = dict(work_budget=0, samples=300)
+    first = ProbabilityCalculator.calculate_distribution(match, 0, seed=1, **options)
+    again = ProbabilityCalculator.calculate_distribution(match, 0, seed=1, **options)
+    other = ProbabilityCalculator.calculate_distribution(match, 0, seed=2, **options)
+    replayed = ProbabilityCalculator.calculate_distribution(sampled_flop(), 0, seed=2, **options)
+    assert again is first
+    assert other.counts != first.counts
+    assert replayed.counts == other.counts
+
+
+def test_memo_is_kept_per_sample_size_and_sampler():
+    match = sampled_flop()
+    small = ProbabilityCalculator.calculate_distribution(match, 0, work_budget=0, samples=10)
+    large = ProbabilityCalculator.calculate_distribution(match, 0, work_budget=0, samples=500)
+    stratified = ProbabilityCalculator.calculate_distribution(
+        match, 0, work_budget=0, samples=500, sampler="stratified", seed=3
+    )
+    exact = ProbabilityCalculator.calculate_distribution(match, 0)
+    assert (small.total, large.total, stratified.total) == (10, 500, 500)
+    assert stratified is not large
+    assert exact.exact and exact.total == 47 * 46 // 2
+
+
+def test_seeded_refine_continues_with_new_batches(monkeypatch):
+    monkeypatch.setattr(ProbabilityCalculator, "ADAPTIVE_BATCH_SIZE", 200)
+    monkeypatch.setattr(ProbabilityCalculator, "EXACT_WORK_BUDGET", 0)
+    match = sampled_flop()
+    monkeypatch.setattr(ProbabilityCalculator, "MAX_ADAPTIVE_SAMPLES", 400)
+    ProbabilityCalculator.refine_distribution(match, 0, HandRanks.PAIR, seed=5)
+    monkeypatch.setattr(ProbabilityCalculator, "MAX_ADAPTIVE_SAMPLES", 600)
+    twice = ProbabilityCalculator.refine_distribution(match, 0, HandRanks.PAIR, seed=5)
+    once = ProbabilityCalculator.refine_distribution(sampled_flop(), 0, HandRanks.PAIR, seed=5)
+    assert twice.total == once.total == 600
+    assert twice.counts == once.counts
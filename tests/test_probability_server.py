@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from utils.probability_calculator import ProbabilityCalculator
+from utils.probability_server import ProbabilityServer, _answer_batch, answer_query
+
+
+def test_rank_query():
+    answer = answer_query({"query": "rank", "cards": ["Ah", "Kh", "Qh", "Jh", "Th", "2c", "3d"]})
+    assert answer["rank"] == "ROYAL_FLUSH"
+    assert answer["name"] == "Escalera Real"
+
+
+def test_probability_query_on_the_river_is_exact():
+    answer = answer_query({
+        "query": "probability", "hole": ["Ah", "Kh"], "board": ["2h", "7h", "Jh", "3c", "9d"], "target": "FLUSH",
+    })
+    assert answer["exact"] and answer["samples"] == 1
+    assert answer["probability"] == answer["probabilities"]["FLUSH"] == 100
+
+
+def test_equity_query_against_a_known_hand():
+    answer = answer_query({
+        "query": "equity", "hole": ["Ah", "Ad"], "board": ["2c", "7d", "9s", "Kh"], "villain": ["Kc", "Kd"],
+    })
+    assert answer["exact"] and answer["samples"] == 44
+    # Only the two aces left on the river beat the set of kings
+    assert answer["win"] == pytest.approx(100 * 2 / 44)
+
+
+def test_dead_cards_change_the_preflop_probability():
+    ProbabilityCalculator.CACHE.clear()
+    query = {"query": "probability", "hole": ["Ah", "Kh"], "samples": 2000}
+    live = answer_query(query)
+    dead = answer_query(dict(query, dead=["2h", "3h", "4h", "5h", "6h", "7h", "8h", "9h"]))
+    # With eight hearts out of play the flush is much less likely than the table says
+    assert dead["samples"] == 2000
+    assert dead["probabilities"]["FLUSH"] < live["probabilities"]["FLUSH"] / 2
+
+
+@pytest.mark.parametrize("query, message", [
+    ({"query": "rank", "cards": ["Ah", "Kh", "Qh"]}, "Numero de cartas no valido"),
+    ({"query": "rank", "cards": ["Ah", "Ah", "Qh", "Jh", "Th"]}, "cartas repetidas"),
+    ({"query": "equity", "hole": ["Ah", "Kh"], "opponents": 9}, "oponentes"),
+    ({"query": "probability", "hole": ["Ah", "Kh"], "samples": 0}, "muestras"),
+    ({"query": "probability", "hole": ["Ah", 7]}, "debe ser una lista de cartas"),
+    ({"query": "odds", "hole": ["Ah", "Kh"]}, "Consulta no valida"),
+])
+def test_invalid_queries_are_rejected(query, message):
+    with pytest.raises(ValueError, match=message):
+        answer_query(query)
+
+
+def test_a_bad_query_does_not_fail_its_batch():
+    answers = _answer_batch([
+        {"query": "rank", "cards": [1, 2, 3, 4, 5]},
+        {"query": "rank", "cards": None},
+        {"query": "rank", "cards": ["Ah", "Kh", "Qh", "Jh", "9h"]},
+    ])
+    assert "error" in answers[0] and "error" in answers[1]
+    assert answers[2]["rank"] == "FLUSH"
+
+
+def test_server_answers_over_a_unix_socket(tmp_path):
+    path = str(tmp_path / "probability.sock")
+    queries = [
+        {"id": 1, "query": "rank", "cards": ["Ah", "Kh", "Qh", "Jh", "Th"]},
+        {"id": 2, "query": "rank", "cards": ["Ah", "Kh", "Qh", "Jh", "Th"]},
+        {"id": 3, "query": "rank", "cards": ["Ah", 7]},
+    ]
+
+    async def round_trip():
+        server = ProbabilityServer(workers=1)
+        await server.start(unix_path=path)
+        try:
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b"not json\n" + b"".join(json.dumps(query).encode() + b"\n" for query in queries))
+            await writer.drain()
+            answers = [json.loads(await asyncio.wait_for(reader.readline(), 30)) for _ in range(4)]
+            writer.close()
+            return answers, server.stats()
+        finally:
+            await server.close()
+
+    answers, stats = asyncio.run(round_trip())
+    by_id = {answer.get("id"): answer for answer in answers}
+    assert "error" in by_id[None]
+    assert by_id[1]["rank"] == by_id[2]["rank"] == "ROYAL_FLUSH"
+    assert "error" in by_id[3]
+    assert stats["queries"] == 3
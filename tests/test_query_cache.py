@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from cards import Player, parse_card
+from match import Match
+from utils.equity_calculator import EquityCalculator
+from utils.hand_rankings import HandRanks
+from utils.probability_calculator import ProbabilityCalculator
+from utils.query_cache import QueryCache, canonical_key
+
+
+def codes_of(text):
+    return tuple(parse_card(card) for card in text.split())
+
+
+def relabel(codes, suits):
+    """Move every card to another suit, `suits[old]` is the new suit."""
+    return tuple(code & ~3 | suits[code & 3] for code in codes)
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    ProbabilityCalculator.CACHE.clear()
+    EquityCalculator.CACHE.clear()
+    yield
+    ProbabilityCalculator.CACHE.clear()
+    EquityCalculator.CACHE.clear()
+
+
+def test_canonical_key_ignores_order_and_suit_names():
+    hole, board = codes_of("Ah Kh"), codes_of("2h 7c Jd")
+    key = canonical_key(hole, board)
+    assert canonical_key(hole[::-1], board[::-1]) == key
+    for suits in ((1, 0, 2, 3), (3, 2, 1, 0), (2, 3, 0, 1)):
+        assert canonical_key(relabel(hole, suits), relabel(board, suits)) == key
+
+
+def test_canonical_key_tells_groups_and_suits_apart():
+    key = canonical_key(codes_of("Ah Kh"), codes_of("2h 7c Jd"))
+    assert canonical_key(codes_of("Ah Kc"), codes_of("2h 7c Jd")) != key
+    assert canonical_key(codes_of("Ah 2h"), codes_of("Kh 7c Jd")) != key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_disk_tier_survives_the_memory_tier(tmp_path):
+    path = str(tmp_path / "cache")
+    cache = QueryCache(maxsize=1, path=path)
+    cache.put(("ranks", 1), [1, 2, 3])
+    cache.close()
+    cache = QueryCache(maxsize=1, path=path)
+    assert cache.get(("ranks", 1)) == [1, 2, 3]
+    cache.close()
+
+
+def test_small_sample_does_not_answer_a_larger_query():
+    known = codes_of("Ah Kh 2h 7c Jd")
+    remaining = [code for code in range(52) if code not in known]
+    query = dict(work_budget=0, seed=None)
+    small = ProbabilityCalculator.distribution_for_codes(known, remaining, 2, samples=10, **query)
+    default = ProbabilityCalculator.distribution_for_codes(known, remaining, 2, **query)
+    exact = ProbabilityCalculator.distribution_for_codes(known, remaining, 2)
+    assert (small.total, small.exact) == (10, False)
+    assert (default.total, default.exact) == (ProbabilityCalculator.SAMPLE_SIZE, False)
+    assert exact.exact and exact.total == 1081
+
+
+def test_suit_relabeled_query_is_a_cache_hit():
+    known = codes_of("Ah Kh 2h 7c Jd")
+    suits = (3, 2, 1, 0)
+    first = ProbabilityCalculator.distribution_for_codes(
+        known, [code for code in range(52) if code not in known], 2
+    )
+    known = relabel(known, suits)
+    second = ProbabilityCalculator.distribution_for_codes(
+        known, [code for code in range(52) if code not in known], 2
+    )
+    assert second is first
+    assert ProbabilityCalculator.CACHE.hits == 1
+
+
+def test_sampled_equity_does_not_answer_an_exact_query():
+    hole, board = codes_of("Ah Kh"), codes_of("2h 7c Jd Qs 3h")
+    sampled = EquityCalculator.equity_for_codes(hole, board, work_budget=0, samples=10)
+    exact = EquityCalculator.equity_for_codes(hole, board)
+    assert (sampled.samples, sampled.exact) == (10, False)
+    assert (exact.samples, exact.exact) == (990, True)
+
+
+def test_refine_does_not_change_the_cached_distribution(monkeypatch):
+    monkeypatch.setattr(ProbabilityCalculator, "ADAPTIVE_BATCH_SIZE", 500)
+    monkeypatch.setattr(ProbabilityCalculator, "MAX_ADAPTIVE_SAMPLES", 1000)
+    # Nothing is enumerated, so the flop is sampled and cached
+    monkeypatch.setattr(ProbabilityCalculator, "EXACT_WORK_BUDGET", 0)
+    match = Match(random.Random(3))
+    match.start([Player("Computadora"), Player("Jugador")])
+    match.draw_hole_cards()
+    match.draw_flop()
+    known, remaining, needed = ProbabilityCalculator.get_query_codes(match, 0)
+
+    refined = ProbabilityCalculator.refine_distribution(match, 0, HandRanks.FLUSH)
+    cached = ProbabilityCalculator.distribution_for_codes(known, remaining, needed, samples=500)
+    assert refined.total == 1000
+    assert cached.total == 500
+    assert refined in match.rank_distributions.values()
@@ -0,0 +1,110 @@
+import random
+from collections import Counter
+from itertools import combinations
+from math import comb, sqrt
+
+import pytest
+
+from cards import parse_card
+from utils.hand_evaluator import CARD_PRIMES, CATEGORY_SHIFT, RANK_SCORES, HandEvaluator
+from utils.probability_calculator import ProbabilityCalculator
+from utils.runout_samplers import SAMPLERS, RunoutSampler, sobol_points
+
+# Flop with a flush draw, so every strategy has flushes to find
+KNOWN = tuple(parse_card(card) for card in "Ah Kh 2h 7h Jd".split())
+REMAINING = [code for code in range(52) if code not in KNOWN]
+
+
+def codes_of(text):
+    return tuple(parse_card(card) for card in text.split())
+
+
+def exact_counts(known_codes, needed_cards, flushes=True):
+    counts = [0] * 11
+    for runout in combinations([code for code in range(52) if code not in known_codes], needed_cards):
+        if flushes:
+            score = HandEvaluator.score_codes(known_codes + runout)
+        else:
+            key = 1
+            for code in known_codes + runout:
+                key *= CARD_PRIMES[code]
+            score = RANK_SCORES[key]
+        counts[score >> CATEGORY_SHIFT] += 1
+    return counts
+
+
+def test_sobol_points_fill_every_interval():
+    points = list(sobol_points(16, 3, random.Random(1)))
+    for dimension in range(3):
+        cells = sorted(int(point[dimension] * 16) for point in points)
+        assert cells == list(range(16))
+
+
+def test_stratified_runouts_split_the_first_card_evenly():
+    samples = 3 * len(REMAINING) + 5
+    runouts = list(RunoutSampler.stratified_runouts(REMAINING, 2, samples, random.Random(2)))
+    leading = Counter(runout[0] for runout in runouts)
+    assert len(runouts) == samples
+    assert set(leading) == set(REMAINING)
+    assert sorted(Counter(leading.values()).items()) == [(3, len(REMAINING) - 5), (4, 5)]
+    assert all(len(set(runout)) == 2 and set(runout) <= set(REMAINING) for runout in runouts)
+
+
+@pytest.mark.parametrize("known", [KNOWN, codes_of("Ah Kh 2h 7h Jd 9c")])
+def test_rank_counts_match_enumeration_without_flushes(known):
+    needed = 7 - len(known)
+    remaining = [code for code in range(52) if code not in known]
+    counts, total = RunoutSampler.rank_counts(known, remaining, needed)
+    assert total == comb(len(remaining), needed)
+    assert counts == exact_counts(known, needed, flushes=False)
+
+
+def test_rank_counts_total_with_five_cards_to_come():
+    known = codes_of("As Ad")
+    remaining = [code for code in range(52) if code not in known]
+    counts, total = RunoutSampler.rank_counts(known, remaining, 5)
+    assert sum(counts) == total == comb(50, 5)
+
+
+def test_suit_symmetric_is_exact_when_no_flush_is_possible():
+    known = codes_of("Ah Kc 2d 7s Jh")
+    remaining = [code for code in range(52) if code not in known]
+    counts, samples = RunoutSampler.count_ranks(known, remaining, 2, 500, "suit_symmetric", seed=3)
+    expected = exact_counts(known, 2)
+    assert samples == 500
+    assert counts == pytest.approx([count * 500 / sum(expected) for count in expected])
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_sampler_estimates_the_exact_distribution(sampler):
+    samples = 20000
+    expected = exact_counts(KNOWN, 2)
+    total = sum(expected)
+    counts, drawn = RunoutSampler.count_ranks(KNOWN, REMAINING, 2, samples, sampler, seed=4)
+    assert drawn == samples
+    assert sum(counts) == pytest.approx(samples, rel=0.01)
+    for count, exact in zip(counts, expected):
+        probability = exact / total
+        # Four standard errors of plain sampling, every strategy should do at least as well
+        assert abs(count / samples - probability) <= 4 * sqrt(probability * (1 - probability) / samples) + 1e-9
+
+
+@pytest.mark.parametrize("sampler", SAMPLERS)
+def test_seed_makes_the_counts_reproducible(sampler):
+    first = RunoutSampler.count_ranks(KNOWN, REMAINING, 2, 300, sampler, seed=(5, 1))
+    second = RunoutSampler.count_ranks(KNOWN, REMAINING, 2, 300, sampler, seed=(5, 1))
+    assert first == second
+
+
+def test_unknown_sampler_is_rejected():
+    with pytest.raises(ValueError):
+        RunoutSampler.count_ranks(KNOWN, REMAINING, 2, 10, "antithetic")
+    with pytest.raises(ValueError):
+        ProbabilityCalculator.calculate_distribution(None, 0, sampler="antithetic")
+
+
+def test_distribution_for_codes_uses_the_sampler():
+    distribution = ProbabilityCalculator.distribution_for_codes(
+        KNOWN, REMAINING, 2, work_budget=0, samples=400, sampler="stratified", seed=6
+    )
+    assert (distribution.total, distribution.exact) == (400, False)
@@ -0,0 +1,43 @@
+import io
+from itertools import combinations, islice
+
+import pytest
+
+from cards import Deck, generate_sample_space, iter_sample_space, unrank_combination
+
+
+@pytest.mark.parametrize("n, k", [(5, 0), (5, 1), (6, 3), (8, 5), (7, 7)])
+def test_unrank_follows_itertools_order(n, k):
+    for rank, expected in enumerate(combinations(range(n), k)):
+        assert tuple(unrank_combination(rank, n, k)) == expected
+
+
+def test_unrank_reaches_the_last_combination_of_a_full_deck():
+    assert unrank_combination(0, 52, 5) == [0, 1, 2, 3, 4]
+    assert unrank_combination(2598959, 52, 5) == [47, 48, 49, 50, 51]
+
+
+@pytest.mark.parametrize("start, limit", [(0, 10), (1000, 25), (22100 - 3, 10), (22100, 5), (50, None)])
+def test_page_matches_slicing_every_outcome(start, limit):
+    deck = Deck()
+    outcomes = combinations(deck.cards, 3)
+    expected = list(islice(outcomes, start, None if limit is None else start + limit))
+    assert list(iter_sample_space(deck, 3, start, limit)) == expected
+
+
+def test_dealt_cards_are_left_out():
+    deck = Deck()
+    dealt = {deck.deal(), deck.deal()}
+    outcomes = list(iter_sample_space(deck, 2))
+    assert len(outcomes) == 50 * 49 // 2
+    assert not dealt.intersection(card for outcome in outcomes for card in outcome)
+
+
+def test_generate_writes_the_page_in_chunks():
+    output = io.StringIO()
+    generate_sample_space(Deck(), 2, start=3, limit=7, output=output, chunk_size=3)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "Total possible outcomes when drawing 2 card(s): 1326"
+    assert len(lines) == 2 + 7
+    first = next(iter_sample_space(Deck(), 2, 3, 1))
+    assert lines[2] == ", ".join(str(card) for card in first)
@@ -0,0 +1,74 @@
+import pytest
+
+from cards import CARDS, Player, parse_card
+from match import COMPUTER, PLAYER, Match
+from utils.hand_rankings import HandRanks
+
+
+def cards_of(text):
+    return [CARDS[parse_card(card)] for card in text.split()]
+
+
+def showdown(board, *hands, folded=()):
+    """Evaluate the showdown of a match with the given board and hole cards, seat 0 first."""
+    match = Match()
+    match.start([Player(f"Jugador {index}") for index in range(len(hands))])
+    for player, hand in zip(match.players, hands):
+        player.hand = cards_of(hand)
+    board = cards_of(board)
+    match.flop, match.turn, match.river = board[:3], board[3], board[4]
+    for index in folded:
+        match.fold(index)
+    return match.evaluate_showdown()
+
+
+def test_pair_with_the_better_kicker_wins():
+    result, winners, ranks = showdown("Qs 8d 5c 3h 2s", "Qh Jd", "Qd Kc")
+    assert (result, winners) == (True, [PLAYER])
+    assert ranks == [HandRanks.PAIR, HandRanks.PAIR]
+
+
+def test_higher_pair_beats_a_lower_pair_with_a_better_kicker():
+    result, winners, ranks = showdown("9s 8d 5c 3h 2s", "Ts Td", "9h Ac")
+    assert (result, winners) == (False, [COMPUTER])
+    assert ranks == [HandRanks.PAIR, HandRanks.PAIR]
+
+
+def test_two_pair_is_decided_by_the_kicker():
+    result, winners, ranks = showdown("Ks Kd 7c 7h 2s", "Qh 3d", "Ac 4c")
+    assert (result, winners) == (True, [PLAYER])
+    assert ranks == [HandRanks.TWO_PAIR, HandRanks.TWO_PAIR]
+
+
+def test_two_pair_kicker_on_the_board_splits():
+    result, winners, _ = showdown("Ks Kd 7c 7h As", "Qh 3d", "Jc 4c")
+    assert (result, winners) == (None, [COMPUTER, PLAYER])
+
+
+def test_board_plays_splits_the_pot():
+    result, winners, ranks = showdown("Ts Js Qd Kh Ac", "2c 3d", "4h 5s", "6d 7c")
+    assert result is None
+    assert winners == [0, 1, 2]
+    assert ranks == [HandRanks.STRAIGHT] * 3
+    assert Match.split_pot(100, winners, 3) == [34, 33, 33]
+
+
+def test_folded_player_cannot_win():
+    # Seat 2 has the nuts but folded, so the player's pair of aces takes the pot
+    result, winners, ranks = showdown("As 9d 5c 3h 2s", "Kd Qh", "Ah Jc", "4d 6d", folded=[2])
+    assert (result, winners) == (True, [PLAYER])
+    # The folded hand is still evaluated
+    assert ranks[2] == HandRanks.STRAIGHT
+
+
+def test_split_pot_gives_odd_chips_in_seat_order():
+    assert Match.split_pot(10, [1, 3], 4) == [0, 5, 0, 5]
+    assert Match.split_pot(11, [0, 2, 3], 4) == [4, 0, 4, 3]
+    assert Match.get_winners([5, 9, 9, 2]) == [1, 2]
+
+
+def test_player_cannot_fold():
+    match = Match()
+    match.start([Player("Computadora"), Player("Jugador")])
+    with pytest.raises(ValueError):
+        match.fold(PLAYER)
@@ -0,0 +1,149 @@
+import numpy as np
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import instrumented
+
+NUM_RANKS = 13
+ACE = 12
+RANK_BITS = 1 << np.arange(NUM_RANKS)
+
+
+def _straight_table():
+    """Highest rank of the best straight for every 13-bit rank mask, -1 if there is none."""
+    masks = np.arange(1 << NUM_RANKS)
+    table = np.full(1 << NUM_RANKS, -1, dtype=np.int8)
+    # The wheel goes first so any higher straight overwrites it
+    wheel = (1 << ACE) | 0b1111
+    table[masks & wheel == wheel] = 3
+    for high in range(4, ACE + 1):
+        run = 0b11111 << (high - 4)
+        table[masks & run == run] = high
+    return table
+
+
+STRAIGHT_HIGH = _straight_table()
+
+
+class BatchSimulator(object):
+    """
+    Vectorized Monte Carlo engine that draws and evaluates whole batches of runouts.
+
+    Each batch is a matrix of card codes (one hand per row). Hands are
+    classified from per-row rank and suit histograms, so the only Python
+    work is a handful of NumPy calls per batch.
+    """
+
+    BATCH_SIZE = 50000  # Rows evaluated per NumPy call
+
+    @staticmethod
+    def draw_runouts(remaining_codes, needed_cards, size, rng):
+        """
+        Draw `size` random runouts without repeated cards inside a row.
+
+        Args:
+            remaining_codes (np.ndarray): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of cards per runout.
+            size (int): Number of runouts to draw.
+            rng (np.random.Generator): Source of randomness.
+
+        Returns:
+            np.ndarray: A (size, needed_cards) matrix of card codes.
+        """
+        # Partial Fisher-Yates shuffle applied to every row at once,
+        # it only needs one random integer per row and dealt card
+        decks = np.broadcast_to(remaining_codes, (size, len(remaining_codes))).copy()
+        rows = np.arange(size)
+        for i in range(needed_cards):
+            picks = rng.integers(i, len(remaining_codes), size)
+            picked = decks[rows, picks]
+            decks[rows, picks] = decks[:, i]
+            decks[:, i] = picked
+        return decks[:, :needed_cards]
+
+    @staticmethod
+    def classify(hands):
+        """
+        Return the HandRanks value of every row of a matrix of 5 to 7 card codes.
+
+        Args:
+            hands (np.ndarray): A (rows, cards) matrix of card codes.
+
+        Returns:
+            np.ndarray: The HandRanks value of the best 5-card hand of each row.
+        """
+        rows, width = hands.shape
+        ranks = (hands >> 2).astype(np.intp)
+        suits = (hands & 3).astype(np.intp)
+        row_ids = np.repeat(np.arange(rows), width)
+
+        rank_counts = np.bincount(
+            row_ids * NUM_RANKS + ranks.ravel(), minlength=rows * NUM_RANKS
+        ).reshape(rows, NUM_RANKS)
+        suit_counts = np.bincount(row_ids * 4 + suits.ravel(), minlength=rows * 4).reshape(rows, 4)
+        # Cards are distinct, so adding the rank bits of a suit is the same as or-ing them
+        suit_masks = np.bincount(
+            row_ids * 4 + suits.ravel(), weights=RANK_BITS[ranks].ravel(), minlength=rows * 4
+        ).reshape(rows, 4).astype(np.intp)
+
+        rank_mask = (rank_counts > 0) @ RANK_BITS
+        flush_suit = suit_counts.argmax(axis=1)
+        has_flush = suit_counts[np.arange(rows), flush_suit] >= 5
+        flush_high = np.where(has_flush, STRAIGHT_HIGH[suit_masks[np.arange(rows), flush_suit]], -1)
+        has_straight = STRAIGHT_HIGH[rank_mask] >= 0
+        trips = (rank_counts == 3).sum(axis=1)
+        pairs = (rank_counts == 2).sum(axis=1)
+
+        # With 7 cards or less a flush rules out quads and full houses
+        conditions = [
+            flush_high == ACE,
+            flush_high >= 0,
+            rank_counts.max(axis=1) == 4,
+            (trips >= 2) | ((trips == 1) & (pairs >= 1)),
+            has_flush,
+            has_straight,
+            trips == 1,
+            pairs >= 2,
+            pairs == 1,
+        ]
+        choices = [
+            HandRanks.ROYAL_FLUSH.value,
+            HandRanks.STRAIGHT_FLUSH.value,
+            HandRanks.FOUR_OF_A_KIND.value,
+            HandRanks.FULL_HOUSE.value,
+            HandRanks.FLUSH.value,
+            HandRanks.STRAIGHT.value,
+            HandRanks.THREE_OF_A_KIND.value,
+            HandRanks.TWO_PAIR.value,
+            HandRanks.PAIR.value,
+        ]
+        return np.select(conditions, choices, default=HandRanks.HIGH_CARD.value)
+
+    @staticmethod
+    @instrumented("BatchSimulator.count_ranks", samples=lambda result: result[1])
+    def count_ranks(known_codes, remaining_codes, needed_cards, samples, rng=None):
+        """
+        Sample runouts in batches and count how many end in each hand rank.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt.
+            samples (int): Number of runouts to draw.
+            rng (np.random.Generator): Source of randomness, a fresh one is created if missing.
+
+        Returns:
+            Tuple[List[int], int]: Count per HandRanks value (indexed by the enum value) and number of runouts.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        known = np.asarray(known_codes, dtype=np.uint8)
+        remaining = np.asarray(remaining_codes, dtype=np.uint8)
+        counts = np.zeros(len(HandRanks) + 1, dtype=np.int64)
+
+        done = 0
+        while done < samples:
+            size = min(BatchSimulator.BATCH_SIZE, samples - done)
+            runouts = BatchSimulator.draw_runouts(remaining, needed_cards, size, rng)
+            hands = np.concatenate([np.broadcast_to(known, (size, len(known))), runouts], axis=1)
+            counts += np.bincount(BatchSimulator.classify(hands), minlength=len(counts))
+            done += size
+        return counts.tolist(), done
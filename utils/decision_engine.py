@@ -0,0 +1,203 @@
+import time
+from math import comb
+from utils.equity_calculator import Equity, EquityCalculator
+from utils.instrumentation import instrumented
+from utils.preflop_table import PreflopTable
+from utils.probability_estimate import wilson_interval
+
+FOLD = "fold"
+CONTINUE = "continue"
+
+# Where the equity of a decision comes from
+SAMPLED, EXACT, TABLE = "sampled", "exact", "table"
+
+
+class Decision(object):
+    """
+    What a computer player does on a street, and how sure it was.
+
+    Attributes:
+        action (str): FOLD or CONTINUE.
+        equity (Equity): The player's equity against the other players still in the match,
+            with the number of runouts it was estimated from.
+        threshold (float): Equity (as a percentage) the player needed to continue.
+        elapsed (float): Seconds spent deciding.
+        source (str): SAMPLED, EXACT (enumerated, or no opponent left) or TABLE (the preflop table).
+    """
+
+    def __init__(self, action, equity, threshold, elapsed, source=SAMPLED):
+        self.action = action
+        self.equity = equity
+        self.threshold = threshold
+        self.elapsed = elapsed
+        self.source = source
+
+    @property
+    def continues(self):
+        return self.action == CONTINUE
+
+    @property
+    def samples(self):
+        """Number of runouts evaluated for this decision, 0 when the equity was read from the preflop table."""
+        return 0 if self.source == TABLE else self.equity.samples
+
+    def __repr__(self):
+        return "Decision(action={}, equity={:.2f}%, samples={}, elapsed={:.1f}ms)".format(
+            self.action, self.equity.equity, self.samples, self.elapsed * 1000
+        )
+
+
+class DecisionEngine(object):
+    """
+    Utility class that decides whether a computer player folds or continues.
+
+    The decision is an anytime computation: the equity against random hands is
+    sampled in small batches until the time budget runs out, and whatever was
+    sampled by then decides. It also stops as soon as the confidence interval of
+    the equity is entirely above or below the threshold, so clear decisions cost
+    a few hundred runouts. Heads-up preflop equities are read from the precomputed
+    table and the heads-up river is enumerated exactly, both well inside the budget.
+
+    Samples depend on the time available, so decisions are not reproducible with a seed.
+    """
+
+    TIME_BUDGET = 0.05  # Seconds a decision may take
+    BATCH_SIZE = 200  # Runouts sampled between two checks of the clock
+    FIRST_BATCH_SIZE = 25  # Runouts of the first batch, which measures how long a runout takes
+    MIN_SAMPLES = 200  # Runouts sampled before the interval can end a decision early
+    CONFIDENCE = 0.95  # Confidence level of the interval that ends a decision early
+    EXACT_WORK_BUDGET = 2000  # Heads-up runouts (with the opponent's cards) enumerated instead of sampled
+    # Continue while the equity is at least this fraction of an even split of the pot
+    MIN_EQUITY_SHARE = 0.8
+
+    @staticmethod
+    def decide_for_codes(hole_codes, board_codes, num_opponents, dead_codes=(), time_budget=None):
+        """
+        Decide whether to fold or continue from card codes, without a match.
+
+        Args:
+            hole_codes (Tuple[int]): Codes of the player's hole cards.
+            board_codes (Tuple[int]): Codes of the community cards already dealt.
+            num_opponents (int): Number of players still in the match besides this one.
+            dead_codes (Tuple[int]): Codes of cards known to be out of play.
+            time_budget (float): Seconds the decision may take, defaults to `TIME_BUDGET`.
+
+        Returns:
+            Decision: The action, with the equity estimate and the number of runouts behind it.
+        """
+        started = time.perf_counter()
+        if time_budget is None:
+            time_budget = DecisionEngine.TIME_BUDGET
+        deadline = started + time_budget
+        hole_codes = tuple(hole_codes)
+        board_codes = tuple(board_codes)
+        threshold = 100 / (num_opponents + 1) * DecisionEngine.MIN_EQUITY_SHARE
+        seen = set(hole_codes + board_codes).union(dead_codes)
+        unseen_codes = [code for code in range(52) if code not in seen]
+        needed_cards = 5 - len(board_codes)
+
+        equity = None
+        source = SAMPLED
+        if num_opponents < 1:
+            # Everyone else folded, the pot is already won
+            equity, source = Equity(1, 0, 0, True), EXACT
+        elif num_opponents == 1 and not board_codes and not dead_codes and EquityCalculator.USE_PREFLOP_TABLE:
+            record = PreflopTable.lookup(*hole_codes)
+            if record is not None:
+                wins, ties, losses = record[1]
+                equity, source = Equity(wins, ties, losses, False), TABLE
+        elif num_opponents == 1:
+            space = comb(len(unseen_codes), 2) * comb(len(unseen_codes) - 2, needed_cards)
+            if space <= DecisionEngine.EXACT_WORK_BUDGET:
+                equity = EquityCalculator.hand_equity(hole_codes, board_codes, unseen_codes, work_budget=space)
+                source = EXACT
+
+        if equity is None:
+            equity = DecisionEngine.sample_equity(hole_codes, board_codes, unseen_codes, num_opponents,
+                                                  threshold, deadline)
+        action = CONTINUE if equity.equity >= threshold else FOLD
+        return Decision(action, equity, threshold, time.perf_counter() - started, source)
+
+    @staticmethod
+    def sample_equity(hole_codes, board_codes, unseen_codes, num_opponents, threshold, deadline):
+        """
+        Sample the equity in batches until the deadline, or until the threshold is clearly
+        above or below its confidence interval. At least one runout is always sampled.
+
+        Returns:
+            Equity: The accumulated wins, ties, losses and pot shares of every batch.
+        """
+        wins = ties = losses = 0
+        pot_share = 0.0
+        batch_size = DecisionEngine.FIRST_BATCH_SIZE
+        while True:
+            batch_started = time.perf_counter()
+            if num_opponents == 1:
+                batch = EquityCalculator.hand_equity(hole_codes, board_codes, unseen_codes, None, 0, batch_size)
+            else:
+                batch = EquityCalculator.multiway_equity(
+                    [hole_codes], board_codes, unseen_codes, num_opponents, 0, batch_size
+                )[0]
+            wins += batch.wins
+            ties += batch.ties
+            losses += batch.losses
+            pot_share += batch.pot_share
+            samples = wins + ties + losses
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            if samples >= DecisionEngine.MIN_SAMPLES:
+                # The pot share of a runout is between 0 and 1, so the binomial interval is conservative
+                lower, upper = wilson_interval(pot_share, samples, DecisionEngine.CONFIDENCE)
+                if not lower * 100 <= threshold <= upper * 100:
+                    break
+            # The next batch takes at most half of the time that is left, so a slower
+            # batch than the last one still ends close to the deadline
+            per_sample = (now - batch_started) / batch_size
+            batch_size = max(1, min(DecisionEngine.BATCH_SIZE, int((deadline - now) / per_sample / 2)))
+        return Equity(wins, ties, losses, False, pot_share)
+
+    @staticmethod
+    @instrumented("DecisionEngine.decide", samples=lambda decision: decision.samples)
+    def decide(match, player_index, time_budget=None):
+        """
+        Decide whether a player folds or continues on the current street of a match.
+        The other players' hole cards are not known to the player.
+
+        Args:
+            match (Match): The current Match instance.
+            player_index (int): Index of the player who decides.
+            time_budget (float): Seconds the decision may take, defaults to `TIME_BUDGET`.
+
+        Returns:
+            Decision: The action, with the equity estimate and the number of runouts behind it.
+        """
+        hole_codes = [card.code for card in match.players[player_index].hand]
+        board_codes = [card.code for card in match.get_community_cards()]
+        num_opponents = len(match.players) - len(match.folded) - 1
+        return DecisionEngine.decide_for_codes(hole_codes, board_codes, num_opponents, time_budget=time_budget)
+
+    @staticmethod
+    def computer_turn(match, human_index, time_budget=None):
+        """
+        Let every computer player still in the match decide on the current street,
+        the ones that fold are taken out of the showdown.
+
+        Args:
+            match (Match): The current Match instance.
+            human_index (int): Index of the human player, who does not decide here.
+            time_budget (float): Seconds each decision may take, defaults to `TIME_BUDGET`.
+
+        Returns:
+            Dict[int, Decision]: The decision of each computer player that was still in, by index.
+        """
+        decisions = {}
+        for index in range(len(match.players)):
+            if index == human_index or index in match.folded:
+                continue
+            decision = DecisionEngine.decide(match, index, time_budget)
+            decisions[index] = decision
+            if not decision.continues:
+                match.fold(index)
+        return decisions
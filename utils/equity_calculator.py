@@ -0,0 +1,420 @@
+import random
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, combinations
+from math import comb
+from utils.hand_evaluator import HandEvaluator
+from utils.instrumentation import instrumented
+from utils.preflop_table import PreflopTable
+from utils.query_cache import QueryCache, canonical_key
+
+
+class Equity(object):
+    """
+    Result of a heads-up equity calculation.
+
+    Attributes:
+        wins (int): Number of runouts the player wins.
+        ties (int): Number of runouts that end in a split pot.
+        losses (int): Number of runouts the player loses.
+        win (float): Percentage of runouts the player wins.
+        tie (float): Percentage of runouts that end in a split pot.
+        loss (float): Percentage of runouts the player loses.
+        samples (int): Number of runouts evaluated.
+        exact (bool): True if every runout was enumerated, False if they were sampled.
+        pot_share (float): Number of pots won, where a pot split among k players counts as 1/k.
+    """
+
+    def __init__(self, wins, ties, losses, exact, pot_share=None):
+        self.wins = wins
+        self.ties = ties
+        self.losses = losses
+        self.samples = wins + ties + losses
+        total = self.samples or 1
+        self.win = wins / total * 100
+        self.tie = ties / total * 100
+        self.loss = losses / total * 100
+        self.exact = exact
+        # Heads-up ties always split the pot in half
+        self.pot_share = wins + ties / 2 if pot_share is None else pot_share
+
+    @property
+    def equity(self):
+        """Share of the pot the player expects to win, as a percentage."""
+        return self.pot_share / (self.samples or 1) * 100
+
+    def __repr__(self):
+        return "Equity(win={:.2f}%, tie={:.2f}%, loss={:.2f}%, samples={})".format(
+            self.win, self.tie, self.loss, self.samples
+        )
+
+
+class EquityCalculator(object):
+    """
+    Utility class that calculates the win/tie/loss chances of a player against
+    an opponent, comparing full hand strength scores so kickers are respected.
+    """
+
+    SAMPLE_SIZE = 10000  # Runouts drawn when enumerating them is too expensive
+    EXACT_WORK_BUDGET = 50000  # Maximum number of runouts enumerated exactly
+    USE_PREFLOP_TABLE = True  # Answer preflop queries against a random hand from the precomputed table
+    CACHE = QueryCache(maxsize=4096)  # Results keyed by the query up to suit relabeling
+    RANGE_WORK_BUDGET = 500000  # Hand evaluations enumerated exactly in a range against range query
+    RANGE_SAMPLE_SIZE = 300  # Runouts drawn when a range against range query is sampled
+
+    @staticmethod
+    def compare_codes(player_codes, opponent_codes, board_codes):
+        """Return 1 if the player wins, 0 on a tie and -1 if the opponent wins."""
+        player_score = HandEvaluator.score_codes(player_codes + board_codes)
+        opponent_score = HandEvaluator.score_codes(opponent_codes + board_codes)
+        return (player_score > opponent_score) - (player_score < opponent_score)
+
+    @staticmethod
+    @instrumented("EquityCalculator.hand_equity", samples=lambda equity: equity.samples)
+    def hand_equity(hole_codes, board_codes, unseen_codes, opponent_codes=None, work_budget=None, samples=None):
+        """
+        Calculate the equity of some hole cards on a board.
+
+        Args:
+            hole_codes (Tuple[int]): Codes of the player's hole cards.
+            board_codes (Tuple[int]): Codes of the community cards already dealt.
+            unseen_codes (List[int]): Codes of every card that may still show up.
+            opponent_codes (Tuple[int]): Codes of the opponent's hole cards, None for a random hand.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+
+        Returns:
+            Equity: Win, tie and loss percentages of the player.
+        """
+        if work_budget is None:
+            work_budget = EquityCalculator.EXACT_WORK_BUDGET
+        if samples is None:
+            samples = EquityCalculator.SAMPLE_SIZE
+        hole_codes = tuple(hole_codes)
+        board_codes = tuple(board_codes)
+        needed_cards = 5 - len(board_codes)
+        # Unknown opponent cards are drawn together with the missing community cards
+        unknown = 0 if opponent_codes is not None else 2
+        space = comb(len(unseen_codes), unknown) * comb(len(unseen_codes) - unknown, needed_cards)
+
+        outcomes = [0, 0, 0]  # losses, ties, wins (indexed by comparison + 1)
+        compare = EquityCalculator.compare_codes
+        exact = space <= work_budget
+        if exact and opponent_codes is not None:
+            opponent_codes = tuple(opponent_codes)
+            for runout in combinations(unseen_codes, needed_cards):
+                outcomes[compare(hole_codes, opponent_codes, board_codes + runout) + 1] += 1
+        elif exact:
+            for opponent in combinations(unseen_codes, 2):
+                rest = [code for code in unseen_codes if code not in opponent]
+                for runout in combinations(rest, needed_cards):
+                    outcomes[compare(hole_codes, opponent, board_codes + runout) + 1] += 1
+        else:
+            for _ in range(samples):
+                drawn = tuple(random.sample(unseen_codes, needed_cards + unknown))
+                opponent = tuple(opponent_codes) if opponent_codes is not None else drawn[:2]
+                outcomes[compare(hole_codes, opponent, board_codes + drawn[unknown:]) + 1] += 1
+
+        losses, ties, wins = outcomes
+        return Equity(wins, ties, losses, exact)
+
+    @staticmethod
+    @instrumented("EquityCalculator.multiway_equity", samples=lambda equities: equities[0].samples)
+    def multiway_equity(hands, board_codes, unseen_codes, random_opponents=0, work_budget=None, samples=None):
+        """
+        Calculate the equity of several known hands on a board, optionally against random hands.
+        Every runout folds the community cards once and each hand only adds its hole cards,
+        so the cost grows linearly with the number of players.
+
+        Args:
+            hands (List[Tuple[int]]): Codes of the hole cards of each known hand.
+            board_codes (Tuple[int]): Codes of the community cards already dealt.
+            unseen_codes (List[int]): Codes of every card that may still show up.
+            random_opponents (int): Number of extra opponents whose hole cards are not known.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+
+        Returns:
+            List[Equity]: Win, tie and loss percentages of each known hand, in the same order.
+        """
+        if work_budget is None:
+            work_budget = EquityCalculator.EXACT_WORK_BUDGET
+        if samples is None:
+            samples = EquityCalculator.SAMPLE_SIZE
+        hands = [tuple(hand) for hand in hands]
+        board_codes = tuple(board_codes)
+        needed_cards = 5 - len(board_codes)
+        unknown = 2 * random_opponents
+        exact = not random_opponents and comb(len(unseen_codes), needed_cards) <= work_budget
+
+        wins = [0] * len(hands)
+        ties = [0] * len(hands)
+        losses = [0] * len(hands)
+        shares = [0.0] * len(hands)
+        board_state = HandEvaluator.board_state
+        score_with_board = HandEvaluator.score_with_board
+
+        def settle(runout, opponents):
+            board = board_state(board_codes + runout)
+            scores = [score_with_board(board, hand) for hand in hands]
+            opponent_scores = [score_with_board(board, opponent) for opponent in opponents]
+            best = max(scores + opponent_scores)
+            winners = scores.count(best) + opponent_scores.count(best)
+            for index, score in enumerate(scores):
+                if score != best:
+                    losses[index] += 1
+                    continue
+                if winners == 1:
+                    wins[index] += 1
+                else:
+                    ties[index] += 1
+                shares[index] += 1 / winners
+
+        if exact:
+            for runout in combinations(unseen_codes, needed_cards):
+                settle(runout, ())
+        else:
+            for _ in range(samples):
+                drawn = tuple(random.sample(unseen_codes, needed_cards + unknown))
+                opponents = [drawn[position:position + 2] for position in range(0, unknown, 2)]
+                settle(drawn[unknown:], opponents)
+
+        return [
+            Equity(wins[index], ties[index], losses[index], exact, shares[index])
+            for index in range(len(hands))
+        ]
+
+    @staticmethod
+    @instrumented("EquityCalculator.calculate_equity")
+    def calculate_equity(match, player_index, opponent_index=None, work_budget=None, samples=None, num_opponents=1):
+        """
+        Calculate the equity of a player on the current street of a match.
+
+        Args:
+            match (Match): The current Match instance.
+            player_index (int): Index of the player whose equity is calculated.
+            opponent_index (int): Index of a player whose hole cards are known,
+                                  None plays against random hands.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+            num_opponents (int): Number of random hands played against when opponent_index is None.
+
+        Returns:
+            Equity: Win, tie and loss percentages of the player.
+        """
+        hole_codes = tuple(card.code for card in match.players[player_index].hand)
+        board_codes = tuple(card.code for card in match.get_community_cards())
+        if opponent_index is not None:
+            opponent_codes = tuple(card.code for card in match.players[opponent_index].hand)
+        else:
+            opponent_codes = None
+        # From the player's point of view the other hole cards are not known
+        equity = EquityCalculator.equity_for_codes(
+            hole_codes, board_codes, (), opponent_codes, num_opponents, work_budget, samples
+        )
+        if opponent_index is None:
+            match.equities[(player_index, len(board_codes))] = equity
+        return equity
+
+    @staticmethod
+    def equity_for_codes(hole_codes, board_codes, dead_codes=(), opponent_codes=None, num_opponents=1,
+                         work_budget=None, samples=None):
+        """
+        Calculate the equity of some hole cards from card codes, without a match.
+        Preflop queries against a random hand are read from the precomputed table
+        when it is available and results are kept in `CACHE`.
+
+        Args:
+            hole_codes (Tuple[int]): Codes of the player's hole cards.
+            board_codes (Tuple[int]): Codes of the community cards already dealt.
+            dead_codes (Tuple[int]): Codes of cards known to be out of play.
+            opponent_codes (Tuple[int]): Codes of the opponent's hole cards, None for random hands.
+            num_opponents (int): Number of random hands played against when opponent_codes is None.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+
+        Returns:
+            Equity: Win, tie and loss percentages of the player.
+        """
+        if work_budget is None:
+            work_budget = EquityCalculator.EXACT_WORK_BUDGET
+        if samples is None:
+            samples = EquityCalculator.SAMPLE_SIZE
+        hole_codes = tuple(hole_codes)
+        board_codes = tuple(board_codes)
+        if opponent_codes is not None:
+            opponent_codes = tuple(opponent_codes)
+            num_opponents = 1
+        if (opponent_codes is None and num_opponents == 1 and not board_codes and not dead_codes
+                and EquityCalculator.USE_PREFLOP_TABLE):
+            record = PreflopTable.lookup(*hole_codes)
+            if record is not None:
+                wins, ties, losses = record[1]
+                return Equity(wins, ties, losses, False)
+        seen = set(hole_codes + board_codes).union(dead_codes, opponent_codes or ())
+        unseen_codes = [code for code in range(52) if code not in seen]
+
+        # A result is only shared between queries with the same budget and sample size
+        cache_key = (
+            "equity", num_opponents, work_budget, samples,
+            canonical_key(hole_codes, board_codes, opponent_codes or (), dead_codes),
+        )
+        equity = EquityCalculator.CACHE.get(cache_key)
+        if equity is None:
+            if num_opponents == 1:
+                equity = EquityCalculator.hand_equity(
+                    hole_codes, board_codes, unseen_codes, opponent_codes, work_budget, samples
+                )
+            else:
+                equity = EquityCalculator.multiway_equity(
+                    [hole_codes], board_codes, unseen_codes, num_opponents, work_budget, samples
+                )[0]
+            EquityCalculator.CACHE.put(cache_key, equity)
+        return equity
+
+    @staticmethod
+    def settle_ranges(board_codes, runout, hero, villain, combos, totals):
+        """
+        Add the weighted wins, ties and losses of two ranges on one complete board.
+
+        Every combination is scored once on the folded board. The opponent's scores are
+        sorted, globally and per card, with the running sum of their weights, so the
+        weight an opponent combination beats, ties or loses to is found by bisection,
+        and the combinations that share a card with the player's are subtracted per card.
+
+        Args:
+            board_codes (Tuple[int]): Codes of the five community cards.
+            runout (Tuple[int]): The community cards that were not known, they block combinations.
+            hero (List[Tuple[Tuple[int, int], float]]): The player's combinations and weights.
+            villain (List[Tuple[Tuple[int, int], float]]): The opponent's combinations and weights.
+            combos (Set[Tuple[int, int]]): Every combination of both ranges.
+            totals (List[float]): Weighted wins, ties and losses, updated in place.
+        """
+        board = HandEvaluator.board_state(board_codes)
+        score_with_board = HandEvaluator.score_with_board
+        scores = {
+            combo: score_with_board(board, combo) for combo in combos
+            if combo[0] not in runout and combo[1] not in runout
+        }
+
+        live = sorted((scores[combo], weight, combo) for combo, weight in villain if combo in scores)
+        if not live:
+            return
+        villain_scores = [score for score, _, _ in live]
+        villain_sums = list(accumulate((weight for _, weight, _ in live), initial=0))
+        card_scores = {}
+        card_weights = {}
+        villain_weights = {}
+        for score, weight, combo in live:
+            villain_weights[combo] = weight
+            for code in combo:
+                card_scores.setdefault(code, []).append(score)
+                card_weights.setdefault(code, []).append(weight)
+        card_sums = {code: list(accumulate(weights, initial=0)) for code, weights in card_weights.items()}
+        empty = ([], [0])
+
+        wins, ties, losses = totals
+        for combo, weight in hero:
+            score = scores.get(combo)
+            if score is None:
+                continue
+            low = bisect_left(villain_scores, score)
+            high = bisect_right(villain_scores, score)
+            below = villain_sums[low]
+            equal = villain_sums[high] - below
+            total = villain_sums[-1]
+            # Opponent combinations holding one of the player's cards are not possible
+            for code in combo:
+                blocked_scores, blocked_sums = (card_scores[code], card_sums[code]) if code in card_scores else empty
+                blocked_low = blocked_sums[bisect_left(blocked_scores, score)]
+                below -= blocked_low
+                equal -= blocked_sums[bisect_right(blocked_scores, score)] - blocked_low
+                total -= blocked_sums[-1]
+            # The same combination was subtracted once per card
+            same = villain_weights.get(combo, 0)
+            equal += same
+            total += same
+            wins += weight * below
+            ties += weight * equal
+            losses += weight * (total - below - equal)
+        totals[:] = [wins, ties, losses]
+
+    @staticmethod
+    @instrumented("EquityCalculator.range_equity")
+    def range_equity(hero_range, villain_range, board_codes=(), dead_codes=(), work_budget=None, samples=None):
+        """
+        Calculate the equity of a range against another range.
+
+        Every pair of combinations that do not share a card is weighted by the product of
+        their weights. Runouts are enumerated while the number of hand evaluations stays
+        under `work_budget` (always on the turn and the river), otherwise they are sampled;
+        each runout settles every pair of combinations at once.
+
+        Args:
+            hero_range (HandRange): The player's range.
+            villain_range (HandRange): The opponent's range.
+            board_codes (Tuple[int]): Codes of the community cards already dealt.
+            dead_codes (Tuple[int]): Codes of cards known to be out of play.
+            work_budget (int): Maximum number of hand evaluations to enumerate the runouts exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+
+        Returns:
+            Equity: Weighted win, tie and loss percentages of the player's range, the counts
+            are sums of combination weights.
+
+        Raises:
+            ValueError: If no pair of combinations is compatible with the known cards.
+        """
+        if work_budget is None:
+            work_budget = EquityCalculator.RANGE_WORK_BUDGET
+        if samples is None:
+            samples = EquityCalculator.RANGE_SAMPLE_SIZE
+        board_codes = tuple(board_codes)
+        removed = set(board_codes).union(dead_codes)
+        hero = hero_range.live_combos(removed)
+        villain = villain_range.live_combos(removed)
+        combos = {combo for combo, _ in hero}.union(combo for combo, _ in villain)
+        unseen_codes = [code for code in range(52) if code not in removed]
+        needed_cards = 5 - len(board_codes)
+
+        exact = comb(len(unseen_codes), needed_cards) * len(combos) <= work_budget
+        if exact:
+            runouts = combinations(unseen_codes, needed_cards)
+        else:
+            runouts = (tuple(random.sample(unseen_codes, needed_cards)) for _ in range(samples))
+        totals = [0.0, 0.0, 0.0]
+        for runout in runouts:
+            EquityCalculator.settle_ranges(board_codes + runout, runout, hero, villain, combos, totals)
+
+        wins, ties, losses = totals
+        if not wins + ties + losses:
+            raise ValueError("Los rangos no tienen combinaciones compatibles con las cartas conocidas.")
+        return Equity(wins, ties, losses, exact)
+
+    @staticmethod
+    def calculate_table_equity(match, work_budget=None, samples=None):
+        """
+        Calculate the equity of every player of a match with all hole cards known.
+
+        Args:
+            match (Match): The current Match instance.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+            samples (int): Number of runouts drawn when they are sampled.
+
+        Returns:
+            List[Equity]: Win, tie and loss percentages of each player, in seat order.
+        """
+        hands = [tuple(card.code for card in player.hand) for player in match.players]
+        board_codes = tuple(card.code for card in match.get_community_cards())
+        if work_budget is None:
+            work_budget = EquityCalculator.EXACT_WORK_BUDGET
+        if samples is None:
+            samples = EquityCalculator.SAMPLE_SIZE
+        seen = set(board_codes).union(*hands)
+        unseen_codes = [code for code in range(52) if code not in seen]
+
+        cache_key = ("table", work_budget, samples, canonical_key(board_codes, *hands))
+        equities = EquityCalculator.CACHE.get(cache_key)
+        if equities is None:
+            equities = EquityCalculator.multiway_equity(hands, board_codes, unseen_codes, 0, work_budget, samples)
+            EquityCalculator.CACHE.put(cache_key, equities)
+        return equities
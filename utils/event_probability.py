@@ -0,0 +1,289 @@
+from abc import ABC, abstractmethod
+from fractions import Fraction
+from itertools import combinations
+from math import comb
+
+
+class Event(ABC):
+    """
+    Base class of the events that can be asked about a draw of cards.
+    Events can be combined with `&` (intersection), `|` (union) and `~` (complement).
+    """
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    @abstractmethod
+    def matches(self, outcome):
+        """Check if the event happens for a drawn outcome (a tuple of cards)."""
+
+    @abstractmethod
+    def holds(self, counts):
+        """Check if the event happens given how many cards each count event selected (keyed by event)."""
+
+    def probability(self, cards, num_cards):
+        """
+        Exact probability of the event when drawing num_cards from the given cards.
+        Closed-form math is used whenever the event can be decomposed into card counts,
+        otherwise every outcome is enumerated.
+
+        Args:
+            cards (Iterable[Card]): The cards that can be drawn, for example `deck.cards`.
+            num_cards (int): Number of cards drawn.
+
+        Returns:
+            Fraction: The probability of the event.
+        """
+        cards = list(cards)
+        if EventProbability.is_decomposable(self):
+            return EventProbability.closed_form(self, cards, num_cards)
+        return EventProbability.enumerate(self, cards, num_cards)
+
+
+class CountEvent(Event):
+    """
+    The number of drawn cards that satisfy a selector is between `at_least` and `at_most`.
+
+    Attributes:
+        selector (Callable[[Card], bool]): Which cards are counted.
+        at_least (int): Minimum number of selected cards.
+        at_most (int): Maximum number of selected cards, None means no limit.
+        label (str): Description used when printing the event.
+    """
+
+    def __init__(self, selector, at_least=0, at_most=None, label="cards"):
+        self.selector = selector
+        self.at_least = at_least
+        self.at_most = at_most
+        self.label = label
+
+    def accepts(self, count):
+        """Check if a number of selected cards satisfies the event."""
+        return count >= self.at_least and (self.at_most is None or count <= self.at_most)
+
+    def matches(self, outcome):
+        return self.accepts(sum(1 for card in outcome if self.selector(card)))
+
+    def holds(self, counts):
+        return self.accepts(counts[self])
+
+    def __repr__(self):
+        upper = "" if self.at_most is None else f"..{self.at_most}"
+        return f"{self.label}[{self.at_least}{upper}]"
+
+
+class AllOf(Event):
+    """Every one of the events happens."""
+
+    def __init__(self, *events):
+        self.events = events
+
+    def matches(self, outcome):
+        return all(event.matches(outcome) for event in self.events)
+
+    def holds(self, counts):
+        return all(event.holds(counts) for event in self.events)
+
+    def __repr__(self):
+        return "(" + " & ".join(repr(event) for event in self.events) + ")"
+
+
+class AnyOf(Event):
+    """At least one of the events happens."""
+
+    def __init__(self, *events):
+        self.events = events
+
+    def matches(self, outcome):
+        return any(event.matches(outcome) for event in self.events)
+
+    def holds(self, counts):
+        return any(event.holds(counts) for event in self.events)
+
+    def __repr__(self):
+        return "(" + " | ".join(repr(event) for event in self.events) + ")"
+
+
+class Not(Event):
+    """The event does not happen."""
+
+    def __init__(self, event):
+        self.event = event
+
+    def matches(self, outcome):
+        return not self.event.matches(outcome)
+
+    def holds(self, counts):
+        return not self.event.holds(counts)
+
+    def __repr__(self):
+        return f"~{self.event!r}"
+
+
+class PredicateEvent(Event):
+    """Any condition on the whole outcome, it can only be solved by enumeration."""
+
+    def __init__(self, predicate, label="predicate"):
+        self.predicate = predicate
+        self.label = label
+
+    def matches(self, outcome):
+        return bool(self.predicate(outcome))
+
+    def holds(self, counts):
+        raise ValueError("Un evento con predicado no se puede decidir solo con el numero de cartas.")
+
+    def __repr__(self):
+        return self.label
+
+
+def _count_bounds(exactly, at_least, at_most):
+    if exactly is not None:
+        return exactly, exactly
+    return at_least or 0, at_most
+
+
+def suit_count(suit, exactly=None, at_least=None, at_most=None):
+    """Event on how many cards of a suit are drawn, e.g. suit_count('Hearts', at_least=2)."""
+    low, high = _count_bounds(exactly, at_least, at_most)
+    return CountEvent(lambda card: card.suit == suit, low, high, suit)
+
+
+def rank_count(value, exactly=None, at_least=None, at_most=None):
+    """Event on how many cards of a value (1 is the ace) are drawn, e.g. rank_count(1, exactly=1)."""
+    low, high = _count_bounds(exactly, at_least, at_most)
+    return CountEvent(lambda card: card.value == value, low, high, f"value {value}")
+
+
+def card_count(selector, exactly=None, at_least=None, at_most=None, label="cards"):
+    """Event on how many drawn cards satisfy any selector, e.g. face cards."""
+    low, high = _count_bounds(exactly, at_least, at_most)
+    return CountEvent(selector, low, high, label)
+
+
+class EventProbability(object):
+    """
+    Utility class that solves events with hypergeometric sums and inclusion-exclusion.
+
+    The cards are split into cells (cards selected by the same count events) and the
+    multivariate hypergeometric weight of every way to split the draw among the cells
+    is added up when the event holds for the resulting counts. A single count event
+    is just a hypergeometric tail. Complements subtract from one and small unions of
+    intersections use inclusion-exclusion, so each term only needs the cells of its
+    own count events.
+    """
+
+    INCLUSION_EXCLUSION_LIMIT = 4  # Largest union solved term by term
+
+    @staticmethod
+    def is_decomposable(event):
+        """Check if the event is built only from count events."""
+        if isinstance(event, CountEvent):
+            return True
+        if isinstance(event, Not):
+            return EventProbability.is_decomposable(event.event)
+        if isinstance(event, (AllOf, AnyOf)):
+            return all(EventProbability.is_decomposable(inner) for inner in event.events)
+        return False
+
+    @staticmethod
+    def count_events(event):
+        """Return the distinct count events used inside an event, in order of appearance."""
+        if isinstance(event, CountEvent):
+            return [event]
+        inner_events = [event.event] if isinstance(event, Not) else event.events
+        found = []
+        for inner in inner_events:
+            for count_event in EventProbability.count_events(inner):
+                if count_event not in found:
+                    found.append(count_event)
+        return found
+
+    @staticmethod
+    def is_intersection(event):
+        """Check if the event only requires count events to happen together."""
+        if isinstance(event, CountEvent):
+            return True
+        return isinstance(event, AllOf) and all(EventProbability.is_intersection(inner) for inner in event.events)
+
+    @staticmethod
+    def closed_form(event, cards, num_cards):
+        """Exact probability of a decomposable event, without enumerating outcomes."""
+        if isinstance(event, Not):
+            return 1 - EventProbability.closed_form(event.event, cards, num_cards)
+        if (isinstance(event, AnyOf)
+                and len(event.events) <= EventProbability.INCLUSION_EXCLUSION_LIMIT
+                and all(EventProbability.is_intersection(inner) for inner in event.events)):
+            # Inclusion-exclusion: add odd-sized intersections and subtract even-sized ones
+            total = Fraction(0)
+            for size in range(1, len(event.events) + 1):
+                sign = 1 if size % 2 else -1
+                for subset in combinations(event.events, size):
+                    total += sign * EventProbability.cell_sum(AllOf(*subset), cards, num_cards)
+            return total
+        return EventProbability.cell_sum(event, cards, num_cards)
+
+    @staticmethod
+    def cell_sum(event, cards, num_cards):
+        """Multivariate hypergeometric probability of a decomposable event."""
+        total_outcomes = comb(len(cards), num_cards)
+        if not total_outcomes:
+            return Fraction(0)
+        count_events = EventProbability.count_events(event)
+        # Maximums can only be broken for good when every count event must hold
+        bounded = EventProbability.is_intersection(event)
+
+        # Cards selected by exactly the same count events are interchangeable
+        cells = {}
+        for card in cards:
+            membership = tuple(count_event.selector(card) for count_event in count_events)
+            cells[membership] = cells.get(membership, 0) + 1
+        cells = list(cells.items())
+
+        def ways(cell_index, left, counts):
+            if cell_index == len(cells):
+                if left:
+                    return 0
+                return 1 if event.holds(dict(zip(count_events, counts))) else 0
+            membership, size = cells[cell_index]
+            result = 0
+            for taken in range(min(size, left) + 1):
+                new_counts = [count + taken if selected else count
+                              for count, selected in zip(counts, membership)]
+                # Counts only grow, so a maximum that is already exceeded cannot recover
+                if bounded and any(count_event.at_most is not None and count > count_event.at_most
+                                   for count_event, count in zip(count_events, new_counts)):
+                    break
+                result += comb(size, taken) * ways(cell_index + 1, left - taken, new_counts)
+            return result
+
+        return Fraction(ways(0, num_cards, [0] * len(count_events)), total_outcomes)
+
+    @staticmethod
+    def enumerate(event, cards, num_cards):
+        """Exact probability by checking every possible outcome, for events with no closed form."""
+        total_outcomes = comb(len(cards), num_cards)
+        if not total_outcomes:
+            return Fraction(0)
+        hits = sum(1 for outcome in combinations(cards, num_cards) if event.matches(outcome))
+        return Fraction(hits, total_outcomes)
+
+    @staticmethod
+    def cross_validate(event, cards, num_cards):
+        """
+        Solve a decomposable event both ways.
+
+        Returns:
+            Tuple[Fraction, Fraction]: The closed-form and the enumerated probabilities.
+        """
+        cards = list(cards)
+        return (
+            EventProbability.closed_form(event, cards, num_cards),
+            EventProbability.enumerate(event, cards, num_cards),
+        )
@@ -1,8 +1,9 @@
-from itertools import combinations
 from collections import Counter
+from itertools import combinations
+from math import comb
 from utils.hand_rankings import HandRanks
-from treys import Deck, Evaluator
-import random
+from utils.hand_evaluator import HandEvaluator
+from utils.instrumentation import instrumented
 
 class HandAnalyzer(object):
     """
@@ -19,14 +20,17 @@ class HandAnalyzer(object):
 
     @staticmethod
     def is_straight(cards):
-        """Check if cards form a straight."""
+        """Check if cards form a straight, the ace can play low or high."""
         values = sorted(card.value for card in cards)
+        if values == [1, 10, 11, 12, 13]:
+            return True
         for i in range(len(values) - 1):
             if values[i] + 1 != values[i + 1]:
                 return False
         return True
 
     @staticmethod
+    @instrumented("HandAnalyzer.hand_rank")
     def hand_rank(cards):
         """Evaluate the hand rank and return a HandRank enum."""
         values = sorted([card.value for card in cards], reverse=True)
@@ -35,7 +39,7 @@ class HandAnalyzer(object):
 
         match True:
             case _ if HandAnalyzer.is_flush(cards) and HandAnalyzer.is_straight(cards):
-                if values == [10, 11, 12, 13, 14]:
+                if values == [13, 12, 11, 10, 1]:
                     return HandRanks.ROYAL_FLUSH
                 return HandRanks.STRAIGHT_FLUSH
 
@@ -64,29 +68,135 @@ class HandAnalyzer(object):
                 return HandRanks.HIGH_CARD
 
     @staticmethod
+    @instrumented("HandAnalyzer.best_hand")
     def best_hand(cards):
         """Find the best 5-card hand from the 7 available cards."""
-        best = max(combinations(cards, 5), key=lambda hand: HandAnalyzer.hand_rank(hand).value)
-        return best, HandAnalyzer.hand_rank(best)
+        score = HandEvaluator.score(cards)
+        best = tuple(HandEvaluator.best_five(cards, score))
+        return best, HandEvaluator.rank_of(score)
+
+    @staticmethod
+    def sample_hand_counts(num_simulations, workers=1, seed=None, backend="python"):
+        """
+        Deal random 7-card hands and count how many end in each hand rank.
+
+        Args:
+            num_simulations (int): Number of random 7-card hands to deal.
+            workers (int): Number of worker processes, 0 uses one per core.
+            seed (int): Seed that makes the result reproducible for a given worker count.
+            backend (str): Engine used to deal and evaluate the hands, "python" or "numpy".
+
+        Returns:
+            List[int]: Count per HandRanks value, indexed by the enum value (index 0 is unused).
+        """
+        from utils.probability_calculator import ProbabilityCalculator
+        counts, _ = ProbabilityCalculator.sample_ranks((), range(52), 7, num_simulations, backend, workers, seed)
+        return counts
 
     @staticmethod
-    def calculate_hand_probabilities(num_simulations=1000000):
-        """Calculate the probabilities of each hand type by simulating poker hands."""
-        hand_counts = Counter()
-        evaluator = Evaluator()
+    def exact_hand_counts():
+        """
+        Count the hand rank of every one of the C(52,7) 7-card hands without dealing them.
+
+        Hands without a flush only depend on their ranks, so each of the 49,205 rank
+        multisets is evaluated once and weighted by the ways to pick its suits. Flushes
+        are counted apart from the suited ranks, and replace the rank-only category of
+        those same hands.
+
+        Returns:
+            List[int]: Count per HandRanks value, indexed by the enum value (index 0 is unused).
+        """
+        counts = [0] * (len(HandRanks) + 1)
+
+        def rank_category(ranks):
+            # Consecutive copies of a rank get different suits and no suit gets more than two cards
+            codes = [rank * 4 + position % 4 for position, rank in enumerate(sorted(ranks))]
+            return HandEvaluator.evaluate_codes(codes).value
+
+        # Every hand, as if none of them were a flush
+        def add_multisets(rank, left, ranks, ways):
+            if not left:
+                counts[rank_category(ranks)] += ways
+                return
+            if rank < 0:
+                return
+            for copies in range(min(4, left), -1, -1):
+                add_multisets(rank - 1, left - copies, ranks + [rank] * copies, ways * comb(4, copies))
+
+        add_multisets(12, 7, [], 1)
+
+        # Flushes: 5 to 7 ranks of one suit, the other cards come from the other three suits
+        def add_flushes(suited, others, ways):
+            flush_category = HandEvaluator.evaluate_codes([rank * 4 for rank in suited]).value
+            counts[flush_category] += ways
+            counts[rank_category(suited + others)] -= ways
+
+        for suited_count in (5, 6, 7):
+            for suited in map(list, combinations(range(13), suited_count)):
+                if suited_count == 7:
+                    add_flushes(suited, [], 4)
+                    continue
+                for first in range(13):
+                    if suited_count == 6:
+                        add_flushes(suited, [first], 4 * 3)
+                        continue
+                    for second in range(first, 13):
+                        other_ways = comb(3, 2) if first == second else 3 * 3
+                        add_flushes(suited, [first, second], 4 * other_ways)
+        return counts
 
-        for _ in range(num_simulations):
-            deck = Deck()
-            deck.shuffle()
-            cards = [deck.draw(1) for _ in range(7)]
-            hand_rank = evaluator.evaluate(cards[:2], cards[2:])
-            hand_counts[hand_rank] += 1
+    @staticmethod
+    def calculate_hand_probabilities(num_simulations=1000000, workers=1, seed=None, exact=False, backend="python"):
+        """
+        Calculate the probabilities of each hand type by simulating poker hands.
+
+        Args:
+            num_simulations (int): Number of random 7-card hands to deal.
+            workers (int): Number of worker processes, 0 uses one per core.
+            seed (int): Seed that makes the result reproducible for a given worker count.
+            exact (bool): Count every possible 7-card hand instead of simulating.
+            backend (str): Engine used to simulate the hands, "python" or "numpy".
+
+        Returns:
+            Dict[HandRanks, float]: Probability (as a percentage) of every hand rank.
+        """
+        if exact:
+            counts = HandAnalyzer.exact_hand_counts()
+        else:
+            counts = HandAnalyzer.sample_hand_counts(num_simulations, workers, seed, backend)
+        total = sum(counts)
+        return {rank: counts[rank.value] / total * 100 for rank in HandRanks}
 
-        probabilities = {hand: (count / num_simulations) * 100 for hand, count in hand_counts.items()}
-        return probabilities
+    @staticmethod
+    def iter_hand_probabilities(num_simulations=1000000, every=100000, seed=None, backend="python"):
+        """
+        Simulate poker hands and yield the running probabilities every few samples.
+
+        Args:
+            num_simulations (int): Total number of random 7-card hands to deal.
+            every (int): Number of hands dealt between two estimates.
+            seed (int): Seed that makes the sequence of estimates reproducible.
+            backend (str): Engine used to simulate the hands, "python" or "numpy".
+
+        Yields:
+            Tuple[int, Dict[HandRanks, float]]: Hands dealt so far and the probability
+            (as a percentage) of every hand rank over them.
+        """
+        counts = [0] * (len(HandRanks) + 1)
+        dealt = 0
+        batch = 0
+        while dealt < num_simulations:
+            size = min(every, num_simulations - dealt)
+            # Every batch gets its own seed so the estimates only depend on the root seed
+            batch_seed = None if seed is None else (seed, batch)
+            for value, count in enumerate(HandAnalyzer.sample_hand_counts(size, 1, batch_seed, backend)):
+                counts[value] += count
+            dealt += size
+            batch += 1
+            yield dealt, {rank: counts[rank.value] / dealt * 100 for rank in HandRanks}
 
 # Example usage
 if __name__ == "__main__":
-    probabilities = HandAnalyzer.calculate_hand_probabilities()
+    probabilities = HandAnalyzer.calculate_hand_probabilities(exact=True)
     for hand, probability in probabilities.items():
-        print(f"{hand}: {probability:.2f}%")
\ No newline at end of file
+        print(f"{HandRanks.get_name(hand)}: {probability:.4f}%")
@@ -0,0 +1,61 @@
+from utils.hand_rankings import HandRanks
+from utils.probability_estimate import ProbabilityEstimate, wilson_interval
+
+
+class HandDistribution(object):
+    """
+    Number of times each hand rank was reached over a set of runouts.
+
+    Attributes:
+        counts (List[int]): Count per HandRanks value, indexed by the enum value (index 0 is unused).
+        total (int): Number of runouts that were evaluated.
+        exact (bool): True if every possible runout was enumerated, False if they were sampled.
+    """
+
+    def __init__(self, counts, total, exact):
+        self.counts = counts
+        self.total = total
+        self.exact = exact
+
+    def copy(self):
+        """Return a distribution with the same counts that can be extended on its own."""
+        return HandDistribution(self.counts[:], self.total, self.exact)
+
+    def add(self, counts, total):
+        """Add the counts of more sampled runouts."""
+        for value, count in enumerate(counts):
+            self.counts[value] += count
+        self.total += total
+
+    def estimate(self, rank, confidence=0.95):
+        """
+        Probability of finishing with exactly the given rank, with its confidence interval.
+
+        Returns:
+            ProbabilityEstimate: The probability as a percentage, exact results have a zero width interval.
+        """
+        probability = self.probability(rank)
+        if self.exact:
+            return ProbabilityEstimate(probability, probability, probability, self.total, confidence, True)
+        lower, upper = wilson_interval(self.counts[rank.value], self.total, confidence)
+        return ProbabilityEstimate(probability, lower * 100, upper * 100, self.total, confidence)
+
+    def probability(self, rank):
+        """Probability (as a percentage) of finishing with exactly the given rank."""
+        if not self.total:
+            return 0.0
+        return self.counts[rank.value] / self.total * 100
+
+    def at_least(self, rank):
+        """Probability (as a percentage) of finishing with the given rank or a better one."""
+        if not self.total:
+            return 0.0
+        return sum(self.counts[rank.value:]) / self.total * 100
+
+    def probabilities(self):
+        """Return a dictionary with the probability of every hand rank."""
+        return {rank: self.probability(rank) for rank in HandRanks}
+
+    def cumulative(self):
+        """Return a dictionary with the probability of every hand rank or better."""
+        return {rank: self.at_least(rank) for rank in HandRanks}
@@ -0,0 +1,224 @@
+from itertools import combinations_with_replacement
+from utils.hand_rankings import HandRanks
+
+# Rank indexes go from 0 (deuce) to 12 (ace), so aces always play high
+# except in the wheel (A-2-3-4-5), which is handled by the straight table.
+NUM_RANKS = 13
+ACE = 12
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+# A score packs the hand category in the high bits and up to five
+# rank indexes (4 bits each) below it, so bigger scores are better hands.
+CATEGORY_SHIFT = 20
+
+# Per card code lookups, a card code is rank * 4 + suit (see cards.card_code)
+CARD_PRIMES = tuple(PRIMES[code >> 2] for code in range(52))
+CARD_BITS = tuple(1 << (code >> 2) for code in range(52))
+
+# Highest rank of the best straight contained in a 13-bit rank mask, or -1
+STRAIGHT_HIGH = []
+# Score of the best 5 cards for every rank mask with at least 5 ranks of one suit
+FLUSH_SCORES = {}
+# Score of every rank multiset of 5 to 7 cards (keyed by prime product) without a flush
+RANK_SCORES = {}
+
+
+def _pack(category, ranks):
+    """Pack a hand category and its ordered rank indexes into a single score."""
+    score = category.value
+    for i in range(5):
+        score = (score << 4) | (ranks[i] if i < len(ranks) else 0)
+    return score
+
+
+def _straight_high(mask):
+    """Return the highest rank of a straight inside the mask, -1 if there is none."""
+    for high in range(ACE, 3, -1):
+        run = 0b11111 << (high - 4)
+        if mask & run == run:
+            return high
+    # The wheel uses the ace as the lowest card
+    wheel = (1 << ACE) | 0b1111
+    return 3 if mask & wheel == wheel else -1
+
+
+def _flush_score(mask):
+    """Score a single suited rank mask that holds at least 5 cards."""
+    high = STRAIGHT_HIGH[mask]
+    if high == ACE:
+        return _pack(HandRanks.ROYAL_FLUSH, [high])
+    if high >= 0:
+        return _pack(HandRanks.STRAIGHT_FLUSH, [high])
+    ranks = [rank for rank in range(ACE, -1, -1) if mask & (1 << rank)]
+    return _pack(HandRanks.FLUSH, ranks[:5])
+
+
+def _rank_score(counts, mask):
+    """Score a rank multiset, given as a count per rank, ignoring flushes."""
+    ranks = [rank for rank in range(ACE, -1, -1) if counts[rank]]
+    quads = [rank for rank in ranks if counts[rank] == 4]
+    trips = [rank for rank in ranks if counts[rank] == 3]
+    pairs = [rank for rank in ranks if counts[rank] == 2]
+
+    if quads:
+        kicker = max(rank for rank in ranks if rank != quads[0])
+        return _pack(HandRanks.FOUR_OF_A_KIND, [quads[0], kicker])
+    if trips and (len(trips) > 1 or pairs):
+        return _pack(HandRanks.FULL_HOUSE, [trips[0], max(trips[1:] + pairs)])
+    if STRAIGHT_HIGH[mask] >= 0:
+        return _pack(HandRanks.STRAIGHT, [STRAIGHT_HIGH[mask]])
+    singles = [rank for rank in ranks if rank not in trips + pairs[:2]]
+    if trips:
+        return _pack(HandRanks.THREE_OF_A_KIND, [trips[0]] + singles[:2])
+    if len(pairs) >= 2:
+        return _pack(HandRanks.TWO_PAIR, pairs[:2] + singles[:1])
+    if pairs:
+        return _pack(HandRanks.PAIR, pairs[:1] + singles[:3])
+    return _pack(HandRanks.HIGH_CARD, singles[:5])
+
+
+def _build_tables():
+    """Build the straight, flush and rank multiset tables, only once."""
+    STRAIGHT_HIGH.extend(_straight_high(mask) for mask in range(1 << NUM_RANKS))
+    for mask in range(1 << NUM_RANKS):
+        if bin(mask).count("1") >= 5:
+            FLUSH_SCORES[mask] = _flush_score(mask)
+    for size in (5, 6, 7):
+        for multiset in combinations_with_replacement(range(NUM_RANKS), size):
+            counts = [0] * NUM_RANKS
+            key = 1
+            mask = 0
+            for rank in multiset:
+                counts[rank] += 1
+                key *= PRIMES[rank]
+                mask |= 1 << rank
+            if max(counts) <= 4:
+                RANK_SCORES[key] = _rank_score(counts, mask)
+
+
+class HandEvaluator(object):
+    """
+    Lookup table hand evaluator that scores 5, 6 or 7 cards in a single pass.
+
+    Cards are handled as integer codes (rank * 4 + suit). Suited cards are
+    folded into one 13-bit rank mask per suit to detect flushes, and every
+    other hand is resolved through the prime product of its ranks.
+    """
+
+    @staticmethod
+    def encode(card):
+        """Return the integer code (0-51) of a Card object."""
+        return card.code
+
+    @staticmethod
+    def score_codes(codes):
+        """Return the score of the best 5-card hand inside the card codes."""
+        if not RANK_SCORES:
+            _build_tables()
+        key = 1
+        suit_masks = [0, 0, 0, 0]
+        for code in codes:
+            key *= CARD_PRIMES[code]
+            suit_masks[code & 3] |= CARD_BITS[code]
+        # With 7 cards or less a flush rules out quads and full houses
+        for mask in suit_masks:
+            if mask in FLUSH_SCORES:
+                return FLUSH_SCORES[mask]
+        return RANK_SCORES[key]
+
+    @staticmethod
+    def board_state(codes):
+        """
+        Fold the community cards into the prime product and suit masks used by `score_codes`,
+        so several players on the same board only add their own hole cards.
+
+        Returns:
+            Tuple[int, Tuple[int, int, int, int]]: Prime product and rank mask of each suit.
+        """
+        key = 1
+        suit_masks = [0, 0, 0, 0]
+        for code in codes:
+            key *= CARD_PRIMES[code]
+            suit_masks[code & 3] |= CARD_BITS[code]
+        return key, tuple(suit_masks)
+
+    @staticmethod
+    def score_with_board(board, codes):
+        """Return the score of the best 5-card hand made of a folded board (see `board_state`) and some card codes."""
+        if not RANK_SCORES:
+            _build_tables()
+        key, suit_masks = board
+        suit_masks = list(suit_masks)
+        for code in codes:
+            key *= CARD_PRIMES[code]
+            suit_masks[code & 3] |= CARD_BITS[code]
+        for mask in suit_masks:
+            if mask in FLUSH_SCORES:
+                return FLUSH_SCORES[mask]
+        return RANK_SCORES[key]
+
+    @staticmethod
+    def score(cards):
+        """Return the score of the best 5-card hand inside the Card objects."""
+        return HandEvaluator.score_codes([HandEvaluator.encode(card) for card in cards])
+
+    @staticmethod
+    def rank_of(score):
+        """Return the HandRanks category stored in a score."""
+        return HandRanks(score >> CATEGORY_SHIFT)
+
+    @staticmethod
+    def evaluate_codes(codes):
+        """Return the HandRanks of the best 5-card hand inside the card codes."""
+        return HandRanks(HandEvaluator.score_codes(codes) >> CATEGORY_SHIFT)
+
+    @staticmethod
+    def evaluate(cards):
+        """Return the HandRanks of the best 5-card hand inside the Card objects."""
+        return HandEvaluator.rank_of(HandEvaluator.score(cards))
+
+    @staticmethod
+    def best_five(cards, score):
+        """
+        Pick the 5 cards that make up a score, without scanning combinations.
+
+        Args:
+            cards (List[Card]): The 5 to 7 cards the score was computed from.
+            score (int): The value returned by `score` for those cards.
+
+        Returns:
+            List[Card]: The five cards of the best hand, strongest first.
+        """
+        category = HandRanks(score >> CATEGORY_SHIFT)
+        ranks = [(score >> (4 * i)) & 0xF for i in range(4, -1, -1)]
+        by_code = {HandEvaluator.encode(card): card for card in cards}
+
+        if category in (HandRanks.FLUSH, HandRanks.STRAIGHT_FLUSH, HandRanks.ROYAL_FLUSH):
+            suit_counts = [0, 0, 0, 0]
+            for code in by_code:
+                suit_counts[code & 3] += 1
+            suit = suit_counts.index(max(suit_counts))
+            pool = {code: card for code, card in by_code.items() if code & 3 == suit}
+        else:
+            pool = by_code
+
+        if category in (HandRanks.STRAIGHT, HandRanks.STRAIGHT_FLUSH, HandRanks.ROYAL_FLUSH):
+            # Wrapping around makes the ace the last card of the wheel
+            wanted = [(ranks[0] - i) % NUM_RANKS for i in range(5)]
+            multiplicity = [1] * 5
+        else:
+            multiplicity = {
+                HandRanks.FOUR_OF_A_KIND: [4, 1],
+                HandRanks.FULL_HOUSE: [3, 2],
+                HandRanks.THREE_OF_A_KIND: [3, 1, 1],
+                HandRanks.TWO_PAIR: [2, 2, 1],
+                HandRanks.PAIR: [2, 1, 1, 1],
+            }.get(category, [1] * 5)
+            wanted = ranks[:len(multiplicity)]
+
+        best = []
+        for rank, count in zip(wanted, multiplicity):
+            matches = [card for code, card in sorted(pool.items(), reverse=True)
+                       if code >> 2 == rank and card not in best]
+            best.extend(matches[:count])
+        return best
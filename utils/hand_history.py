@@ -0,0 +1,237 @@
+import argparse
+import math
+import os
+import struct
+from utils.hand_rankings import HandRanks
+from utils.preflop_table import NUM_CLASSES, class_name
+
+MAX_SEATS = 9  # Same as match.MAX_PLAYERS, kept here so writing a record does not import the match
+NO_CARD = 255  # Card code of a community card not dealt or an empty seat
+STREETS = 4  # Hole cards, flop, turn and river
+
+# File layout: a header followed by one fixed-width record per hand, appended at every showdown
+HEADER = struct.Struct("<4sHH")  # magic, format version, record size
+MAGIC = b"PHH1"
+VERSION = 1
+# Player's equity per street, winner seats bitmask, players, player seat, community cards,
+# result, community card codes, hole card codes per seat and hand rank per seat
+RECORD = struct.Struct("<{}fHBBBb5B{}B{}B".format(STREETS, MAX_SEATS * 2, MAX_SEATS))
+# The same layout as a NumPy structured dtype (packed, no padding)
+RECORD_FIELDS = [
+    ("equity", "<f4", (STREETS,)),
+    ("winners", "<u2"),
+    ("num_players", "u1"),
+    ("player", "u1"),
+    ("streets", "u1"),
+    ("result", "i1"),
+    ("board", "u1", (5,)),
+    ("hole", "u1", (MAX_SEATS, 2)),
+    ("ranks", "u1", (MAX_SEATS,)),
+]
+
+# Values of the result field, relative to the player
+WIN, TIE, LOSS = 1, 0, -1
+
+
+class HandHistory(object):
+    """
+    Append-only binary log of the hands that reached the showdown.
+
+    Every hand is one fixed-width record (see RECORD): the card codes, the number
+    of players, the player's equity on each street (NaN when it was not calculated),
+    the winners and each player's hand rank. Writing a hand is a single struct pack
+    into a buffered file, and `load` maps the whole file as a NumPy structured array
+    without parsing anything, so millions of hands can be aggregated at once.
+
+    The game only keeps a log when the environment variable PROBABILITY_HAND_HISTORY
+    names the file to append to.
+
+    Args:
+        path (str): File the records are appended to, created with its header if missing.
+    """
+
+    PATH = os.environ.get("PROBABILITY_HAND_HISTORY") or None  # None keeps no log
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        else:
+            HandHistory.check_header(path)
+
+    @staticmethod
+    def check_header(path):
+        """Raise a ValueError if the file was not written in this format."""
+        with open(path, "rb") as history_file:
+            header = history_file.read(HEADER.size)
+        if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, RECORD.size):
+            raise ValueError(f"El archivo '{path}' no es un historial de manos valido.")
+
+    @staticmethod
+    def pack(match, player_index, result, winners, ranks):
+        """
+        Pack the showdown of a match into a record.
+
+        Args:
+            match (Match): The match, with every community card dealt.
+            player_index (int): Seat of the player the result and the equities refer to.
+            result (bool): The result of `Match.evaluate_showdown`, True, None or False.
+            winners (List[int]): Seats of the winners.
+            ranks (List[HandRanks]): Hand rank of each seat.
+
+        Returns:
+            bytes: The record.
+        """
+        board = [card.code for card in match.get_community_cards()]
+        num_community = len(board)
+        board += [NO_CARD] * (5 - num_community)
+        hole = [NO_CARD] * (MAX_SEATS * 2)
+        seat_ranks = [0] * MAX_SEATS
+        for seat, player in enumerate(match.players):
+            for position, card in enumerate(player.hand[:2]):
+                hole[seat * 2 + position] = card.code
+            seat_ranks[seat] = ranks[seat].value
+        equity = [math.nan] * STREETS
+        for street, cards in enumerate((0, 3, 4, 5)):
+            street_equity = match.equities.get((player_index, cards))
+            if street_equity is not None:
+                equity[street] = street_equity.equity
+        winner_bits = 0
+        for seat in winners:
+            winner_bits |= 1 << seat
+        outcome = WIN if result is True else LOSS if result is False else TIE
+        return RECORD.pack(
+            *equity, winner_bits, len(match.players), player_index, num_community, outcome,
+            *board, *hole, *seat_ranks
+        )
+
+    def append(self, match, player_index, result, winners, ranks):
+        """Append the showdown of a match, with the arguments of `pack`."""
+        self._file.write(HandHistory.pack(match, player_index, result, winners, ranks))
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def load(path):
+        """
+        Memory-map a hand history file.
+
+        Returns:
+            np.ndarray: Read-only structured array with one element per hand (see RECORD_FIELDS),
+            a record cut short by an interrupted write is left out.
+
+        Raises:
+            ValueError: If the file was not written in this format.
+        """
+        import numpy as np
+
+        HandHistory.check_header(path)
+        count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+        dtype = np.dtype(RECORD_FIELDS)
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", offset=HEADER.size, shape=(count,))
+
+    @staticmethod
+    def starting_hand_classes(records):
+        """Return the starting hand class (see preflop_table.class_index) of the player in every record."""
+        import numpy as np
+
+        rows = np.arange(len(records))
+        hole = records["hole"][rows, records["player"]].astype(np.intp)
+        first, second = hole[:, 0] >> 2, hole[:, 1] >> 2
+        high, low = np.maximum(first, second), np.minimum(first, second)
+        suited = (hole[:, 0] & 3) == (hole[:, 1] & 3)
+        return np.where(suited, high * 13 + low, low * 13 + high)
+
+    @staticmethod
+    def win_rates_by_starting_hand(records):
+        """
+        Win and tie rates of the player by starting hand class.
+
+        Returns:
+            Dict[str, Tuple[int, float, float]]: Hands played, win and tie percentages,
+            keyed by the class name ('AKs', 'T9o', '77'), for the classes that were played.
+        """
+        import numpy as np
+
+        classes = HandHistory.starting_hand_classes(records)
+        played = np.bincount(classes, minlength=NUM_CLASSES)
+        wins = np.bincount(classes, weights=records["result"] == WIN, minlength=NUM_CLASSES)
+        ties = np.bincount(classes, weights=records["result"] == TIE, minlength=NUM_CLASSES)
+        return {
+            class_name(index): (
+                int(played[index]), float(wins[index] / played[index] * 100), float(ties[index] / played[index] * 100)
+            )
+            for index in np.flatnonzero(played)
+        }
+
+    @staticmethod
+    def showdown_frequencies(records):
+        """
+        How often each hand rank shows up at the showdown, over every seated player.
+
+        Returns:
+            Dict[HandRanks, float]: Percentage of the showdown hands with each rank.
+        """
+        import numpy as np
+
+        ranks = records["ranks"].ravel()
+        counts = np.bincount(ranks[ranks > 0], minlength=len(HandRanks) + 1)
+        total = counts.sum() or 1
+        return {rank: float(counts[rank.value] / total * 100) for rank in HandRanks}
+
+    @staticmethod
+    def reevaluate(records, seat=None):
+        """
+        Evaluate again the hand of a seat in every record, from the stored cards.
+
+        Args:
+            records (np.ndarray): Records returned by `load`, with every community card dealt.
+            seat (int): Seat to evaluate, the player's seat of each record by default.
+
+        Returns:
+            np.ndarray: The HandRanks value of each hand, it should match the stored ranks.
+        """
+        import numpy as np
+        from utils.batch_simulator import BatchSimulator
+
+        rows = np.arange(len(records))
+        seats = records["player"] if seat is None else np.full(len(records), seat)
+        ranks = np.empty(len(records), dtype=np.int64)
+        for start in range(0, len(records), BatchSimulator.BATCH_SIZE):
+            batch = rows[start:start + BatchSimulator.BATCH_SIZE]
+            hands = np.concatenate((records["hole"][batch, seats[batch]], records["board"][batch]), axis=1)
+            ranks[batch] = BatchSimulator.classify(hands)
+        return ranks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a hand history file.")
+    parser.add_argument("path", nargs="?", default=HandHistory.PATH or "hand_history.bin")
+    parser.add_argument("--top", type=int, default=10, help="starting hands shown, by number of hands played")
+    arguments = parser.parse_args()
+    records = HandHistory.load(arguments.path)
+    print(f"Manos: {len(records)}")
+    if len(records):
+        results = records["result"]
+        print(
+            f"Gana {(results == WIN).mean() * 100:.2f}% | empata {(results == TIE).mean() * 100:.2f}% "
+            f"| pierde {(results == LOSS).mean() * 100:.2f}%"
+        )
+        for rank, frequency in HandHistory.showdown_frequencies(records).items():
+            print(f"{HandRanks.get_name(rank):<20}{frequency:>8.2f}%")
+        rates = sorted(HandHistory.win_rates_by_starting_hand(records).items(), key=lambda item: -item[1][0])
+        for name, (played, win, tie) in rates[:arguments.top]:
+            print(f"{name:<5}{played:>8} manos  gana {win:6.2f}%  empata {tie:6.2f}%")
@@ -0,0 +1,176 @@
+import argparse
+from cards import RANK_SYMBOLS, card_text, parse_card
+
+
+def _combo(first_code, second_code):
+    """Key of a combination: its two card codes, highest first."""
+    return (first_code, second_code) if first_code > second_code else (second_code, first_code)
+
+
+def _rank(symbol, token):
+    if symbol not in RANK_SYMBOLS:
+        raise ValueError(f"Rango no valido: '{token}'.")
+    return RANK_SYMBOLS.index(symbol)
+
+
+def class_combos(high, low, kind):
+    """
+    Return the combinations of a starting hand class.
+
+    Args:
+        high (int): Rank index (0 is a deuce, 12 an ace) of the highest card.
+        low (int): Rank index of the lowest card, equal to `high` for pairs.
+        kind (str): 's' for suited, 'o' for offsuit, '' for both.
+
+    Returns:
+        List[Tuple[int, int]]: 6 combinations for a pair, 4 suited, 12 offsuit or 16 for both.
+    """
+    if high == low:
+        return [_combo(high * 4 + first, high * 4 + second) for first in range(4) for second in range(first + 1, 4)]
+    combos = []
+    for high_suit in range(4):
+        for low_suit in range(4):
+            suited = high_suit == low_suit
+            if kind == "" or (kind == "s") == suited:
+                combos.append(_combo(high * 4 + high_suit, low * 4 + low_suit))
+    return combos
+
+
+class HandRange(object):
+    """
+    Weighted set of hole card combinations, written in the usual notation:
+
+        "AKs, TT+, 76s"        suited, pairs from tens to aces, one suited connector
+        "A2s+, KTo+, QJ"       every suited ace, KTo to KQo, QJ suited and offsuit
+        "22-66, K9s-KQs"       ranges of pairs and of kickers
+        "AhKh, QQ:0.5"         one exact combination, queens half of the time
+
+    Attributes:
+        combos (Dict[Tuple[int, int], float]): Weight (0 to 1) of every combination,
+            keyed by its two card codes, highest first.
+    """
+
+    def __init__(self, combos=None):
+        self.combos = dict(combos or {})
+
+    @staticmethod
+    def parse(text):
+        """
+        Parse a range written in the usual notation, later entries override earlier weights.
+
+        Returns:
+            HandRange: The combinations of the range.
+
+        Raises:
+            ValueError: If an entry or a weight is not valid.
+        """
+        hand_range = HandRange()
+        for entry in text.replace(";", ",").split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            token, _, weight_text = entry.partition(":")
+            token = token.strip()
+            weight = 1.0
+            if weight_text:
+                try:
+                    weight = float(weight_text)
+                except ValueError:
+                    raise ValueError(f"Peso no valido en el rango: '{entry}'.")
+                if not 0 <= weight <= 1:
+                    raise ValueError(f"El peso debe estar entre 0 y 1: '{entry}'.")
+            for combo in HandRange.parse_token(token):
+                hand_range.combos[combo] = weight
+        # A zero weight removes a combination
+        hand_range.combos = {combo: weight for combo, weight in hand_range.combos.items() if weight > 0}
+        return hand_range
+
+    @staticmethod
+    def parse_token(token):
+        """Return the combinations of a single entry of a range, like 'AKs', 'TT+', 'K9s-KQs' or 'AhKh'."""
+        if len(token) == 4 and token[1].lower() in "hcds" and token[3].lower() in "hcds":
+            first, second = parse_card(token[:2]), parse_card(token[2:])
+            if first == second:
+                raise ValueError(f"Rango no valido: '{token}'.")
+            return [_combo(first, second)]
+
+        if "-" in token:
+            start, _, end = token.partition("-")
+            first_high, first_low, kind = HandRange.parse_class(start.strip(), token)
+            last_high, last_low, last_kind = HandRange.parse_class(end.strip(), token)
+            if kind != last_kind:
+                raise ValueError(f"Rango no valido: '{token}'.")
+            if first_high == first_low and last_high == last_low:
+                # Pairs, like 22-66
+                lows = range(min(first_low, last_low), max(first_low, last_low) + 1)
+                return [combo for rank in lows for combo in class_combos(rank, rank, kind)]
+            if first_high != last_high or first_high in (first_low, last_low):
+                raise ValueError(f"Rango no valido: '{token}'.")
+            lows = range(min(first_low, last_low), max(first_low, last_low) + 1)
+            return [combo for low in lows for combo in class_combos(first_high, low, kind)]
+
+        plus = token.endswith("+")
+        high, low, kind = HandRange.parse_class(token.rstrip("+"), token)
+        if not plus:
+            return class_combos(high, low, kind)
+        if high == low:
+            # TT+ goes up to aces
+            return [combo for rank in range(low, 13) for combo in class_combos(rank, rank, kind)]
+        # A2s+ raises the kicker up to the card below the highest one
+        return [combo for kicker in range(low, high) for combo in class_combos(high, kicker, kind)]
+
+    @staticmethod
+    def parse_class(text, token):
+        """Return the high rank, low rank and kind ('s', 'o' or '') of a class like 'AKs' or 'TT'."""
+        text = text.upper().replace("10", "T")
+        kind = ""
+        if len(text) == 3 and text[2] in "SO":
+            kind = text[2].lower()
+            text = text[:2]
+        if len(text) != 2:
+            raise ValueError(f"Rango no valido: '{token}'.")
+        first, second = _rank(text[0], token), _rank(text[1], token)
+        if first == second and kind:
+            raise ValueError(f"Rango no valido: '{token}'.")
+        return max(first, second), min(first, second), kind
+
+    def live_combos(self, dead_codes):
+        """
+        Return the combinations that do not use any of the dead cards.
+
+        Returns:
+            List[Tuple[Tuple[int, int], float]]: Combination and weight pairs.
+        """
+        dead = set(dead_codes)
+        return [
+            (combo, weight) for combo, weight in self.combos.items()
+            if combo[0] not in dead and combo[1] not in dead
+        ]
+
+    def __len__(self):
+        return len(self.combos)
+
+    def __repr__(self):
+        return "HandRange(combos={})".format(len(self.combos))
+
+    def __str__(self):
+        return ", ".join(card_text(first) + card_text(second) for first, second in sorted(self.combos, reverse=True))
+
+
+if __name__ == "__main__":
+    from utils.equity_calculator import EquityCalculator
+
+    parser = argparse.ArgumentParser(description="Equity of a range against another range.")
+    parser.add_argument("hero", help="the player's range, like 'AKs, TT+'")
+    parser.add_argument("villain", help="the opponent's range, like '76s, 22+'")
+    parser.add_argument("--board", default="", help="community cards, like 'Ah Kd 2c'")
+    parser.add_argument("--dead", default="", help="cards out of play")
+    parser.add_argument("--samples", type=int, default=None, help="runouts sampled when they are not enumerated")
+    arguments = parser.parse_args()
+    board = [parse_card(text) for text in arguments.board.replace(",", " ").split()]
+    dead = [parse_card(text) for text in arguments.dead.replace(",", " ").split()]
+    hero, villain = HandRange.parse(arguments.hero), HandRange.parse(arguments.villain)
+    equity = EquityCalculator.range_equity(hero, villain, board, dead, samples=arguments.samples)
+    kind = "exacta" if equity.exact else "muestreada"
+    print(f"{len(hero)} combinaciones contra {len(villain)} ({kind})")
+    print(f"Gana {equity.win:.2f}% | empata {equity.tie:.2f}% | pierde {equity.loss:.2f}% | equidad {equity.equity:.2f}%")
@@ -0,0 +1,184 @@
+import functools
+import json
+import os
+import time
+from array import array
+
+
+class Instrumentation(object):
+    """
+    Opt-in timing of the game's hot paths.
+
+    Functions marked with `instrumented` only check `ENABLED` when it is off, so the
+    cost of an instrumented call is a single attribute lookup. When it is on, every
+    call records its latency and, for functions that report them, how many samples
+    it processed. Samples are only reported where runouts are evaluated (`count_ranks`,
+    the equity loops, building a probability tree), so answers read from a cache, a
+    match or the preflop table add latency but no samples. A capture mode adds a cProfile profile and tracemalloc allocation
+    statistics on top of that.
+
+    Set the environment variable PROBABILITY_INSTRUMENTATION=1 to enable it from the
+    start, or PROBABILITY_INSTRUMENTATION=profile to also capture a profile, and
+    PROBABILITY_INSTRUMENTATION_JSON=<path> to export the report when a match ends.
+    """
+
+    ENABLED = os.environ.get("PROBABILITY_INSTRUMENTATION", "") not in ("", "0")
+    CAPTURE = os.environ.get("PROBABILITY_INSTRUMENTATION", "") == "profile"
+    JSON_PATH = os.environ.get("PROBABILITY_INSTRUMENTATION_JSON")  # Where the end of match report is exported
+    PROFILE_ROWS = 15  # Functions kept from the profile, by cumulative time
+    MEMORY_ROWS = 10  # Source lines kept from the allocation statistics
+
+    _latencies = {}  # Name -> array of latencies in seconds
+    _samples = {}  # Name -> samples processed
+    _profiler = None
+    _capture = None  # Results of the last capture
+
+    @staticmethod
+    def enable(capture=False):
+        """Start recording, with a cProfile and tracemalloc capture if requested."""
+        Instrumentation.ENABLED = True
+        if capture:
+            Instrumentation.start_capture()
+
+    @staticmethod
+    def disable():
+        """Stop recording, the data already recorded is kept."""
+        Instrumentation.ENABLED = False
+        Instrumentation.stop_capture()
+
+    @staticmethod
+    def reset():
+        """Drop every recorded latency and sample count."""
+        Instrumentation._latencies.clear()
+        Instrumentation._samples.clear()
+
+    @staticmethod
+    def record(name, elapsed, samples=0):
+        """Add the latency (in seconds) and the samples processed by one call."""
+        latencies = Instrumentation._latencies.get(name)
+        if latencies is None:
+            latencies = Instrumentation._latencies[name] = array('d')
+            Instrumentation._samples[name] = 0
+        latencies.append(elapsed)
+        Instrumentation._samples[name] += samples
+
+    @staticmethod
+    def start_capture():
+        """Start profiling the calls and tracing the memory allocations."""
+        if Instrumentation._profiler is not None:
+            return
+        # The profilers are only imported when a capture is requested
+        import cProfile
+        import tracemalloc
+        Instrumentation._profiler = cProfile.Profile()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        Instrumentation._profiler.enable()
+
+    @staticmethod
+    def stop_capture():
+        """
+        Stop the capture.
+
+        Returns:
+            Dict: The top functions by cumulative time and the top allocating source lines,
+            None if nothing was being captured.
+        """
+        profiler = Instrumentation._profiler
+        if profiler is None:
+            return None
+        import pstats
+        import tracemalloc
+        profiler.disable()
+        Instrumentation._profiler = None
+
+        stats = pstats.Stats(profiler)
+        functions = []
+        for (file_name, line, function), (_, calls, _, cumulative, _) in stats.stats.items():
+            functions.append({
+                "function": f"{os.path.basename(file_name)}:{line}({function})",
+                "calls": calls,
+                "cumulative_ms": cumulative * 1000,
+            })
+        functions.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocations = [
+            {"line": str(statistic.traceback[0]), "size_kb": statistic.size / 1024, "count": statistic.count}
+            for statistic in snapshot.statistics("lineno")[:Instrumentation.MEMORY_ROWS]
+        ]
+        Instrumentation._capture = {
+            "profile": functions[:Instrumentation.PROFILE_ROWS],
+            "memory": {"peak_kb": peak / 1024, "allocations": allocations},
+        }
+        return Instrumentation._capture
+
+    @staticmethod
+    def percentile(ordered, fraction):
+        """Return the value below which a fraction of the sorted values fall (nearest rank)."""
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    @staticmethod
+    def report():
+        """
+        Summarize everything recorded so far.
+
+        Returns:
+            Dict: Per instrumented function the number of calls, the cumulative, mean and
+            percentile latencies in milliseconds and the samples per second, plus the
+            profile and allocation statistics of the last capture if there was one.
+        """
+        functions = {}
+        for name, latencies in Instrumentation._latencies.items():
+            ordered = sorted(latencies)
+            total = sum(ordered)
+            samples = Instrumentation._samples[name]
+            functions[name] = {
+                "calls": len(ordered),
+                "total_ms": total * 1000,
+                "mean_ms": total / len(ordered) * 1000,
+                "p50_ms": Instrumentation.percentile(ordered, 0.50) * 1000,
+                "p90_ms": Instrumentation.percentile(ordered, 0.90) * 1000,
+                "p99_ms": Instrumentation.percentile(ordered, 0.99) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "samples": samples,
+                "samples_per_second": samples / total if total else 0.0,
+            }
+        report = {"functions": functions}
+        if Instrumentation._capture is not None:
+            report.update(Instrumentation._capture)
+        return report
+
+    @staticmethod
+    def export_json(path):
+        """Write the report to a JSON file."""
+        with open(path, "w") as report_file:
+            json.dump(Instrumentation.report(), report_file, indent=2)
+
+
+if Instrumentation.CAPTURE:
+    Instrumentation.start_capture()
+
+
+def instrumented(name, samples=None):
+    """
+    Decorator that records the calls of a function while instrumentation is enabled.
+
+    Args:
+        name (str): Name the calls are recorded under, like 'HandAnalyzer.best_hand'.
+        samples (Callable[[Any], int]): Returns how many samples a call processed from its result.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not Instrumentation.ENABLED:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+            Instrumentation.record(name, elapsed, samples(result) if samples else 0)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from cards import card_text
+from utils.instrumentation import Instrumentation
+
+BOARD_SIZES = (0, 3, 4, 5)
+
+
+def random_query(rng, query_id):
+    """Return a random probability, equity or hand rank query for the probability server."""
+    kind = rng.choice(("probability", "probability", "equity", "rank"))
+    if kind == "rank":
+        cards = [card_text(code) for code in rng.sample(range(52), 7)]
+        return {"id": query_id, "query": "rank", "cards": cards}
+    board_size = rng.choice(BOARD_SIZES)
+    cards = [card_text(code) for code in rng.sample(range(52), 2 + board_size)]
+    query = {"id": query_id, "query": kind, "hole": cards[:2], "board": cards[2:]}
+    if kind == "probability":
+        query["target"] = "PAIR"
+    else:
+        query["opponents"] = rng.choice((1, 1, 2, 3))
+        query["samples"] = 2000
+    return query
+
+
+async def run_load(num_requests, concurrency, seed=None, host="127.0.0.1", port=8765, unix_path=None):
+    """
+    Send random queries to a running probability server and time the answers.
+
+    Every connection keeps one query in flight, so `concurrency` is the number of
+    queries the server has to deal with at the same time.
+
+    Returns:
+        Dict: Queries per second, latency percentiles in milliseconds and number of errors.
+    """
+    rng = random.Random(seed)
+    queries = [random_query(rng, query_id) for query_id in range(num_requests)]
+    latencies = []
+    errors = 0
+
+    async def client(share):
+        nonlocal errors
+        if unix_path:
+            reader, writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        for query in share:
+            start = time.perf_counter()
+            writer.write(json.dumps(query).encode() + b"\n")
+            await writer.drain()
+            answer = json.loads(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+            if "error" in answer or answer.get("id") != query["id"]:
+                errors += 1
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(queries[index::concurrency]) for index in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    percentile = Instrumentation.percentile
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "elapsed": elapsed,
+        "queries_per_second": len(ordered) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000 if ordered else 0.0,
+        "p90_ms": percentile(ordered, 0.90) * 1000 if ordered else 0.0,
+        "p99_ms": percentile(ordered, 0.99) * 1000 if ordered else 0.0,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send random queries to the probability server and report latency.")
+    parser.add_argument("--requests", type=int, default=2000, help="number of queries to send")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections with a query in flight")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    arguments = parser.parse_args()
+    report = asyncio.run(run_load(
+        arguments.requests, arguments.concurrency, arguments.seed, arguments.host, arguments.port, arguments.unix
+    ))
+    print(f"Consultas: {report['requests']} ({report['errors']} errores) en {report['elapsed']:.2f} s")
+    print(f"Consultas por segundo: {report['queries_per_second']:,.0f}")
+    print("Latencia: p50 {p50_ms:.2f} ms, p90 {p90_ms:.2f} ms, p99 {p99_ms:.2f} ms, max {max_ms:.2f} ms".format(**report))
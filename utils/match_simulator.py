@@ -0,0 +1,187 @@
+import argparse
+import random
+import time
+from cards import Player
+from match import Match, PLAYER
+from utils.decision_engine import TABLE, DecisionEngine
+from utils.hand_evaluator import HandEvaluator
+from utils.hand_history import HandHistory
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import Instrumentation
+from utils.output_formatter import OutputFormatter
+
+
+class SimulationResult(object):
+    """
+    Statistics of a batch of matches played without user interaction.
+
+    Attributes:
+        matches (int): Number of matches played.
+        wins (int): Matches won by the player alone.
+        ties (int): Matches where the player split the pot.
+        losses (int): Matches won by a computer opponent.
+        split_pots (int): Matches where the pot was split, whether the player was part of it or not.
+        player_ranks (List[int]): Count of the player's best hand per HandRanks value (index 0 is unused).
+        computer_ranks (List[int]): Count of the computer opponents' best hands per HandRanks value.
+        elapsed (float): Seconds spent playing the matches.
+        seed (int): Seed the matches were played with, None if they were not seeded.
+        num_players (int): Players seated in every match.
+        decisions (int): Fold or continue decisions made by the computer players.
+        folds (int): Decisions where a computer player folded.
+        decision_samples (int): Runouts evaluated over every decision, preflop table reads count as 0.
+        table_decisions (int): Decisions whose equity was read from the preflop table.
+        max_decision_time (float): Seconds taken by the slowest decision.
+    """
+
+    def __init__(self, seed=None, num_players=2):
+        self.num_players = num_players
+        self.matches = 0
+        self.split_pots = 0
+        self.wins = 0
+        self.ties = 0
+        self.losses = 0
+        self.player_ranks = [0] * (len(HandRanks) + 1)
+        self.computer_ranks = [0] * (len(HandRanks) + 1)
+        self.elapsed = 0.0
+        self.seed = seed
+        self.decisions = 0
+        self.folds = 0
+        self.decision_samples = 0
+        self.table_decisions = 0
+        self.max_decision_time = 0.0
+
+    def add(self, result, winners, ranks):
+        """Record the outcome of one showdown, as returned by `Match.evaluate_showdown`."""
+        self.matches += 1
+        if len(winners) > 1:
+            self.split_pots += 1
+        if result is True:
+            self.wins += 1
+        elif result is False:
+            self.losses += 1
+        else:
+            self.ties += 1
+        for index, rank in enumerate(ranks):
+            if index == PLAYER:
+                self.player_ranks[rank.value] += 1
+            else:
+                self.computer_ranks[rank.value] += 1
+
+    def add_decisions(self, decisions):
+        """Record the decisions of a match, as returned by `DecisionEngine.computer_turn`."""
+        for decision in decisions:
+            self.decisions += 1
+            self.folds += not decision.continues
+            self.decision_samples += decision.samples
+            self.table_decisions += decision.source == TABLE
+            self.max_decision_time = max(self.max_decision_time, decision.elapsed)
+
+    @property
+    def hands_per_second(self):
+        """Number of matches played per second."""
+        return self.matches / self.elapsed if self.elapsed else 0.0
+
+    def percentage(self, count):
+        """Return a count as a percentage of the matches played."""
+        return count / self.matches * 100 if self.matches else 0.0
+
+    def opponent_percentage(self, count):
+        """Return a count as a percentage of the computer hands played."""
+        hands = self.matches * (self.num_players - 1)
+        return count / hands * 100 if hands else 0.0
+
+    def __repr__(self):
+        return "SimulationResult(matches={}, wins={}, ties={}, losses={}, hands_per_second={:.0f})".format(
+            self.matches, self.wins, self.ties, self.losses, self.hands_per_second
+        )
+
+
+class MatchSimulator(object):
+    """
+    Utility class that plays complete matches between the player and the computer
+    without asking for input, to measure the game loop and the hand evaluator.
+    """
+
+    @staticmethod
+    def play_match(rng=None, num_players=2, history=None, decision_budget=None, decisions=None):
+        """
+        Play one match from the hole cards to the showdown.
+
+        Args:
+            rng (random.Random): Source of randomness for the shuffle.
+            num_players (int): Players seated, the player on position 1 and the computer everywhere else.
+            history (HandHistory): Log to append the showdown to.
+            decision_budget (float): Seconds each computer decision may take. When given, the
+                computer players fold or continue on every street, otherwise they always continue.
+            decisions (List[Decision]): List the computer decisions are appended to.
+
+        Returns:
+            Tuple[bool, List[int], List[HandRanks]]: The result of `Match.evaluate_showdown`.
+        """
+        match = Match(rng, history)
+        players = [Player(f"Computadora {index}") for index in range(num_players)]
+        players[PLAYER] = Player("Jugador")
+        match.start(players)
+        for deal in (match.draw_hole_cards, match.draw_flop, match.draw_turn, match.draw_river):
+            deal()
+            if decision_budget is not None:
+                street_decisions = DecisionEngine.computer_turn(match, PLAYER, decision_budget)
+                if decisions is not None:
+                    decisions.extend(street_decisions.values())
+        return match.evaluate_showdown()
+
+    @staticmethod
+    def run(num_matches, seed=None, num_players=2, history=None, decision_budget=None):
+        """
+        Play a batch of matches.
+
+        Args:
+            num_matches (int): Number of matches to play.
+            seed (int): Seed that makes the batch reproducible, None uses fresh randomness.
+            num_players (int): Players seated in every match.
+            history (HandHistory): Log to append every showdown to.
+            decision_budget (float): Seconds each computer decision may take, None lets the computer
+                players always continue.
+
+        Returns:
+            SimulationResult: Win/tie/loss counts, hand rank counts and timing of the batch.
+        """
+        if num_matches < 0:
+            raise ValueError("El numero de partidas no puede ser negativo.")
+        rng = random.Random(seed)
+        result = SimulationResult(seed, num_players)
+        # The evaluator builds its lookup tables on first use, keep that out of the timing
+        HandEvaluator.score_codes(range(7))
+        start = time.perf_counter()
+        for _ in range(num_matches):
+            decisions = []
+            result.add(*MatchSimulator.play_match(rng, num_players, history, decision_budget, decisions))
+            result.add_decisions(decisions)
+        result.elapsed = time.perf_counter() - start
+        return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play matches without user interaction and report statistics.")
+    parser.add_argument("--matches", type=int, default=10000, help="number of matches to play")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--players", type=int, default=2, help="players seated at the table")
+    parser.add_argument("--instrument", choices=("timing", "profile"), help="record timings, or also a profile")
+    parser.add_argument("--instrument-json", help="export the recorded timings to this JSON file")
+    parser.add_argument("--history", help="append every showdown to this hand history file")
+    parser.add_argument("--decision-budget", type=float, default=None,
+                        help="milliseconds per computer decision, the computer never folds without it")
+    arguments = parser.parse_args()
+    if arguments.instrument:
+        Instrumentation.enable(capture=arguments.instrument == "profile")
+    history = HandHistory(arguments.history) if arguments.history else None
+    decision_budget = arguments.decision_budget / 1000 if arguments.decision_budget is not None else None
+    result = MatchSimulator.run(arguments.matches, arguments.seed, arguments.players, history, decision_budget)
+    if history is not None:
+        history.close()
+    OutputFormatter.print_simulation_summary(result)
+    if Instrumentation.ENABLED:
+        Instrumentation.stop_capture()
+        OutputFormatter.print_instrumentation_summary(Instrumentation.report())
+        if arguments.instrument_json:
+            Instrumentation.export_json(arguments.instrument_json)
@@ -1,4 +1,6 @@
 from colorama import Fore
+from cards import card_text
+from utils.decision_engine import TABLE
 from utils.hand_rankings import HandRanks
 
 
@@ -8,6 +10,8 @@ class OutputFormatter:
     for information on various stages of the poker game.
     """
 
+    PAIR_EXAMPLES = 4  # Turn and river pairs shown for each improved rank
+
     @staticmethod
     def print_community_cards(community_cards):
         """
@@ -58,6 +62,97 @@ class OutputFormatter:
         rank = HandRanks.get_name(ranking)
         print(default_color + f"Mejor mano de {player_name}: {rank}")
 
+    @staticmethod
+    def print_equity(player_name, equity, num_opponents=1):
+        """
+        Prints the win, tie and loss chances of a player in a formatted and colored output.
+
+        Parameters:
+            player_name (str): The name of the player who owns the hand
+            equity (Equity): The result of `EquityCalculator.calculate_equity`.
+            num_opponents (int): Number of random hands the equity was calculated against.
+
+        Returns:
+            None: This method prints the equity to the console and does not return any value.
+        """
+        default_color = Fore.MAGENTA
+        kind = "exacta" if equity.exact else f"{equity.samples} muestras"
+        against = "una mano aleatoria" if num_opponents == 1 else f"{num_opponents} manos aleatorias"
+        print(
+            default_color + f"Equidad de {player_name} contra {against} ({kind}): "
+            f"gana {equity.win:.2f}% | empata {equity.tie:.2f}% | pierde {equity.loss:.2f}% "
+            f"| bote esperado {equity.equity:.2f}%"
+        )
+
+    @staticmethod
+    def print_outs(player_name, outs):
+        """
+        Prints the cards that improve a player's hand, grouped by the rank they make, in a formatted and colored output.
+
+        Parameters:
+            player_name (str): The name of the player who owns the hand
+            outs (Outs): The result of `OutsCalculator.calculate_outs`.
+
+        Returns:
+            None: This method prints the outs to the console and does not return any value.
+        """
+        default_color = Fore.YELLOW
+        print(default_color + f"===OUTS DE {player_name.upper()}===")
+        print(
+            default_color + f"Mano actual: {HandRanks.get_name(outs.current_rank)} | "
+            f"{outs.num_outs} de {outs.unseen} cartas mejoran la mano"
+        )
+        for rank in sorted(outs.improving, key=lambda rank: rank.value):
+            codes = sorted(outs.improving[rank], reverse=True)
+            cards = " ".join(card_text(code) for code in codes)
+            print(default_color + f"  {HandRanks.get_name(rank)} ({len(codes)}): {cards}")
+        if outs.better:
+            cards = " ".join(card_text(code) for code in sorted(outs.better, reverse=True))
+            print(default_color + f"Cartas que mejoran el resultado ({len(outs.better)}): {cards}")
+        if outs.worse:
+            cards = " ".join(card_text(code) for code in sorted(outs.worse, reverse=True))
+            print(Fore.RED + f"Cartas que empeoran el resultado ({len(outs.worse)}): {cards}")
+
+        if outs.total_runouts:
+            print(default_color + f"Turn y river ({outs.total_runouts} combinaciones):")
+            for rank in sorted(outs.runouts, key=lambda rank: rank.value):
+                count = outs.runouts[rank]
+                line = f"  {HandRanks.get_name(rank)}: {count} ({count / outs.total_runouts * 100:.2f}%)"
+                if rank.value > outs.current_rank.value:
+                    examples = []
+                    for pair in outs.pairs(rank):
+                        examples.append(" ".join(card_text(code) for code in pair))
+                        if len(examples) == OutputFormatter.PAIR_EXAMPLES:
+                            break
+                    line += " ej. " + ", ".join(examples)
+                print(default_color + line)
+            share = outs.better_runouts / outs.total_runouts * 100
+            print(default_color + f"Turn y river que mejoran el resultado: {outs.better_runouts} ({share:.2f}%)")
+        print(default_color + "=" * 25)
+
+    @staticmethod
+    def print_decision(player_name, decision):
+        """
+        Prints whether a computer player folds or continues, with the equity behind it, in a colored output.
+
+        Parameters:
+            player_name (str): The name of the computer player.
+            decision (Decision): The result of `DecisionEngine.decide`.
+
+        Returns:
+            None: This method prints the decision to the console and does not return any value.
+        """
+        if decision.source == TABLE:
+            kind = "tabla preflop"
+        else:
+            kind = "exacta" if decision.equity.exact else f"{decision.samples} muestras"
+        action = "continua" if decision.continues else "se retira"
+        color = Fore.CYAN if decision.continues else Fore.RED
+        print(
+            color + f"{player_name} {action}: equidad {decision.equity.equity:.2f}% "
+            f"(necesita {decision.threshold:.2f}%, {kind}, {decision.elapsed * 1000:.1f} ms)"
+        )
+
     @staticmethod
     def print_winner(winner):
         """
@@ -81,3 +176,70 @@ class OutputFormatter:
             print(Fore.YELLOW + "Es un empate!")
         else:
             raise ValueError("El ganador solo puede ser la computadora o tu.")
+
+    @staticmethod
+    def print_simulation_summary(result):
+        """
+        Prints the statistics of a batch of simulated matches in a formatted and colored output.
+
+        Parameters:
+            result (SimulationResult): The result of `MatchSimulator.run`.
+
+        Returns:
+            None: This method prints the statistics to the console and does not return any value.
+        """
+        default_color = Fore.CYAN
+        print(default_color + "===SIMULACION DE PARTIDAS===")
+        print(default_color + f"Partidas: {result.matches} | jugadores: {result.num_players} | semilla: {result.seed}")
+        print(
+            default_color + f"Jugador gana {result.percentage(result.wins):.2f}% | "
+            f"empata {result.percentage(result.ties):.2f}% | pierde {result.percentage(result.losses):.2f}% "
+            f"| botes divididos {result.percentage(result.split_pots):.2f}%"
+        )
+        print(default_color + f"{'Mano':<20}{'Jugador':>10}{'Computadora':>14}")
+        for rank in HandRanks:
+            print(
+                default_color + f"{HandRanks.get_name(rank):<20}"
+                f"{result.percentage(result.player_ranks[rank.value]):>9.2f}%"
+                f"{result.opponent_percentage(result.computer_ranks[rank.value]):>13.2f}%"
+            )
+        if result.decisions:
+            print(
+                default_color + f"Decisiones de la computadora: {result.decisions} | "
+                f"se retira {result.folds / result.decisions * 100:.2f}% | "
+                f"{result.decision_samples / result.decisions:,.0f} muestras de media | "
+                f"{result.table_decisions} de la tabla preflop | "
+                f"maximo {result.max_decision_time * 1000:.1f} ms"
+            )
+        print(default_color + f"Manos por segundo: {result.hands_per_second:,.0f} ({result.elapsed:.2f} s)")
+        print(default_color + "=" * 28)
+
+    @staticmethod
+    def print_instrumentation_summary(report):
+        """
+        Prints the timings recorded by the instrumentation in a formatted and colored output.
+
+        Parameters:
+            report (Dict): The result of `Instrumentation.report`.
+
+        Returns:
+            None: This method prints the timings to the console and does not return any value.
+        """
+        default_color = Fore.BLUE
+        print(default_color + "===RESUMEN DE RENDIMIENTO===")
+        print(
+            default_color + f"{'Funcion':<44}{'Llamadas':>9}{'Total ms':>11}{'p50 ms':>9}{'p99 ms':>9}"
+            f"{'Muestras/s':>13}"
+        )
+        functions = sorted(report["functions"].items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for name, stats in functions:
+            rate = f"{stats['samples_per_second']:,.0f}" if stats["samples"] else "-"
+            print(
+                default_color + f"{name:<44}{stats['calls']:>9}{stats['total_ms']:>11.2f}"
+                f"{stats['p50_ms']:>9.3f}{stats['p99_ms']:>9.3f}{rate:>13}"
+            )
+        if "profile" in report:
+            print(default_color + f"Pico de memoria: {report['memory']['peak_kb']:,.0f} KB")
+            for row in report["profile"][:5]:
+                print(default_color + f"  {row['function']}: {row['cumulative_ms']:.2f} ms ({row['calls']} llamadas)")
+        print(default_color + "=" * 28)
@@ -0,0 +1,311 @@
+from itertools import combinations, product
+from utils.hand_evaluator import HandEvaluator, CATEGORY_SHIFT, CARD_BITS, CARD_PRIMES, FLUSH_SCORES, RANK_SCORES
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import instrumented
+
+SUIT_MASKS = tuple(sum(1 << code for code in range(suit, 52, 4)) for suit in range(4))
+
+# Showdown results, ordered so a bigger value is better for the player
+LOSE, TIE, WIN = 0, 1, 2
+
+
+def mask_of(codes):
+    """Return the 64-bit card set holding the card codes."""
+    mask = 0
+    for code in codes:
+        mask |= 1 << code
+    return mask
+
+
+def codes_of(mask):
+    """Return the card codes inside a 64-bit card set, lowest first."""
+    codes = []
+    while mask:
+        low = mask & -mask
+        codes.append(low.bit_length() - 1)
+        mask ^= low
+    return codes
+
+
+def suit_counts(mask):
+    """Return how many cards of each suit a card set holds."""
+    return [bin(mask & suit_mask).count("1") for suit_mask in SUIT_MASKS]
+
+
+class Outs(object):
+    """
+    Unseen cards that change a player's hand on the next street.
+
+    Attributes:
+        current_rank (HandRanks): Rank of the player's best hand with the community cards dealt so far.
+        current_result (int): LOSE, TIE or WIN against the other players' hands as they stand.
+        improving (Dict[HandRanks, List[int]]): Codes of the next cards that raise the player's rank,
+            by the rank they make.
+        better (List[int]): Codes of the next cards that improve the showdown result (a loss becomes
+            a tie or a win, a tie becomes a win).
+        worse (List[int]): Codes of the next cards that make the showdown result worse.
+        unseen (int): Number of cards that can still be dealt.
+        runouts (Dict[HandRanks, int]): On the flop, number of turn and river pairs per final rank.
+        better_runouts (int): On the flop, number of turn and river pairs that improve the showdown result.
+        total_runouts (int): On the flop, number of turn and river pairs, 0 on the turn.
+    """
+
+    def __init__(self, current_rank, current_result, unseen):
+        self.current_rank = current_rank
+        self.current_result = current_result
+        self.unseen = unseen
+        self.improving = {}
+        self.better = []
+        self.worse = []
+        self.runouts = {}
+        self.better_runouts = 0
+        self.total_runouts = 0
+        self._pair_classes = []  # (rank value, result, cards, other cards, grouped), all pairs of a class end alike
+        self._split_suits = [False] * 4  # Suits whose pairs are classes of their own
+
+    @property
+    def num_outs(self):
+        """Number of next cards that raise the player's rank."""
+        return sum(len(codes) for codes in self.improving.values())
+
+    def pairs(self, rank=None, better=False):
+        """
+        Yield the turn and river pairs of the flop, optionally only those ending on a rank
+        or improving the showdown result.
+
+        Yields:
+            Tuple[int, int]: Codes of the two cards.
+        """
+        split_suits = self._split_suits
+        for pair_rank, result, cards, others, grouped in self._pair_classes:
+            if rank is not None and pair_rank != rank.value:
+                continue
+            if better and result <= self.current_result:
+                continue
+            if others is None:
+                yield from combinations(cards, 2)
+            elif not grouped:
+                yield from product(cards, others)
+            else:
+                for card, other in product(cards, others):
+                    if card & 3 != other & 3 or not split_suits[card & 3]:
+                        yield card, other
+
+    def __repr__(self):
+        return "Outs(current_rank={}, outs={}, better={}, unseen={})".format(
+            self.current_rank.name, self.num_outs, len(self.better), self.unseen
+        )
+
+
+class OutsCalculator(object):
+    """
+    Utility class that finds the cards that improve a player's hand on the flop and the turn.
+
+    Card sets are 64-bit masks. Before evaluating anything the unseen cards are
+    grouped by rank, and a suit is only kept apart when some player could still
+    make a flush in it; otherwise every card of a rank plays the same. Each group
+    (or pair of groups, for the turn and river together) is evaluated once.
+    """
+
+    @staticmethod
+    def showdown_result(scores, player_index):
+        """Return LOSE, TIE or WIN for the player against the best of the other scores."""
+        # With everyone else folded the player wins
+        best = max((score for index, score in enumerate(scores) if index != player_index), default=-1)
+        if scores[player_index] > best:
+            return WIN
+        return TIE if scores[player_index] == best else LOSE
+
+    @staticmethod
+    def group_cards(unseen_mask, flush_suits):
+        """
+        Group the unseen cards that play the same for every player.
+
+        Args:
+            unseen_mask (int): Card set of the cards that can still be dealt.
+            flush_suits (List[bool]): Suits where a flush is still possible.
+
+        Returns:
+            List[List[int]]: Card codes of each group, one card per group in the flush suits.
+        """
+        groups = {}
+        for code in codes_of(unseen_mask):
+            key = code if flush_suits[code & 3] else 52 + (code >> 2)
+            groups.setdefault(key, []).append(code)
+        return list(groups.values())
+
+    @staticmethod
+    def outs_for_codes(hands, player_index, board_codes, unseen_mask):
+        """
+        Find the outs of a player on the flop or the turn.
+
+        Args:
+            hands (List[List[int]]): Hole card codes of every player still in the match.
+            player_index (int): Index of the player in `hands`.
+            board_codes (List[int]): Codes of the community cards, 3 or 4 of them.
+            unseen_mask (int): Card set of the cards that can still be dealt.
+
+        Returns:
+            Outs: The improving cards and, on the flop, the turn and river pairs.
+        """
+        # Every hand is folded with the board once, the current scores also build the lookup tables
+        states = [HandEvaluator.board_state(list(board_codes) + list(hand)) for hand in hands]
+        scores = [HandEvaluator.score_with_board(state, ()) for state in states]
+        counts = [suit_counts(mask_of(board_codes) | mask_of(hand)) for hand in hands]
+        current_result = OutsCalculator.showdown_result(scores, player_index)
+        current_rank = scores[player_index] >> CATEGORY_SHIFT
+        outs = Outs(HandRanks(current_rank), current_result, bin(unseen_mask).count("1"))
+        made_flushes = [
+            max((FLUSH_SCORES.get(mask, 0) for mask in suit_masks), default=0) for _, suit_masks in states
+        ]
+        # Every hand is reduced to what the next cards can change: its prime product, and the rank
+        # mask of the suits where it holds three cards or more (the only ones where one or two more
+        # cards can make a flush), None when there is no such suit.
+        # A flush already made with the known cards can only be kept or improved.
+        folded = []
+        for (key, suit_masks), count, made in zip(states, counts, made_flushes):
+            flush_masks = [mask if count[suit] >= 3 else None for suit, mask in enumerate(suit_masks)]
+            folded.append((key, flush_masks if any(mask is not None for mask in flush_masks) else None, made))
+        # The player's hand goes first
+        folded.insert(0, folded.pop(player_index))
+
+        def evaluate(extra):
+            """Return the player's rank and showdown result with the next one or two cards dealt."""
+            first = extra[0]
+            factor = CARD_PRIMES[first]
+            if len(extra) == 1:
+                suit_bits = ((first & 3, CARD_BITS[first]),)
+            else:
+                second = extra[1]
+                factor *= CARD_PRIMES[second]
+                if first & 3 == second & 3:
+                    suit_bits = ((first & 3, CARD_BITS[first] | CARD_BITS[second]),)
+                else:
+                    suit_bits = ((first & 3, CARD_BITS[first]), (second & 3, CARD_BITS[second]))
+            player_score = result = None
+            for key, flush_masks, made in folded:
+                hand_score = 0
+                if flush_masks is not None:
+                    for suit, bits in suit_bits:
+                        mask = flush_masks[suit]
+                        if mask is not None:
+                            hand_score = FLUSH_SCORES.get(mask | bits, 0)
+                            if hand_score:
+                                break
+                hand_score = hand_score or made or RANK_SCORES[key * factor]
+                if player_score is None:
+                    player_score, result = hand_score, WIN
+                elif hand_score > player_score:
+                    # One better hand is enough to lose
+                    return player_score >> CATEGORY_SHIFT, LOSE
+                elif hand_score == player_score:
+                    result = TIE
+            return player_score >> CATEGORY_SHIFT, result
+
+        # One more card can only make a flush in a suit where someone holds four
+        flush_suits = [any(count[suit] >= 4 for count in counts) for suit in range(4)]
+        groups = OutsCalculator.group_cards(unseen_mask, flush_suits)
+        for cards in groups:
+            rank, result = evaluate(cards[:1])
+            if rank > current_rank:
+                outs.improving.setdefault(HandRanks(rank), []).extend(cards)
+            if result > current_result:
+                outs.better.extend(cards)
+            elif result < current_result:
+                outs.worse.extend(cards)
+
+        if len(board_codes) == 3:
+            runouts = [0] * (len(HandRanks) + 1)
+            # Cards of a suit where someone holds four are evaluated one by one, a suit where
+            # the most anyone holds is three only matters when both cards are of that suit
+            split_suits = [
+                not flush_suits[suit] and any(count[suit] == 3 for count in counts) for suit in range(4)
+            ]
+            outs._split_suits = split_suits
+
+            def add_class(pair, weight, cards, other_cards, grouped):
+                rank, result = evaluate(pair)
+                runouts[rank] += weight
+                if result > current_result:
+                    outs.better_runouts += weight
+                outs._pair_classes.append((rank, result, cards, other_cards, grouped))
+
+            # Two cards of groups without a flush suit can only make a flush already made, so those
+            # pairs, most of them, are scored from the prime products alone
+            (player_key, _, player_made), opponents = folded[0], [(key, made) for key, _, made in folded[1:]]
+            pair_classes = outs._pair_classes
+
+            def add_rank_class(factor, weight, cards, other_cards):
+                player_score = player_made or RANK_SCORES[player_key * factor]
+                result = WIN
+                for key, made in opponents:
+                    score = made or RANK_SCORES[key * factor]
+                    if score > player_score:
+                        result = LOSE
+                        break
+                    if score == player_score:
+                        result = TIE
+                rank = player_score >> CATEGORY_SHIFT
+                runouts[rank] += weight
+                if result > current_result:
+                    outs.better_runouts += weight
+                pair_classes.append((rank, result, cards, other_cards, True))
+
+            # Suits of each group that are split, as a 4-bit mask (a group holds one card per suit at most)
+            split_bits = [sum(1 << (code & 3) for code in cards if split_suits[code & 3]) for cards in groups]
+            rank_only = [not flush_suits[cards[0] & 3] for cards in groups]
+            primes = [CARD_PRIMES[cards[0]] for cards in groups]
+            for first, cards in enumerate(groups):
+                if len(cards) > 1:
+                    # Cards of the same rank never share a suit
+                    add_rank_class(primes[first] ** 2, len(cards) * (len(cards) - 1) // 2, cards, None)
+                for second in range(first + 1, len(groups)):
+                    other_cards = groups[second]
+                    shared = split_bits[first] & split_bits[second]
+                    weight = len(cards) * len(other_cards)
+                    if shared:
+                        weight -= bin(shared).count("1")
+                        if not weight:
+                            continue
+                    if rank_only[first] and rank_only[second]:
+                        add_rank_class(primes[first] * primes[second], weight, cards, other_cards)
+                        continue
+                    pair = (cards[0], other_cards[0])
+                    if shared >> (pair[0] & 3) & 1 and pair[0] & 3 == pair[1] & 3:
+                        pair = next(
+                            (card, other) for card in cards for other in other_cards
+                            if card & 3 != other & 3 or not split_suits[card & 3]
+                        )
+                    add_class(pair, weight, cards, other_cards, True)
+            for suit in range(4):
+                if split_suits[suit]:
+                    for pair in combinations(codes_of(unseen_mask & SUIT_MASKS[suit]), 2):
+                        add_class(pair, 1, pair[:1], pair[1:], False)
+            outs.runouts = {HandRanks(rank): count for rank, count in enumerate(runouts) if count}
+            outs.total_runouts = sum(runouts)
+        return outs
+
+    @staticmethod
+    @instrumented("OutsCalculator.calculate_outs")
+    def calculate_outs(match, player_index):
+        """
+        Find the outs of a player in a match, on the flop or the turn.
+
+        Args:
+            match (Match): The match, the other players' hole cards are known to the player.
+            player_index (int): Index of the player in the match.
+
+        Returns:
+            Outs: The improving cards and, on the flop, the turn and river pairs.
+
+        Raises:
+            ValueError: If the match is not on the flop or the turn.
+        """
+        board_codes = [card.code for card in match.get_community_cards()]
+        if len(board_codes) not in (3, 4):
+            raise ValueError("Los outs solo se calculan en el flop y en el turn.")
+        # Folded players cannot win the pot, their hole cards are only out of play
+        active = [index for index in range(len(match.players)) if index == player_index or index not in match.folded]
+        hands = [[card.code for card in match.players[index].hand] for index in active]
+        unseen_mask = mask_of(match.deck.remaining_codes())
+        return OutsCalculator.outs_for_codes(hands, active.index(player_index), board_codes, unseen_mask)
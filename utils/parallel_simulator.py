@@ -0,0 +1,96 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from utils.instrumentation import instrumented
+
+
+def _python_rng(seed_sequence):
+    """Build a `random.Random` seeded from a spawned SeedSequence."""
+    return random.Random(int.from_bytes(seed_sequence.generate_state(4).tobytes(), "little"))
+
+
+def _count_ranks_worker(known_codes, remaining_codes, needed_cards, samples, backend, seed_sequence):
+    """Run one worker's share of the samples and return its counts per hand rank."""
+    if backend == "numpy":
+        from utils.batch_simulator import BatchSimulator
+        rng = np.random.default_rng(seed_sequence)
+        counts, _ = BatchSimulator.count_ranks(known_codes, remaining_codes, needed_cards, samples, rng)
+        return counts
+
+    from utils.probability_calculator import ProbabilityCalculator
+    rng = _python_rng(seed_sequence)
+    runouts = (tuple(rng.sample(remaining_codes, needed_cards)) for _ in range(samples))
+    counts, _ = ProbabilityCalculator.count_ranks(known_codes, runouts)
+    return counts
+
+
+class ParallelSimulator(object):
+    """
+    Utility class that splits a sample budget across a pool of worker processes.
+
+    Every worker gets its own generator spawned from a single SeedSequence,
+    so a given seed and worker count always produce the same result.
+    """
+
+    @staticmethod
+    def default_workers():
+        """Number of workers used when none is given, one per available core."""
+        return os.cpu_count() or 1
+
+    @staticmethod
+    def split(total, workers):
+        """Split a number of samples into `workers` shares that differ by one at most."""
+        share, extra = divmod(total, workers)
+        return [share + 1 if i < extra else share for i in range(workers)]
+
+    @staticmethod
+    def spawn(seed, workers):
+        """Return one independent SeedSequence per worker."""
+        return np.random.SeedSequence(seed).spawn(workers)
+
+    @staticmethod
+    def run(function, shares, seed, workers):
+        """
+        Call `function(*share, seed_sequence)` for every share and return the results in order.
+        A single worker runs in the current process.
+        """
+        seeds = ParallelSimulator.spawn(seed, len(shares))
+        if workers == 1:
+            return [function(*share, seed_sequence) for share, seed_sequence in zip(shares, seeds)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(function, *share, seed_sequence)
+                for share, seed_sequence in zip(shares, seeds)
+            ]
+            return [future.result() for future in futures]
+
+    @staticmethod
+    @instrumented("ParallelSimulator.count_ranks", samples=lambda result: result[1])
+    def count_ranks(known_codes, remaining_codes, needed_cards, samples, workers=None, seed=None, backend="python"):
+        """
+        Sample runouts across worker processes and merge their counts per hand rank.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt.
+            samples (int): Total number of runouts to draw.
+            workers (int): Number of worker processes, 0 or None uses one per core.
+            seed (int): Root seed, None draws fresh entropy.
+            backend (str): Engine used inside each worker, "python" or "numpy".
+
+        Returns:
+            Tuple[List[int], int]: Count per HandRanks value (indexed by the enum value) and number of runouts.
+        """
+        workers = workers or ParallelSimulator.default_workers()
+        known_codes = tuple(known_codes)
+        remaining_codes = list(remaining_codes)
+        shares = [
+            (known_codes, remaining_codes, needed_cards, share, backend)
+            for share in ParallelSimulator.split(samples, workers)
+        ]
+        results = ParallelSimulator.run(_count_ranks_worker, shares, seed, workers)
+        # Merge the counts of every worker
+        counts = [sum(column) for column in zip(*results)]
+        return counts, samples
@@ -0,0 +1,137 @@
+import argparse
+import mmap
+import os
+import struct
+from utils.hand_rankings import HandRanks
+
+NUM_RANKS = 13
+NUM_CLASSES = NUM_RANKS * NUM_RANKS  # 13 pairs, 78 suited and 78 offsuit hands
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preflop_table.bin")
+
+# File layout: a header followed by one fixed-size record per starting hand class
+HEADER = struct.Struct("<4sII")  # magic, samples per class, number of classes
+MAGIC = b"PFT1"
+# Count per HandRanks value, followed by wins, ties and losses against a random hand
+RECORD = struct.Struct("<" + "I" * (len(HandRanks) + 3))
+
+
+def class_index(first_code, second_code):
+    """
+    Return the starting hand class (0-168) of two hole card codes.
+    Pairs sit on the diagonal of a 13x13 grid, suited hands above it and offsuit hands below it.
+    """
+    high, low = max(first_code >> 2, second_code >> 2), min(first_code >> 2, second_code >> 2)
+    if (first_code & 3) == (second_code & 3):
+        return high * NUM_RANKS + low
+    return low * NUM_RANKS + high
+
+
+def class_cards(index):
+    """Return two hole card codes that belong to a starting hand class."""
+    row, column = divmod(index, NUM_RANKS)
+    if row > column:
+        # Suited, both cards share the first suit
+        return row * 4, column * 4
+    return row * 4, column * 4 + 1
+
+
+def class_name(index):
+    """Return the usual name of a starting hand class, like 'AKs', 'T9o' or '77'."""
+    symbols = "23456789TJQKA"
+    row, column = divmod(index, NUM_RANKS)
+    if row == column:
+        return symbols[row] * 2
+    if row > column:
+        return symbols[row] + symbols[column] + "s"
+    return symbols[column] + symbols[row] + "o"
+
+
+class PreflopTable(object):
+    """
+    Precomputed hand rank distribution and heads-up equity of every starting hand class.
+    The file is memory-mapped the first time it is needed, so a lookup only reads 52 bytes.
+    """
+
+    _table = None
+    _samples = 0
+
+    @staticmethod
+    def load(path=TABLE_PATH):
+        """
+        Memory-map the table file.
+
+        Returns:
+            bool: True if the table is available.
+        """
+        if PreflopTable._table is not None:
+            return True
+        if not os.path.exists(path):
+            return False
+        with open(path, "rb") as table_file:
+            table = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, samples, classes = HEADER.unpack_from(table, 0)
+        if magic != MAGIC or classes != NUM_CLASSES:
+            table.close()
+            return False
+        PreflopTable._table = table
+        PreflopTable._samples = samples
+        return True
+
+    @staticmethod
+    def lookup(first_code, second_code):
+        """
+        Return the stored record of some hole cards.
+
+        Returns:
+            Tuple[List[int], Tuple[int, int, int], int]: Count per HandRanks value (indexed by the
+            enum value), wins/ties/losses against a random hand and samples per class.
+            None if the table is not available.
+        """
+        if not PreflopTable.load():
+            return None
+        offset = HEADER.size + class_index(first_code, second_code) * RECORD.size
+        record = RECORD.unpack_from(PreflopTable._table, offset)
+        rank_counts = [0] + list(record[:len(HandRanks)])
+        return rank_counts, record[len(HandRanks):], PreflopTable._samples
+
+    @staticmethod
+    def build(path=TABLE_PATH, samples=50000, seed=0, backend="python"):
+        """
+        Simulate every starting hand class and write the table file.
+
+        Args:
+            path (str): Where the table is written.
+            samples (int): Runouts simulated per class, for both the ranks and the equity.
+            seed (int): Seed that makes the table reproducible.
+            backend (str): Engine used for the hand rank distribution, "python" or "numpy".
+        """
+        import random
+        from utils.equity_calculator import EquityCalculator
+        from utils.probability_calculator import ProbabilityCalculator
+
+        random.seed(seed)
+        with open(path, "wb") as table_file:
+            table_file.write(HEADER.pack(MAGIC, samples, NUM_CLASSES))
+            for index in range(NUM_CLASSES):
+                hole_codes = class_cards(index)
+                unseen_codes = [code for code in range(52) if code not in hole_codes]
+                counts, _ = ProbabilityCalculator.sample_ranks(
+                    hole_codes, unseen_codes, 5, samples, backend, 1, (seed, index)
+                )
+                equity = EquityCalculator.hand_equity(hole_codes, (), unseen_codes, work_budget=0, samples=samples)
+                table_file.write(RECORD.pack(*counts[1:], equity.wins, equity.ties, equity.losses))
+                print(f"{class_name(index)}: {equity}")
+        # A rebuilt table replaces the one already mapped
+        if PreflopTable._table is not None:
+            PreflopTable._table.close()
+            PreflopTable._table = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the preflop starting hand table.")
+    parser.add_argument("--samples", type=int, default=50000, help="runouts simulated per starting hand class")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=("python", "numpy"), default="python")
+    parser.add_argument("--output", default=TABLE_PATH)
+    arguments = parser.parse_args()
+    PreflopTable.build(arguments.output, arguments.samples, arguments.seed, arguments.backend)
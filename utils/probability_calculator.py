@@ -1,77 +1,498 @@
+import os
 import random
-import matplotlib.pyplot as plt
-from utils.hand_analyzer import HandAnalyzer
+import time
+from itertools import combinations
+from math import comb
+from utils.hand_distribution import HandDistribution
+from utils.hand_evaluator import HandEvaluator, CATEGORY_SHIFT
 from utils.hand_rankings import HandRanks
+from utils.instrumentation import instrumented
+from utils.preflop_table import PreflopTable
+from utils.probability_tree import ProbabilityTree
+from utils.query_cache import QueryCache, canonical_key
+from utils.runout_samplers import SAMPLERS, RunoutSampler
+
+ALL_CODES = frozenset(range(52))
 
 class ProbabilityCalculator:
 
     stages = ["Hole Cards", "Flop", "Turn", "River"]
-    probabilties = []
 
     SAMPLE_SIZE = 10000  # Define a fixed number of samples for simulation
+    # Runouts are enumerated exactly when there are no more than this many of them,
+    # otherwise (usually only preflop) the probability is estimated by sampling
+    EXACT_WORK_BUDGET = 50000
+    # Engine used for sampled runouts: "python" or "numpy" (vectorized batches)
+    BACKEND = "python"
+    BACKENDS = ("python", "numpy")
+    # Worker processes used for sampled runouts, 0 means one per core
+    WORKERS = 1
+    # Strategy that draws sampled runouts, one of runout_samplers.SAMPLERS. Anything but "random"
+    # runs in this process with the Python evaluator, "suit_symmetric" needs the fewest samples
+    SAMPLER = "random"
+    # Preflop distributions are read from the precomputed table when it is available
+    USE_PREFLOP_TABLE = True
+    # On the flop, turn and river outcomes are evaluated once per hand and kept in the match
+    USE_PROBABILITY_TREE = True
+    # Results shared between matches, keyed by the query up to suit relabeling
+    CACHE = QueryCache(maxsize=4096)
+    # How show_graph draws the chart: "window" opens a matplotlib window that blocks until
+    # it is closed, "file" renders it in the background to CHART_PATH and "off" skips it
+    CHART_MODE = os.environ.get("PROBABILITY_CHART_MODE", "window")
+    CHART_MODES = ("file", "window", "off")
+    CHART_PATH = "probability_tree.png"
+    _chart_executor = None  # Single background thread that renders the chart files in order
+    # Adaptive sampling draws batches of this size, up to a hard limit of samples
+    ADAPTIVE_BATCH_SIZE = 2000
+    MAX_ADAPTIVE_SAMPLES = 2000000
+
+    @staticmethod
+    def get_runouts(remaining_codes, needed_cards, work_budget=None, samples=None):
+        """
+        Choose between exact enumeration and random sampling of the missing community cards.
+
+        Args:
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt.
+            work_budget (int): Maximum number of runouts to enumerate exactly,
+                               defaults to `EXACT_WORK_BUDGET`.
+            samples (int): Number of runouts to sample otherwise, defaults to `SAMPLE_SIZE`.
+
+        Returns:
+            Tuple[Iterable[Tuple[int]], bool]: The runouts to evaluate and whether they are exhaustive.
+        """
+        if work_budget is None:
+            work_budget = ProbabilityCalculator.EXACT_WORK_BUDGET
+        if samples is None:
+            samples = ProbabilityCalculator.SAMPLE_SIZE
+        if comb(len(remaining_codes), needed_cards) <= work_budget:
+            return combinations(remaining_codes, needed_cards), True
+        runouts = (
+            tuple(random.sample(remaining_codes, needed_cards))
+            for _ in range(samples)
+        )
+        return runouts, False
+
+    @staticmethod
+    @instrumented("ProbabilityCalculator.count_ranks", samples=lambda result: result[1])
+    def count_ranks(known_codes, runouts):
+        """
+        Count how many runouts end in each hand rank.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            runouts (Iterable[Tuple[int]]): Codes of the missing community cards for each runout.
+
+        Returns:
+            Tuple[List[int], int]: Count per HandRanks value (indexed by the enum value) and number of runouts.
+        """
+        counts = [0] * (len(HandRanks) + 1)
+        total = 0
+        score_codes = HandEvaluator.score_codes
+        for runout in runouts:
+            counts[score_codes(known_codes + runout) >> CATEGORY_SHIFT] += 1
+            total += 1
+        return counts, total
+
+    @staticmethod
+    def sample_ranks(known_codes, remaining_codes, needed_cards, samples, backend, workers, seed=None,
+                     sampler="random"):
+        """
+        Count the hand ranks of randomly sampled runouts with the chosen engine.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt.
+            samples (int): Number of runouts to draw.
+            backend (str): "python" or "numpy".
+            workers (int): Worker processes, 0 means one per core.
+            seed (int): Seed that makes the result reproducible for a given worker count.
+            sampler (str): One of `SAMPLERS`, the backend and the workers only apply to "random".
+
+        Returns:
+            Tuple[List[int], int]: Count per HandRanks value (indexed by the enum value) and number of runouts.
+        """
+        if sampler != "random":
+            return RunoutSampler.count_ranks(known_codes, remaining_codes, needed_cards, samples, sampler, seed)
+        if workers != 1 or seed is not None:
+            # Split the samples across processes, each one with its own spawned seed
+            from utils.parallel_simulator import ParallelSimulator
+            return ParallelSimulator.count_ranks(
+                known_codes, remaining_codes, needed_cards, samples, workers, seed, backend
+            )
+        if backend == "numpy":
+            # NumPy is only needed when this backend is used
+            from utils.batch_simulator import BatchSimulator
+            return BatchSimulator.count_ranks(known_codes, remaining_codes, needed_cards, samples)
+        runouts, _ = ProbabilityCalculator.get_runouts(remaining_codes, needed_cards, 0, samples)
+        return ProbabilityCalculator.count_ranks(known_codes, runouts)
+
+    @staticmethod
+    def get_query_codes(match, player_index):
+        """
+        Return the codes of the known cards, the codes of the cards that
+        can still be dealt and the number of community cards missing.
+        The other players' hole cards are not known to the player, so they
+        count as cards that can still be dealt, like in `EquityCalculator.calculate_equity`.
+        """
+        known_cards = match.get_full_hand(player_index)  # Player's hand + community cards
+        # Work with integer card codes so each sample is a single table lookup
+        known_codes = tuple(card.code for card in known_cards)
+        remaining_codes = sorted(ALL_CODES.difference(known_codes))
+        needed_cards = 5 - len(match.get_community_cards())  # Number of community cards yet to be dealt
+        return known_codes, remaining_codes, needed_cards
+
+    @staticmethod
+    def get_memo_key(match, player_index, work_budget, backend, workers, seed, samples, sampler):
+        """
+        Return the key of a distribution in `match.rank_distributions`. Besides the player and the
+        street it holds every option of the calculation, so a query with another seed, sample size
+        or sampler is calculated again instead of returning the first result.
+        """
+        options = (work_budget, backend, workers, seed, samples, sampler)
+        return player_index, len(match.get_community_cards()), options
+
+    @staticmethod
+    def get_probability_tree(match, player_index, known_codes, remaining_codes, needed_cards, work_budget):
+        """
+        Return the player's probability tree for the current flop, building it on the flop.
+
+        Building the tree costs the same as enumerating the flop runouts, so it is only
+        built on the flop and when those runouts fit in the work budget. On the turn and
+        the river a tree built on the flop is reused, but none is built: enumerating the
+        46 or 1 runouts left is much cheaper than evaluating every turn and river pair.
+
+        Args:
+            match (Match): The current Match instance.
+            player_index (int): Index of the player the tree belongs to.
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt, 2 or less.
+            work_budget (int): Maximum number of runouts to enumerate exactly.
+
+        Returns:
+            ProbabilityTree: Hand rank of every turn and river under the flop, None if there is none.
+        """
+        tree = match.probability_trees.get(player_index)
+        if tree is not None and tree.matches(known_codes, remaining_codes):
+            return tree
+        if needed_cards == 2 and comb(len(remaining_codes), 2) <= work_budget:
+            tree = ProbabilityTree.build(known_codes, remaining_codes)
+            match.probability_trees[player_index] = tree
+            return tree
+        return None
 
     @staticmethod
-    def calculate_probability(match, player_index, target_hand_rank):
+    @instrumented("ProbabilityCalculator.calculate_distribution")
+    def calculate_distribution(match, player_index, work_budget=None, backend=None, workers=None, seed=None,
+                               samples=None, sampler=None):
+        """
+        Calculate the probability of every hand rank in a single pass.
+        The result is cached in the match for the current stage and the
+        options it was calculated with (see `get_memo_key`), so asking again
+        for another target rank does not simulate anything.
+        The flop distribution builds the match's probability tree, which
+        evaluates each turn and river once, and the turn and river are then
+        read from it (see `get_probability_tree`).
+        Unseeded results are also kept in `CACHE` under a suit-isomorphic
+        key, so the same spot in another match (or with suits relabeled)
+        is answered without evaluating anything.
+
+        Args:
+            match (Match): The current Match instance.
+            player_index (int): Index of the player for whom the probabilities are calculated.
+            work_budget (int): Maximum number of runouts to enumerate exactly,
+                               defaults to `EXACT_WORK_BUDGET`.
+            backend (str): Engine used when the runouts are sampled, defaults to `BACKEND`.
+            workers (int): Worker processes used when the runouts are sampled, defaults to `WORKERS`.
+            seed (int): Seed that makes sampled results reproducible for a given worker count.
+            samples (int): Number of runouts drawn when they are sampled, defaults to `SAMPLE_SIZE`.
+            sampler (str): Strategy that draws the sampled runouts, defaults to `SAMPLER`.
+
+        Returns:
+            HandDistribution: Counts of every hand rank over the evaluated runouts.
+
+        Raises:
+            ValueError: If the backend is not one of `BACKENDS` or the sampler one of `SAMPLERS`.
+        """
+        if backend is None:
+            backend = ProbabilityCalculator.BACKEND
+        if backend not in ProbabilityCalculator.BACKENDS:
+            raise ValueError(f"Backend no valido, debe ser uno de {ProbabilityCalculator.BACKENDS}.")
+        if sampler is None:
+            sampler = ProbabilityCalculator.SAMPLER
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Muestreo no valido, debe ser uno de {SAMPLERS}.")
+        if workers is None:
+            workers = ProbabilityCalculator.WORKERS
+        if samples is None:
+            samples = ProbabilityCalculator.SAMPLE_SIZE
+        if work_budget is None:
+            work_budget = ProbabilityCalculator.EXACT_WORK_BUDGET
+
+        key = ProbabilityCalculator.get_memo_key(match, player_index, work_budget, backend, workers, seed,
+                                                 samples, sampler)
+        if key in match.rank_distributions:
+            return match.rank_distributions[key]
+
+        known_codes, remaining_codes, needed_cards = ProbabilityCalculator.get_query_codes(match, player_index)
+        if needed_cards <= 2 and ProbabilityCalculator.USE_PROBABILITY_TREE:
+            tree = ProbabilityCalculator.get_probability_tree(match, player_index, known_codes, remaining_codes,
+                                                              needed_cards, work_budget)
+            if tree is not None:
+                distribution = tree.distribution(*known_codes[len(tree.known_codes):])
+                match.rank_distributions[key] = distribution
+                return distribution
+
+        distribution = ProbabilityCalculator.distribution_for_codes(
+            known_codes, remaining_codes, needed_cards, work_budget, backend, workers, seed, samples, sampler
+        )
+        match.rank_distributions[key] = distribution
+        return distribution
+
+    @staticmethod
+    def distribution_for_codes(known_codes, remaining_codes, needed_cards, work_budget=None, backend=None,
+                               workers=None, seed=None, samples=None, sampler=None):
+        """
+        Calculate the probability of every hand rank from card codes, without a match.
+        Preflop queries without dead cards are read from the precomputed table when it
+        is available and unseeded results are kept in `CACHE`.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt.
+            work_budget (int): Maximum number of runouts to enumerate exactly,
+                               defaults to `EXACT_WORK_BUDGET`.
+            backend (str): Engine used when the runouts are sampled, defaults to `BACKEND`.
+            workers (int): Worker processes used when the runouts are sampled, defaults to `WORKERS`.
+            seed (int): Seed that makes sampled results reproducible for a given worker count.
+            samples (int): Number of runouts drawn when they are sampled, defaults to `SAMPLE_SIZE`.
+            sampler (str): Strategy that draws the sampled runouts, defaults to `SAMPLER`.
+
+        Returns:
+            HandDistribution: Counts of every hand rank over the evaluated runouts.
+        """
+        if work_budget is None:
+            work_budget = ProbabilityCalculator.EXACT_WORK_BUDGET
+        if backend is None:
+            backend = ProbabilityCalculator.BACKEND
+        if workers is None:
+            workers = ProbabilityCalculator.WORKERS
+        if samples is None:
+            samples = ProbabilityCalculator.SAMPLE_SIZE
+        if sampler is None:
+            sampler = ProbabilityCalculator.SAMPLER
+        known_codes = tuple(known_codes)
+        # The table assumes every other card can still be dealt, so it needs no dead cards
+        if (needed_cards == 5 and len(known_codes) + len(remaining_codes) == 52
+                and ProbabilityCalculator.USE_PREFLOP_TABLE):
+            record = PreflopTable.lookup(*known_codes)
+            if record is not None:
+                rank_counts, _, table_samples = record
+                return HandDistribution(rank_counts, table_samples, False)
+
+        # Cards that are neither known nor dealable, like an opponent's hole cards the player saw
+        dead_codes = ALL_CODES.difference(known_codes, remaining_codes)
+        exact = needed_cards <= 0 or comb(len(remaining_codes), needed_cards) <= work_budget
+        # Exact results are the same however they are asked for, sampled ones are
+        # only shared between queries that sample the same way
+        sampling = None if exact else (samples, backend, sampler)
+        cache_key = ("ranks", needed_cards, sampling, canonical_key(known_codes, dead_codes))
+        if seed is None:
+            distribution = ProbabilityCalculator.CACHE.get(cache_key)
+            if distribution is not None:
+                return distribution
+
+        if exact:
+            # With no cards needed the current hand is evaluated directly
+            runouts = combinations(remaining_codes, needed_cards) if needed_cards > 0 else [()]
+            counts, total = ProbabilityCalculator.count_ranks(known_codes, runouts)
+        else:
+            counts, total = ProbabilityCalculator.sample_ranks(
+                known_codes, remaining_codes, needed_cards, samples, backend, workers, seed, sampler
+            )
+
+        distribution = HandDistribution(counts, total, exact)
+        if seed is None:
+            ProbabilityCalculator.CACHE.put(cache_key, distribution)
+        return distribution
+
+    @staticmethod
+    def refine_distribution(match, player_index, target_hand_rank, precision=None, confidence=0.95,
+                            time_budget=None, backend=None, workers=None, seed=None, sampler=None):
+        """
+        Keep sampling in batches until the confidence interval of the target rank
+        is tight enough or the time budget runs out. The cached distribution of
+        the current stage is replaced by the refined one, so later queries reuse the samples.
+
+        Args:
+            match (Match): The current Match instance.
+            player_index (int): Index of the player for whom the probability is calculated.
+            target_hand_rank (HandRanks): The hand rank whose interval is checked.
+            precision (float): Wanted half width of the interval, in percentage points.
+            confidence (float): Confidence level of the interval.
+            time_budget (float): Maximum number of seconds to spend sampling.
+            backend (str): Engine used to sample, defaults to `BACKEND`.
+            workers (int): Worker processes used to sample, defaults to `WORKERS`.
+            seed (int): Seed that makes the result reproducible for a given worker count.
+            sampler (str): Strategy that draws the sampled runouts, defaults to `SAMPLER`.
+
+        Returns:
+            HandDistribution: The refined distribution.
+        """
+        started = time.perf_counter()
+        batch_size = ProbabilityCalculator.ADAPTIVE_BATCH_SIZE
+        work_budget = ProbabilityCalculator.EXACT_WORK_BUDGET
+        if backend is None:
+            backend = ProbabilityCalculator.BACKEND
+        if workers is None:
+            workers = ProbabilityCalculator.WORKERS
+        if sampler is None:
+            sampler = ProbabilityCalculator.SAMPLER
+        distribution = ProbabilityCalculator.calculate_distribution(
+            match, player_index, work_budget, backend, workers, seed, batch_size, sampler
+        )
+        if not distribution.exact:
+            key = ProbabilityCalculator.get_memo_key(match, player_index, work_budget, backend, workers, seed,
+                                                     batch_size, sampler)
+            # The cached result may be shared with other queries, the new samples go to a copy
+            distribution = distribution.copy()
+            match.rank_distributions[key] = distribution
+        known_codes, remaining_codes, needed_cards = ProbabilityCalculator.get_query_codes(match, player_index)
+
+        # A distribution refined before already holds some batches, the next one continues after them
+        batch = distribution.total // batch_size - 1
+        while not distribution.exact and distribution.total < ProbabilityCalculator.MAX_ADAPTIVE_SAMPLES:
+            if precision is not None:
+                if distribution.estimate(target_hand_rank, confidence).half_width <= precision:
+                    break
+            if time_budget is not None and time.perf_counter() - started >= time_budget:
+                break
+            batch += 1
+            # Every batch needs its own seed, otherwise it would repeat the first one
+            batch_seed = None if seed is None else (seed, batch)
+            counts, total = ProbabilityCalculator.sample_ranks(
+                known_codes, remaining_codes, needed_cards, batch_size, backend, workers, batch_seed, sampler
+            )
+            distribution.add(counts, total)
+        return distribution
+
+    @staticmethod
+    @instrumented("ProbabilityCalculator.calculate_probability")
+    def calculate_probability(match, player_index, target_hand_rank, work_budget=None, backend=None,
+                              workers=None, seed=None, precision=None, confidence=0.95, time_budget=None,
+                              sampler=None):
         """
         Calculate the probability of getting a specific hand rank.
+        Every possible runout is evaluated when they fit in the work budget,
+        so the result is exact on the flop and the turn. When a precision or
+        a time budget is given, sampled results are refined adaptively.
 
         Args:
             match (Match): The current Match instance.
             player_index (int): Index of the player for whom the probability is calculated.
             target_hand_rank (HandRanks): The desired hand rank to calculate probability for.
+            work_budget (int): Maximum number of runouts to enumerate exactly,
+                               defaults to `EXACT_WORK_BUDGET`.
+            backend (str): Engine used when the runouts are sampled, defaults to `BACKEND`.
+            workers (int): Worker processes used when the runouts are sampled, defaults to `WORKERS`.
+            seed (int): Seed that makes sampled results reproducible for a given worker count.
+            precision (float): Stop sampling once the interval half width (in percentage points) is this small.
+            confidence (float): Confidence level of the returned interval.
+            time_budget (float): Stop sampling after this many seconds.
+            sampler (str): Strategy that draws the sampled runouts, defaults to `SAMPLER`.
 
         Returns:
-            float: Probability (as a percentage) of achieving the target hand rank.
+            ProbabilityEstimate: Probability (as a percentage) of achieving the target hand rank,
+                                 a float that also carries its confidence interval and sample count.
         """
-        deck = match.deck  # Use the existing deck from the match
-        known_cards = match.get_full_hand(player_index)  # Player's hand + community cards
-        remaining_deck = [card for card in deck.cards if card not in known_cards]
-
-        community_cards = match.get_community_cards()
-        needed_cards = 5 - len(community_cards)  # Number of community cards yet to be dealt
-        target_hands_count = 0
-        total_samples = 0
-
-        if needed_cards <= 0:
-            # No cards needed, evaluate the current hand directly
-            _, hand_rank = HandAnalyzer.best_hand(known_cards)
-            return 100.0 if hand_rank == target_hand_rank else 0.0
-
-        # Sample combinations randomly
-        for _ in range(ProbabilityCalculator.SAMPLE_SIZE):
-            sampled_cards = random.sample(remaining_deck, needed_cards)
-            full_hand = known_cards + sampled_cards
-
-            _, hand_rank = HandAnalyzer.best_hand(full_hand)
-            total_samples += 1
-            if hand_rank == target_hand_rank:
-                target_hands_count += 1
-
-        # Calculate probability
-        probability = (
-          float((target_hands_count / total_samples) * 100 if total_samples > 0 else 0
-        ))
-        return probability
+        if precision is not None or time_budget is not None:
+            distribution = ProbabilityCalculator.refine_distribution(
+                match, player_index, target_hand_rank, precision, confidence, time_budget, backend, workers, seed,
+                sampler
+            )
+        else:
+            distribution = ProbabilityCalculator.calculate_distribution(
+                match, player_index, work_budget, backend, workers, seed, sampler=sampler
+            )
+        return distribution.estimate(target_hand_rank, confidence)
 
     @staticmethod
-    def show_graph(probabilities):
+    def draw_graph(axes, probabilities):
         """
-        Show the graph based on the provided probabilities at each stage.
+        Draw the probabilities at each stage on matplotlib axes.
         This will handle up to 4 stages (Hole Cards, Flop, Turn, River).
         """
         stages = ['Hole Cards', 'Flop', 'Turn', 'River']  # Game stages
-        plt.figure(figsize=(10, 6))
 
         # Ensure we only plot the number of stages matching the number of probabilities
         for i, prob in enumerate(probabilities):
-            plt.plot([i, i], [0, prob], label=f'{stages[i]}', marker='o')
+            axes.plot([i, i], [0, prob], label=f'{stages[i]}', marker='o')
 
-        plt.xlabel('Game Stages')
-        plt.ylabel('Probability (%)')
-        plt.title('Conditional Probability Tree')
-        plt.grid(True)
-        plt.legend()
-        plt.show()
+        axes.set_xlabel('Game Stages')
+        axes.set_ylabel('Probability (%)')
+        axes.set_title('Conditional Probability Tree')
+        axes.grid(True)
+        axes.legend()
+
+    @staticmethod
+    def render_graph(probabilities, path):
+        """
+        Render the graph to an image file with the Agg canvas, without pyplot,
+        so it can run outside of the main thread.
+
+        Returns:
+            str: The path of the image.
+        """
+        # matplotlib is only imported once a chart is actually drawn
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(figure)
+        ProbabilityCalculator.draw_graph(figure.add_subplot(), probabilities)
+        figure.savefig(path)
+        return path
+
+    @staticmethod
+    @instrumented("ProbabilityCalculator.show_graph")
+    def show_graph(probabilities, mode=None, path=None):
+        """
+        Show the graph based on the provided probabilities at each stage.
+
+        Args:
+            probabilities (List[float]): Probability (as a percentage) at each stage.
+            mode (str): One of `CHART_MODES`, defaults to `CHART_MODE`.
+            path (str): Image file written in "file" mode, defaults to `CHART_PATH`.
+
+        Returns:
+            Future: In "file" mode, the pending render that resolves to the image path, otherwise None.
+
+        Raises:
+            ValueError: If the mode is not one of `CHART_MODES`.
+        """
+        if mode is None:
+            mode = ProbabilityCalculator.CHART_MODE
+        if mode not in ProbabilityCalculator.CHART_MODES:
+            raise ValueError(f"Modo de grafico no valido, debe ser uno de {ProbabilityCalculator.CHART_MODES}.")
+        if mode == "off":
+            return None
+        if mode == "window":
+            import matplotlib.pyplot as plt
+            plt.figure(figsize=(10, 6))
+            ProbabilityCalculator.draw_graph(plt.gca(), probabilities)
+            plt.show()
+            return None
+
+        # The game goes on while the chart is rendered in the background
+        if ProbabilityCalculator._chart_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            ProbabilityCalculator._chart_executor = ThreadPoolExecutor(max_workers=1)
+        return ProbabilityCalculator._chart_executor.submit(
+            ProbabilityCalculator.render_graph, list(probabilities), path or ProbabilityCalculator.CHART_PATH
+        )
 
     @staticmethod
     def menu(match, player_index):
@@ -82,9 +503,14 @@ class ProbabilityCalculator:
             match (Match): The current Match instance.
             player_index (int): Index of the player for whom the probability is calculated.
         """
+        distribution = ProbabilityCalculator.calculate_distribution(match, player_index)
+
         print("\n--- Calculate Probabilities ---")
         for rank in HandRanks:
-            print(f"{rank.value}. {HandRanks.get_name(rank)}")
+            print(
+                f"{rank.value}. {HandRanks.get_name(rank)}: "
+                f"{distribution.probability(rank):.4f}% (or better: {distribution.at_least(rank):.4f}%)"
+            )
 
         while True:
             try:
@@ -94,11 +520,22 @@ class ProbabilityCalculator:
             except (ValueError, KeyError):
                 print("Please enter a valid option.")
 
-        # Calculate probability for Hole Cards
-        probability = ProbabilityCalculator.calculate_probability(match, player_index, target_hand_rank)
-        print(f"\nProbability of getting {HandRanks.get_name(target_hand_rank)}: {probability:.7f}%")
-        
-        # Add the probability for Hole Cards to the list
-        ProbabilityCalculator.probabilties.append(probability)
-        ProbabilityCalculator.show_graph(ProbabilityCalculator.probabilties)
-        
\ No newline at end of file
+        probability = distribution.estimate(target_hand_rank)
+        if distribution.exact:
+            print(f"\nProbability of getting {HandRanks.get_name(target_hand_rank)}: {probability:.7f}%")
+        else:
+            print(
+                f"\nProbability of getting {HandRanks.get_name(target_hand_rank)}: {probability:.7f}% "
+                f"(95% CI {probability.lower:.4f}% - {probability.upper:.4f}%, {probability.samples} samples)"
+            )
+
+        # Every stage reads the chosen rank from its cached distribution, the last one calculated
+        stage_distributions = {}
+        for (index, street, _), dist in match.rank_distributions.items():
+            if index == player_index:
+                stage_distributions[street] = dist
+        probabilities = [
+            stage_distributions[street].probability(target_hand_rank) for street in sorted(stage_distributions)
+        ]
+        if ProbabilityCalculator.show_graph(probabilities) is not None:
+            print(f"The chart is being saved to {ProbabilityCalculator.CHART_PATH}")
@@ -0,0 +1,55 @@
+from math import sqrt
+from statistics import NormalDist
+
+
+def wilson_interval(hits, samples, confidence=0.95):
+    """
+    Wilson score interval of a binomial proportion.
+
+    Args:
+        hits (int): Number of samples where the event happened.
+        samples (int): Total number of samples.
+        confidence (float): Confidence level of the interval, between 0 and 1.
+
+    Returns:
+        Tuple[float, float]: Lower and upper bounds, as fractions between 0 and 1.
+    """
+    if not samples:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    proportion = hits / samples
+    denominator = 1 + z * z / samples
+    center = (proportion + z * z / (2 * samples)) / denominator
+    margin = z * sqrt(proportion * (1 - proportion) / samples + z * z / (4 * samples * samples)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class ProbabilityEstimate(float):
+    """
+    Probability (as a percentage) that also carries how reliable it is.
+    It behaves like a float, so it can be printed or compared as before.
+
+    Attributes:
+        lower (float): Lower bound of the confidence interval, as a percentage.
+        upper (float): Upper bound of the confidence interval, as a percentage.
+        samples (int): Number of runouts the estimate is based on.
+        confidence (float): Confidence level of the interval.
+        exact (bool): True if every runout was enumerated, the interval is then a single point.
+    """
+
+    def __new__(cls, value, lower, upper, samples, confidence=0.95, exact=False):
+        estimate = super().__new__(cls, value)
+        estimate.lower = lower
+        estimate.upper = upper
+        estimate.samples = samples
+        estimate.confidence = confidence
+        estimate.exact = exact
+        return estimate
+
+    def __reduce__(self):
+        return (ProbabilityEstimate, (float(self), self.lower, self.upper, self.samples, self.confidence, self.exact))
+
+    @property
+    def half_width(self):
+        """Half the width of the confidence interval, in percentage points."""
+        return (self.upper - self.lower) / 2
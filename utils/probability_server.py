@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from cards import parse_card
+from utils.hand_rankings import HandRanks
+
+MAX_QUERY_SAMPLES = 200000  # Upper limit of the samples a single query may ask for
+
+
+def _parse_cards(texts, field, allowed_sizes=None):
+    """Parse a list of cards in short notation ('Ah', 'Td'...) into codes."""
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise ValueError(f"El campo '{field}' debe ser una lista de cartas.")
+    codes = tuple(parse_card(text) for text in texts)
+    if allowed_sizes is not None and len(codes) not in allowed_sizes:
+        raise ValueError(f"Numero de cartas no valido en '{field}': {len(codes)}.")
+    return codes
+
+
+def _check_distinct(*groups):
+    codes = [code for group in groups for code in group]
+    if len(set(codes)) != len(codes):
+        raise ValueError("Hay cartas repetidas en la consulta.")
+
+
+def _target_rank(target):
+    """Accept a HandRanks name ('FLUSH') or value (6)."""
+    if isinstance(target, int):
+        return HandRanks(target)
+    try:
+        return HandRanks[str(target).upper()]
+    except KeyError:
+        raise ValueError(f"Rango de mano no valido: '{target}'.")
+
+
+def _sample_budget(query):
+    samples = query.get("samples")
+    if samples is None:
+        return None
+    if not isinstance(samples, int) or not 0 < samples <= MAX_QUERY_SAMPLES:
+        raise ValueError(f"El numero de muestras debe estar entre 1 y {MAX_QUERY_SAMPLES}.")
+    return samples
+
+
+def answer_query(query):
+    """
+    Answer one query, this is the CPU work done inside the worker processes.
+
+    Queries are dictionaries with cards in short notation:
+        {"query": "probability", "hole": ["Ah", "Kh"], "board": ["2h", "7h", "Jc"], "target": "FLUSH"}
+        {"query": "equity", "hole": ["Ah", "Kh"], "board": [], "villain": ["Qs", "Qd"]}
+        {"query": "equity", "hole": ["Ah", "Kh"], "opponents": 3, "samples": 5000}
+        {"query": "rank", "cards": ["Ah", "Kh", "Qh", "Jh", "Th", "2c", "3d"]}
+    Every query may also list "dead" cards that are out of play.
+
+    Returns:
+        Dict: The answer, ready to be serialized as JSON.
+
+    Raises:
+        ValueError: If the query is not valid.
+    """
+    from utils.equity_calculator import EquityCalculator
+    from utils.hand_evaluator import HandEvaluator
+    from utils.probability_calculator import ProbabilityCalculator
+
+    kind = query.get("query")
+    dead_codes = _parse_cards(query.get("dead", []), "dead")
+
+    if kind == "rank":
+        codes = _parse_cards(query.get("cards"), "cards", range(5, 8))
+        _check_distinct(codes)
+        score = HandEvaluator.score_codes(codes)
+        rank = HandEvaluator.rank_of(score)
+        return {"rank": rank.name, "name": HandRanks.get_name(rank), "score": score}
+
+    hole_codes = _parse_cards(query.get("hole"), "hole", (2,))
+    board_codes = _parse_cards(query.get("board", []), "board", (0, 3, 4, 5))
+    samples = _sample_budget(query)
+
+    if kind == "probability":
+        _check_distinct(hole_codes, board_codes, dead_codes)
+        known_codes = hole_codes + board_codes
+        remaining_codes = [code for code in range(52) if code not in known_codes and code not in dead_codes]
+        distribution = ProbabilityCalculator.distribution_for_codes(
+            known_codes, remaining_codes, 5 - len(board_codes), samples=samples
+        )
+        answer = {
+            "exact": distribution.exact,
+            "samples": distribution.total,
+            "probabilities": {rank.name: distribution.probability(rank) for rank in HandRanks},
+            "at_least": {rank.name: distribution.at_least(rank) for rank in HandRanks},
+        }
+        if query.get("target") is not None:
+            estimate = distribution.estimate(_target_rank(query["target"]))
+            answer.update(probability=float(estimate), lower=estimate.lower, upper=estimate.upper)
+        return answer
+
+    if kind == "equity":
+        villain = query.get("villain")
+        villain_codes = _parse_cards(villain, "villain", (2,)) if villain is not None else None
+        _check_distinct(hole_codes, board_codes, dead_codes, villain_codes or ())
+        opponents = query.get("opponents", 1)
+        if not isinstance(opponents, int) or not 1 <= opponents <= 8:
+            raise ValueError("El numero de oponentes debe estar entre 1 y 8.")
+        equity = EquityCalculator.equity_for_codes(
+            hole_codes, board_codes, dead_codes, villain_codes, opponents, samples=samples
+        )
+        return {
+            "win": equity.win,
+            "tie": equity.tie,
+            "loss": equity.loss,
+            "equity": equity.equity,
+            "samples": equity.samples,
+            "exact": equity.exact,
+        }
+
+    raise ValueError(f"Consulta no valida: '{kind}', debe ser 'probability', 'equity' o 'rank'.")
+
+
+def _answer_batch(queries):
+    """Answer a batch of queries in a worker process, one failing query does not fail the others."""
+    answers = []
+    for query in queries:
+        try:
+            answers.append(answer_query(query))
+        except Exception as error:
+            # Any error, even an unexpected one, only reaches the client that sent the query
+            answers.append({"error": str(error)})
+    return answers
+
+
+def _warm_up():
+    """Build the evaluator tables and map the preflop table once per worker process."""
+    from utils.hand_evaluator import HandEvaluator
+    from utils.preflop_table import PreflopTable
+    HandEvaluator.score_codes(range(7))
+    PreflopTable.load()
+
+
+class ProbabilityServer(object):
+    """
+    Local asyncio server that answers probability, equity and hand rank queries.
+
+    The protocol is one JSON object per line in both directions, over localhost TCP
+    or a Unix socket. Answers carry the "id" of their query and may arrive out of order.
+
+    Queries from every connection go through a single bounded queue. A batcher takes
+    up to `batch_size` of them (waiting at most `batch_window` seconds after the first
+    one), answers identical queries only once and spreads the batch over a process
+    pool, so the event loop only moves bytes around. At most one chunk per worker is
+    in flight: when they are all busy the queue fills up, connections stop being read
+    and the clients are slowed down by TCP itself.
+
+    Attributes:
+        queries (int): Queries received.
+        batches (int): Batches taken from the queue.
+        coalesced (int): Queries answered by an identical query of the same batch.
+    """
+
+    BATCH_SIZE = 64
+    BATCH_WINDOW = 0.002  # Seconds the batcher waits for more queries after the first one
+    MAX_PENDING = 1024  # Queries waiting for a batch before connections stop being read
+
+    def __init__(self, workers=None, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW, max_pending=MAX_PENDING):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.queries = 0
+        self.batches = 0
+        self.coalesced = 0
+        self._pool = None
+        self._pending = None
+        self._slots = None
+        self._server = None
+        self._batcher = None
+        self._unix_path = None
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        """Start the workers and listen on a TCP port, or on a Unix socket if a path is given."""
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+        self._pending = asyncio.Queue(maxsize=self.max_pending)
+        self._slots = asyncio.Semaphore(self.workers)
+        self._batcher = asyncio.create_task(self._run_batcher())
+        if unix_path:
+            self._unix_path = unix_path
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def close(self):
+        """Stop listening, cancel the batcher and shut the workers down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.remove(self._unix_path)
+
+    def stats(self):
+        """Return the server counters as a dictionary."""
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "coalesced": self.coalesced,
+            "pending": self._pending.qsize() if self._pending else 0,
+            "workers": self.workers,
+        }
+
+    async def _handle_connection(self, reader, writer):
+        lock = asyncio.Lock()
+        replies = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    query = json.loads(line)
+                    if not isinstance(query, dict):
+                        raise ValueError("La consulta debe ser un objeto JSON.")
+                except ValueError as error:
+                    await self._send(writer, lock, {"error": str(error)})
+                    continue
+                self.queries += 1
+                if query.get("query") == "stats":
+                    await self._send(writer, lock, dict(self.stats(), id=query.get("id")))
+                    continue
+                answer = asyncio.get_running_loop().create_future()
+                # Waits while the queue is full, which stops reading this connection
+                await self._pending.put((query, answer))
+                reply = asyncio.create_task(self._reply(writer, lock, query.get("id"), answer))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+            if replies:
+                await asyncio.gather(*replies)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _reply(self, writer, lock, query_id, answer):
+        try:
+            result = await answer
+        except Exception as error:
+            result = {"error": str(error)}
+        await self._send(writer, lock, dict(result, id=query_id))
+
+    @staticmethod
+    async def _send(writer, lock, message):
+        async with lock:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._pending.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Identical queries (apart from their id) are answered once
+            unique = {}
+            for query, answer in batch:
+                key = json.dumps({field: value for field, value in query.items() if field != "id"}, sort_keys=True)
+                unique.setdefault(key, []).append(answer)
+            self.batches += 1
+            self.coalesced += len(batch) - len(unique)
+
+            # The batch is spread over the workers, one chunk per worker at most, while
+            # they are all busy the rest of the queries keep waiting in the queue
+            items = list(unique.items())
+            chunks = min(self.workers, len(items))
+            for index in range(chunks):
+                await self._slots.acquire()
+                asyncio.create_task(self._run_chunk(items[index::chunks]))
+
+    async def _run_chunk(self, items):
+        try:
+            queries = [json.loads(key) for key, _ in items]
+            loop = asyncio.get_running_loop()
+            answers = await loop.run_in_executor(self._pool, _answer_batch, queries)
+            for (_, futures), answer in zip(items, answers):
+                for future in futures:
+                    future.set_result(answer)
+        except Exception as error:
+            for _, futures in items:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+        finally:
+            self._slots.release()
+
+
+async def serve(host, port, unix_path, workers):
+    server = ProbabilityServer(workers)
+    await server.start(host, port, unix_path)
+    where = unix_path or f"{host}:{port}"
+    print(f"Servidor de probabilidades escuchando en {where} con {server.workers} procesos.")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for stop_signal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(stop_signal, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows has no signal handlers in the event loop, Ctrl+C still works
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve probability, equity and hand rank queries locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, one per core by default")
+    arguments = parser.parse_args()
+    try:
+        asyncio.run(serve(arguments.host, arguments.port, arguments.unix, arguments.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,78 @@
+from itertools import combinations
+from utils.hand_distribution import HandDistribution
+from utils.hand_evaluator import HandEvaluator, CATEGORY_SHIFT
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import instrumented
+
+
+class ProbabilityTree(object):
+    """
+    Hand rank of every turn and river under a flop, for one player.
+
+    Every pair of cards that can still be dealt is evaluated once when the tree is
+    built, and the result is stored both as the final rank of that runout and in
+    the counts of each of its two cards as a turn card. The flop, turn and river
+    distributions are then read from the tree without evaluating anything else.
+
+    Attributes:
+        known_codes (Tuple[int]): Codes of the player's hole cards and the flop.
+        remaining_codes (List[int]): Codes of the cards that could be dealt after the flop.
+        flop_counts (List[int]): Count per HandRanks value over every turn and river.
+        turn_counts (Dict[int, List[int]]): Count per HandRanks value over the rivers of each turn card.
+        river_ranks (bytearray): HandRanks value of each (turn, river) pair, indexed by turn * 52 + river.
+    """
+
+    def __init__(self, known_codes, remaining_codes):
+        self.known_codes = tuple(known_codes)
+        self.remaining_codes = list(remaining_codes)
+        self.flop_counts = [0] * (len(HandRanks) + 1)
+        self.turn_counts = {code: [0] * (len(HandRanks) + 1) for code in self.remaining_codes}
+        self.river_ranks = bytearray(52 * 52)
+
+        # The known cards are folded once, each runout only adds its two cards
+        folded = HandEvaluator.board_state(self.known_codes)
+        score_with_board = HandEvaluator.score_with_board
+        flop_counts = self.flop_counts
+        turn_counts = self.turn_counts
+        river_ranks = self.river_ranks
+        for turn, river in combinations(self.remaining_codes, 2):
+            rank = score_with_board(folded, (turn, river)) >> CATEGORY_SHIFT
+            flop_counts[rank] += 1
+            turn_counts[turn][rank] += 1
+            turn_counts[river][rank] += 1
+            river_ranks[turn * 52 + river] = rank
+            river_ranks[river * 52 + turn] = rank
+
+    def matches(self, known_codes, remaining_codes):
+        """Check if the tree was built for these hole cards and flop, with the same cards left to deal."""
+        board = known_codes[len(self.known_codes):]
+        return (
+            tuple(known_codes[:len(self.known_codes)]) == self.known_codes
+            and set(self.remaining_codes) == set(remaining_codes).union(board)
+        )
+
+    @staticmethod
+    @instrumented("ProbabilityTree.build", samples=lambda tree: sum(tree.flop_counts))
+    def build(known_codes, remaining_codes):
+        """Build the tree of a flop, every turn and river pair is evaluated here."""
+        return ProbabilityTree(known_codes, remaining_codes)
+
+    def distribution(self, turn=None, river=None):
+        """
+        Return the hand rank distribution of a street.
+
+        Args:
+            turn (int): Code of the turn card, None on the flop.
+            river (int): Code of the river card, None before the river.
+
+        Returns:
+            HandDistribution: Exact counts of every hand rank over the runouts left.
+        """
+        if turn is None:
+            return HandDistribution(self.flop_counts[:], sum(self.flop_counts), True)
+        if river is None:
+            counts = self.turn_counts[turn]
+            return HandDistribution(counts[:], sum(counts), True)
+        counts = [0] * (len(HandRanks) + 1)
+        counts[self.river_ranks[turn * 52 + river]] = 1
+        return HandDistribution(counts, 1, True)
@@ -0,0 +1,95 @@
+import shelve
+from collections import OrderedDict
+
+
+def canonical_key(*groups):
+    """
+    Return a key shared by every query that only differs by card order or suit relabeling.
+
+    Each group is a collection of card codes (hole cards, board, dead cards...).
+    Every suit is described by the ranks it holds in each group, and the key is the
+    sorted list of those descriptions, so swapping suits around gives the same key.
+
+    Args:
+        groups (Iterable[int]): Card codes of each part of the query.
+
+    Returns:
+        Tuple: A hashable canonical key.
+    """
+    signatures = [[[] for _ in groups] for _ in range(4)]
+    for position, group in enumerate(groups):
+        for code in group:
+            signatures[code & 3][position].append(code >> 2)
+    return tuple(sorted(tuple(tuple(sorted(ranks)) for ranks in suit) for suit in signatures))
+
+
+class QueryCache(object):
+    """
+    Bounded least recently used cache for query results, with an optional on-disk tier.
+
+    Attributes:
+        maxsize (int): Maximum number of results kept in memory.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that were not cached.
+        evictions (int): Results dropped from memory to respect `maxsize`.
+    """
+
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._disk = shelve.open(path) if path else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return the cached result for a key, None if there is none."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        if self._disk is not None and repr(key) in self._disk:
+            value = self._disk[repr(key)]
+            self._store(key, value)
+            self.hits += 1
+            return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Cache a result, writing it to the disk tier when there is one."""
+        self._store(key, value)
+        if self._disk is not None:
+            self._disk[repr(key)] = value
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every result kept in memory and reset the counters."""
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def close(self):
+        """Close the disk tier."""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self):
+        """Return the cache counters as a dictionary."""
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,193 @@
+import random
+from math import comb
+from utils.hand_evaluator import CARD_BITS, CARD_PRIMES, CATEGORY_SHIFT, FLUSH_SCORES, PRIMES, RANK_SCORES, HandEvaluator
+from utils.hand_rankings import HandRanks
+from utils.instrumentation import instrumented
+
+SAMPLERS = ("random", "stratified", "suit_symmetric", "sobol")
+
+# Sobol sequence: bits of every coordinate and the primitive polynomials (degree, coefficients,
+# initial direction numbers) of dimensions 2 to 5, from the Joe-Kuo table. Dimension 1 is van der Corput.
+SOBOL_BITS = 30
+SOBOL_POLYNOMIALS = ((1, 0, (1,)), (2, 1, (1, 3)), (3, 1, (1, 3, 1)), (3, 2, (1, 1, 1)), (4, 1, (1, 1, 3, 3)))
+
+
+def sobol_directions(dimensions):
+    """Return the direction numbers of the first dimensions of the Sobol sequence, 5 at most."""
+    directions = [[1 << (SOBOL_BITS - 1 - bit) for bit in range(SOBOL_BITS)]]
+    for degree, coefficients, initial in SOBOL_POLYNOMIALS[:dimensions - 1]:
+        numbers = list(initial)
+        for bit in range(degree, SOBOL_BITS):
+            value = numbers[bit - degree] ^ (numbers[bit - degree] << degree)
+            for term in range(1, degree):
+                if coefficients >> (degree - 1 - term) & 1:
+                    value ^= numbers[bit - term] << term
+            numbers.append(value)
+        directions.append([number << (SOBOL_BITS - 1 - bit) for bit, number in enumerate(numbers)])
+    return directions
+
+
+def sobol_points(count, dimensions, rng):
+    """
+    Yield the first points of the Sobol sequence in the unit cube, in Gray code order.
+    Every coordinate is XORed with a random shift, so each point is still uniform and
+    the estimates are unbiased, while the points keep filling the cube evenly.
+    """
+    directions = sobol_directions(dimensions)
+    shifts = [rng.getrandbits(SOBOL_BITS) for _ in range(dimensions)]
+    point = [0] * dimensions
+    scale = 1 << SOBOL_BITS
+    for index in range(count):
+        yield [(value ^ shift) / scale for value, shift in zip(point, shifts)]
+        # The next point flips the direction of the lowest zero bit of the index
+        bit = (~index & (index + 1)).bit_length() - 1
+        for dimension in range(dimensions):
+            point[dimension] ^= directions[dimension][bit]
+
+
+class RunoutSampler(object):
+    """
+    Utility class with the strategies that sample runouts when they are too many to enumerate.
+
+        random          independent uniform runouts, like `ProbabilityCalculator.get_runouts`
+        stratified      the same number of runouts starts with each remaining card
+        suit_symmetric  hands without a flush only depend on the ranks, so their counts are
+                        enumerated exactly over rank multisets and sampling only corrects flushes
+        sobol           scrambled Sobol points, each one deals a runout card by card
+
+    Every strategy returns per rank counts over `samples` runouts like plain sampling, so
+    the rest of the calculator does not change. The counts of "suit_symmetric" are not
+    integers, and the binomial interval of the distribution is conservative for every
+    strategy other than "random" (see benchmarks/sampler_benchmark.py for the actual errors).
+
+    There is no antithetic strategy: it only reduces the variance of outputs that move
+    monotonically with the inputs, and a hand rank does not. Mirrored positions in the
+    remaining cards and complementary uniforms dealing the runout both measured between
+    0.8x and 1.2x the error of plain sampling.
+    """
+
+    @staticmethod
+    def stratified_runouts(remaining_codes, needed_cards, samples, rng):
+        """Yield runouts whose first card goes through every remaining card the same number of times."""
+        per_card, extra = divmod(samples, len(remaining_codes))
+        # The runouts left over go to randomly chosen cards, which keeps the strata equally likely
+        lucky = set(rng.sample(range(len(remaining_codes)), extra))
+        for position, code in enumerate(remaining_codes):
+            others = remaining_codes[:position] + remaining_codes[position + 1:]
+            for _ in range(per_card + (position in lucky)):
+                yield (code,) + tuple(rng.sample(others, needed_cards - 1))
+
+    @staticmethod
+    def sobol_runouts(remaining_codes, needed_cards, samples, rng):
+        """Yield runouts dealt from Sobol points, coordinate j picks the j-th card among those left."""
+        for point in sobol_points(samples, needed_cards, rng):
+            left = list(remaining_codes)
+            yield tuple(left.pop(int(value * len(left))) for value in point)
+
+    @staticmethod
+    def rank_counts(known_codes, remaining_codes, needed_cards):
+        """
+        Count the runouts that end in each hand rank when flushes are ignored, without dealing them.
+
+        Every multiset of runout ranks is enumerated once (at most 6188 of them for five
+        cards), weighted by the number of ways to pick its cards from the remaining ones.
+
+        Returns:
+            Tuple[List[int], int]: Count per HandRanks value, as if no suit made a flush, and number of runouts.
+        """
+        if not RANK_SCORES:
+            HandEvaluator.score_codes(range(7))
+        available = [0] * len(PRIMES)
+        for code in remaining_codes:
+            available[code >> 2] += 1
+        known_key = 1
+        for code in known_codes:
+            known_key *= CARD_PRIMES[code]
+        counts = [0] * (len(HandRanks) + 1)
+
+        def visit(rank, cards_left, key, ways):
+            if not cards_left:
+                counts[RANK_SCORES[key] >> CATEGORY_SHIFT] += ways
+                return
+            if rank == len(PRIMES):
+                return
+            for taken in range(min(cards_left, available[rank]) + 1):
+                visit(rank + 1, cards_left - taken, key, ways * comb(available[rank], taken))
+                key *= PRIMES[rank]
+
+        visit(0, needed_cards, known_key, 1)
+        return counts, comb(len(remaining_codes), needed_cards)
+
+    @staticmethod
+    def suit_symmetric_ranks(known_codes, remaining_codes, needed_cards, samples, rng):
+        """
+        Count the hand ranks exactly for every hand but flushes, and correct them with sampled runouts.
+
+        A runout changes the count only when it makes a flush (or a straight flush): the rank it
+        would have had without one loses a runout and the flush gains it. So the sampling error
+        only comes from flushes, instead of from every rank.
+
+        Returns:
+            Tuple[List[float], int]: Expected count per HandRanks value over `samples` runouts and `samples`.
+        """
+        rank_counts, total = RunoutSampler.rank_counts(known_codes, remaining_codes, needed_cards)
+        corrections = [0] * len(rank_counts)
+        known_key = 1
+        known_masks = [0, 0, 0, 0]
+        for code in known_codes:
+            known_key *= CARD_PRIMES[code]
+            known_masks[code & 3] |= CARD_BITS[code]
+        for _ in range(samples):
+            key = known_key
+            suit_masks = known_masks[:]
+            for code in rng.sample(remaining_codes, needed_cards):
+                key *= CARD_PRIMES[code]
+                suit_masks[code & 3] |= CARD_BITS[code]
+            for mask in suit_masks:
+                if mask in FLUSH_SCORES:
+                    corrections[FLUSH_SCORES[mask] >> CATEGORY_SHIFT] += 1
+                    corrections[RANK_SCORES[key] >> CATEGORY_SHIFT] -= 1
+                    break
+        # A rank too rare to be hit can end slightly below zero, it is clipped
+        counts = [max(0.0, count * samples / total + correction) for count, correction in zip(rank_counts, corrections)]
+        return counts, samples
+
+    @staticmethod
+    @instrumented("RunoutSampler.count_ranks", samples=lambda result: result[1])
+    def count_ranks(known_codes, remaining_codes, needed_cards, samples, sampler, seed=None):
+        """
+        Count the hand ranks of `samples` runouts drawn with one of the strategies.
+
+        Args:
+            known_codes (Tuple[int]): Codes of the player's hole cards and the community cards.
+            remaining_codes (List[int]): Codes of the cards that can still be dealt.
+            needed_cards (int): Number of community cards yet to be dealt, at least 1.
+            samples (int): Number of runouts.
+            sampler (str): One of `SAMPLERS`.
+            seed: Seed that makes the result reproducible, an int or a tuple of them.
+
+        Returns:
+            Tuple[List[float], int]: Count per HandRanks value (indexed by the enum value) and number of runouts.
+
+        Raises:
+            ValueError: If the sampler is not one of `SAMPLERS`.
+        """
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Muestreo no valido, debe ser uno de {SAMPLERS}.")
+        # Seeds can be tuples, like the (seed, batch) pairs of refine_distribution
+        rng = random.Random(None if seed is None else str(seed))
+        known_codes = tuple(known_codes)
+        remaining_codes = list(remaining_codes)
+        if sampler == "suit_symmetric":
+            return RunoutSampler.suit_symmetric_ranks(known_codes, remaining_codes, needed_cards, samples, rng)
+        if sampler == "stratified":
+            runouts = RunoutSampler.stratified_runouts(remaining_codes, needed_cards, samples, rng)
+        elif sampler == "sobol":
+            runouts = RunoutSampler.sobol_runouts(remaining_codes, needed_cards, samples, rng)
+        else:
+            runouts = (tuple(rng.sample(remaining_codes, needed_cards)) for _ in range(samples))
+        counts = [0] * (len(HandRanks) + 1)
+        score_codes = HandEvaluator.score_codes
+        for runout in runouts:
+            counts[score_codes(known_codes + runout) >> CATEGORY_SHIFT] += 1
+        return counts, samples